@@ -1,45 +1,328 @@
-from flask import Flask, render_template, jsonify
+from flask import Flask, render_template, jsonify, request, Response
 from flask_socketio import SocketIO, emit
 from council_orchestrator import AICouncil
+from async_council_orchestrator import AsyncAICouncil
+from tools import CouncilTools
+from cache import TTLCache
+from extraction_cache import ExtractionCache
+from host_pool import HostPool
+from uploads import UploadManager, UploadMismatch
+from scheduler import CouncilScheduler
+from cancellation import CancelToken, CouncilCancelled
+from conversations import ConversationStore
+from batch import BatchRunner, BatchCheckpoint, read_requests
+from message_queue import SqliteManager
+from job_queue import JobQueue
+import asyncio
+import json
+import multiprocessing
 import threading
-import base64
-import tempfile
 import os
+import re
+import tempfile
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'council-secret-key'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
-socketio = SocketIO(app, cors_allowed_origins="*", max_http_buffer_size=16 * 1024 * 1024)
 
-council = AICouncil()
+# COUNCIL_QUEUE=sqlite:////tmp/council-queue.db runs councils in worker processes: this process
+# queues each request there and workers emit its events back through the same file
+COUNCIL_QUEUE = os.environ.get('COUNCIL_QUEUE')
+socketio_options = {'client_manager': SqliteManager(COUNCIL_QUEUE)} if COUNCIL_QUEUE else {}
+
+# Files are uploaded in chunks, so a single Socket.IO message never needs to hold more than one
+socketio = SocketIO(app, cors_allowed_origins="*", max_http_buffer_size=2 * 1024 * 1024, **socketio_options)
+
+# Chunked uploads are written to disk as they arrive; COUNCIL_MAX_UPLOAD_SIZE caps the file size
+uploads = UploadManager(max_size=int(os.environ.get('COUNCIL_MAX_UPLOAD_SIZE', 512 * 1024 * 1024)))
+
+# COUNCIL_SEARCH_CACHE_DB keeps web search results on disk so they survive restarts
+if os.environ.get('COUNCIL_SEARCH_CACHE_DB'):
+    CouncilTools.search_cache = TTLCache(
+        max_entries=256,
+        ttl=int(os.environ.get('COUNCIL_SEARCH_CACHE_TTL', 15 * 60)),
+        db_path=os.environ['COUNCIL_SEARCH_CACHE_DB'],
+        table='search_cache'
+    )
+
+# Extracted document text is cached on disk by content hash; COUNCIL_EXTRACTION_CACHE_MB bounds its size
+CouncilTools.extraction_cache = ExtractionCache(
+    directory=os.environ.get('COUNCIL_EXTRACTION_CACHE_DIR'),
+    max_bytes=int(os.environ.get('COUNCIL_EXTRACTION_CACHE_MB', 256)) * 1024 * 1024
+)
+
+# Memoized advisor answers, used when a request opts in with use_cache
+response_cache = TTLCache(
+    max_entries=int(os.environ.get('COUNCIL_RESPONSE_CACHE_SIZE', 512)),
+    ttl=int(os.environ.get('COUNCIL_RESPONSE_CACHE_TTL', 60 * 60)),
+    db_path=os.environ.get('COUNCIL_RESPONSE_CACHE_DB'),
+    table='response_cache'
+)
+
+# COUNCIL_ENGINE=async runs every council on one shared event loop instead of a thread per request
+COUNCIL_ENGINE = os.environ.get('COUNCIL_ENGINE', 'threads')
+
+# COUNCIL_ROUTING=0 always convenes the whole council instead of sizing it to each question
+COUNCIL_ROUTING = os.environ.get('COUNCIL_ROUTING', '1') != '0'
+
+# Model residency: how long Ollama keeps models loaded, and how many fit at once
+council_options = {
+    'response_cache': response_cache,
+    'keep_alive': os.environ.get('COUNCIL_KEEP_ALIVE', '30m'),
+    'max_loaded_models': int(os.environ.get('COUNCIL_MAX_LOADED_MODELS', 1)),
+    # Seconds between background refreshes of the Ollama model list
+    'model_refresh_interval': int(os.environ.get('COUNCIL_MODEL_REFRESH_INTERVAL', 60)),
+    # Token budget for document excerpts added to the question
+    'document_context_tokens': int(os.environ.get('COUNCIL_DOCUMENT_CONTEXT_TOKENS', 1500)),
+    # Context size advisor prompts are fitted into (older opinions are compressed beyond it)
+    'prompt_budget_tokens': int(os.environ.get('COUNCIL_PROMPT_BUDGET_TOKENS', 3072)),
+    # Model that judges whether ministers agree in adaptive deliberation (default: router model, else the Prime Minister's)
+    'consensus_model': os.environ.get('COUNCIL_CONSENSUS_MODEL') or None,
+    # Word overlap (0-1) at which ministers count as agreeing when the judge gives no verdict
+    'consensus_threshold': float(os.environ.get('COUNCIL_CONSENSUS_THRESHOLD', 0.8)),
+    # Small model that classifies questions the routing heuristics are unsure about
+    'router_model': os.environ.get('COUNCIL_ROUTER_MODEL') or None,
+    # COUNCIL_ROUTER_SMALL_MODELS=1 answers simple questions on the smallest model instead of the advisors' own
+    'router_small_models': os.environ.get('COUNCIL_ROUTER_SMALL_MODELS', '0') == '1',
+    # COUNCIL_ALLOWED_HOSTS=gpu1,http://gpu2:11434 limits the Ollama hosts sessions may switch to (default: any)
+    'allowed_hosts': [h.strip() for h in os.environ.get('COUNCIL_ALLOWED_HOSTS', '').split(',') if h.strip()] or None,
+    # How many session-picked Ollama hosts keep a client and model catalog at once
+    'max_hosts': int(os.environ.get('COUNCIL_MAX_HOSTS', 8))
+}
+
+# OLLAMA_HOSTS=http://gpu1:11434,http://gpu2:11434 load-balances advisors across several Ollama servers
+ollama_hosts = [h.strip() for h in os.environ.get('OLLAMA_HOSTS', '').split(',') if h.strip()]
+if ollama_hosts:
+    council_options['ollama_host'] = ollama_hosts[0]
+    council_options['host_pool'] = HostPool(
+        ollama_hosts,
+        poll_interval=int(os.environ.get('COUNCIL_HOST_POLL_INTERVAL', 30))
+    ).start()
+
+if COUNCIL_ENGINE == 'async':
+    council = AsyncAICouncil(**council_options)
+    council_loop = asyncio.new_event_loop()
+    threading.Thread(target=council_loop.run_forever, name='council-loop', daemon=True).start()
+else:
+    council = AICouncil(**council_options)
+
+# COUNCIL_MODEL_PROMPT_BUDGETS=llama3.2:3b=8192,qwen2.5:7b=32768 sets budgets for specific models
+for entry in os.environ.get('COUNCIL_MODEL_PROMPT_BUDGETS', '').split(','):
+    if '=' in entry:
+        model, tokens = entry.rsplit('=', 1)
+        council.prompts.set_budget(model.strip(), int(tokens))
+
+# At most COUNCIL_MAX_RUNNING councils run at once; further requests wait in a fair, priority-aware queue
+scheduler = CouncilScheduler(
+    max_running=int(os.environ.get('COUNCIL_MAX_RUNNING', 2)),
+    max_queued_per_user=int(os.environ.get('COUNCIL_MAX_QUEUED_PER_USER', 3)),
+    # Async councils are admitted straight onto the loop instead of each occupying a thread
+    loop=council_loop if COUNCIL_ENGINE == 'async' else None
+)
+
+# Council jobs waiting for a worker process, when COUNCIL_QUEUE is set
+jobs = JobQueue(
+    COUNCIL_QUEUE,
+    max_queued_per_user=int(os.environ.get('COUNCIL_MAX_QUEUED_PER_USER', 3))
+) if COUNCIL_QUEUE else None
+
+# Seconds between checks of waiting jobs' places in the shared queue
+QUEUE_POSITION_INTERVAL = float(os.environ.get('COUNCIL_QUEUE_POSITION_INTERVAL', 0.5))
+queue_watcher_started = False
+queue_watcher_lock = threading.Lock()
+
+def watch_queue_positions():
+    """Send council_queued whenever a waiting job's place in the shared queue changes.
+    
+    Jobs move up when workers claim or finish jobs, when other clients cancel,
+    when a higher-priority job arrives, and as they age.
+    """
+    sent = {}
+    while True:
+        try:
+            waiting = jobs.waiting()
+        except Exception as e:
+            print(f"Error reading queue positions: {e}")
+            waiting = None
+        if waiting is not None:
+            positions = {}
+            for job_id, user, position, queue_length in waiting:
+                positions[job_id] = position
+                if sent.get(job_id) != position:
+                    socketio.emit('council_queued', {'position': position, 'queue_length': queue_length}, to=user)
+            sent = positions
+        socketio.sleep(QUEUE_POSITION_INTERVAL)
+
+def start_queue_watcher():
+    """Start watch_queue_positions once, from the web process (workers never call this)"""
+    global queue_watcher_started
+    with queue_watcher_lock:
+        if queue_watcher_started:
+            return
+        queue_watcher_started = True
+    socketio.start_background_task(watch_queue_positions)
+
+# Multi-turn conversations: append-only transcripts plus a bounded rolling summary per conversation id
+conversations = ConversationStore(
+    db_path=os.environ.get('COUNCIL_CONVERSATIONS_DB'),
+    summary_tokens=int(os.environ.get('COUNCIL_HISTORY_SUMMARY_TOKENS', 400)),
+    answer_tokens=int(os.environ.get('COUNCIL_HISTORY_ANSWER_TOKENS', 400))
+)
+
+# Batch checkpoints (POST /batch?batch_id=...) are kept here so an interrupted batch can be resumed
+BATCH_DIR = os.environ.get('COUNCIL_BATCH_DIR') or os.path.join(tempfile.gettempdir(), 'council-batches')
+batch_council = None
+batch_council_lock = threading.Lock()
+
+def get_batch_council():
+    """Council for batch runs: a fork of the main one, or its own thread-based council under the async engine"""
+    global batch_council
+    with batch_council_lock:
+        if batch_council is None:
+            batch_council = council.fork() if COUNCIL_ENGINE != 'async' else AICouncil(**council_options)
+    if not batch_council.advisors:
+        batch_council.get_available_models(wait=30)
+        if not batch_council.advisors and council.default_advisors:
+            batch_council.advisors = list(council.default_advisors)
+    return batch_council
+
+# Each Socket.IO session gets its own fork of the council (advisors, host), sharing
+# the base council's clients, caches and model catalogs
+sessions = {}
+sessions_lock = threading.Lock()
+
+def session_council():
+    """The requesting session's council, created on first use"""
+    with sessions_lock:
+        session = sessions.get(request.sid)
+        if session is None:
+            session = sessions[request.sid] = council.fork()
+    
+    # Sessions opened before the first model listing pick up the defaults once they exist
+    if not session.default_advisors and council.default_advisors:
+        session.default_advisors = list(council.default_advisors)
+        if not session.advisors:
+            session.advisors = list(council.default_advisors)
+    return session
+
+# Pre-load the first models the council needs so the first question doesn't pay for it.
+# PDF extraction workers are spawned and re-import this module, so only the parent warms up.
+if os.environ.get('COUNCIL_WARMUP', '1') != '0' and multiprocessing.parent_process() is None:
+    threading.Thread(target=council.warm_up_models, name='council-warmup', daemon=True).start()
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/metrics')
+def metrics():
+    """Latency, token and tool timings in Prometheus text format"""
+    return Response(council.metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/hosts')
+def host_status():
+    """Health, models and load of each Ollama host in the pool"""
+    if council.host_pool is None:
+        return jsonify({'pool': False, 'hosts': [{'url': council.ollama_host}]})
+    return jsonify({'pool': True, 'hosts': council.host_pool.status()})
+
+@app.route('/queue')
+def queue_status():
+    """Running and waiting council requests"""
+    return jsonify(jobs.status() if jobs else scheduler.status())
+
+@app.route('/conversations/<conversation_id>')
+def conversation_transcript(conversation_id):
+    """Every turn of a conversation and the context its next question will get"""
+    # Ids are random and only sent to the socket that started the conversation
+    if not conversations.exists(conversation_id):
+        return jsonify({'error': 'Conversation not found'}), 404
+    return jsonify({
+        'turns': conversations.transcript(conversation_id),
+        'context': conversations.context(conversation_id)
+    })
+
+@app.route('/batch', methods=['POST'])
+def run_batch():
+    """Run a JSONL body of council requests, streaming a JSONL result as each question finishes.
+    
+    With ?batch_id=NAME progress is checkpointed, and posting the same batch
+    again replays the finished results and resumes the rest.
+    """
+    try:
+        batch_requests = read_requests(request.get_data(as_text=True).splitlines())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        parallel = int(request.args.get('parallel', 1))
+    except ValueError:
+        return jsonify({'error': 'parallel must be a whole number'}), 400
+    if parallel < 1:
+        return jsonify({'error': 'parallel must be at least 1'}), 400
+    
+    checkpoint = None
+    batch_id = request.args.get('batch_id')
+    if batch_id:
+        if not re.fullmatch(r'[\w-]+', batch_id):
+            return jsonify({'error': 'batch_id may only contain letters, digits, _ and -'}), 400
+        os.makedirs(BATCH_DIR, exist_ok=True)
+        checkpoint = BatchCheckpoint(os.path.join(BATCH_DIR, f'{batch_id}.db'))
+    
+    session = get_batch_council()
+    if not session.advisors:
+        return jsonify({'error': 'No advisors: no models available'}), 503
+    # Each call runs as a low priority job of the shared scheduler, so a batch can't crowd out the page
+    runner = BatchRunner(session, checkpoint, max_parallel=min(parallel, session.max_parallel_advisors),
+                         scheduler=scheduler, user=f'batch:{batch_id}' if batch_id else 'batch')
+    
+    def stream_results():
+        for result in runner.run(batch_requests):
+            yield json.dumps(result) + '\n'
+    
+    return Response(stream_results(), mimetype='application/x-ndjson')
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    """Drop the session's council and cancel its queued and running requests"""
+    (jobs or scheduler).cancel_user(request.sid, 'Client disconnected')
+    with sessions_lock:
+        sessions.pop(request.sid, None)
+
+@socketio.on('cancel_council')
+def handle_cancel_council():
+    """Stop the session's running council and drop its queued ones"""
+    cancelled = (jobs or scheduler).cancel_user(request.sid, 'Cancelled by user')
+    # Running councils report council_cancelled themselves when they stop
+    if cancelled['waiting'] and not cancelled['running']:
+        emit('council_cancelled', {'reason': 'Cancelled by user'})
+
 @socketio.on('get_models')
 def handle_get_models():
     """Send list of available models to frontend"""
     models = [
         {'name': advisor['name'], 'model': advisor['model'], 'role': advisor['role']}
-        for advisor in council.advisors
+        for advisor in session_council().advisors
     ]
     emit('models_list', {'models': models})
 
 @socketio.on('get_default_settings')
 def handle_get_default_settings():
     """Send default advisor settings and available models"""
+    # Only the very first page load after startup can wait on the initial listing
+    available_models = session_council().get_available_models(wait=5)
+    # Re-read after the wait: the first listing may have just assigned default advisors
+    session = session_council()
     emit('default_settings', {
-        'advisors': council.default_advisors,
-        'available_models': council.get_available_models(),
-        'ollama_host': council.ollama_host
+        'advisors': session.default_advisors,
+        'available_models': available_models,
+        'ollama_host': session.ollama_host
     })
 
 @socketio.on('refresh_models')
 def handle_refresh_models():
     """Refresh available models from Ollama server"""
     try:
-        models = council.get_available_models()
+        models = session_council().get_available_models(force_refresh=True)
         emit('models_refreshed', {
             'success': True,
             'models': models
@@ -55,6 +338,7 @@ def handle_test_endpoint(data):
     """Test connection to Ollama endpoint"""
     endpoint = data.get('endpoint', 'http://localhost:11434')
     try:
+        council.check_host(endpoint)
         from ollama import Client
         test_client = Client(host=endpoint)
         test_client.list()
@@ -75,73 +359,255 @@ def handle_update_settings(data):
         custom_advisors = data.get('advisors', [])
         ollama_host = data.get('ollama_host', 'http://localhost:11434')
         
+        session = session_council()
+        
         # Update Ollama host
-        council.set_ollama_host(ollama_host)
+        session.set_ollama_host(ollama_host)
         
         # Update advisors
-        council.update_advisors(custom_advisors)
+        session.update_advisors(custom_advisors)
         
         emit('settings_updated', {'success': True})
     except Exception as e:
         emit('settings_updated', {'success': False, 'error': str(e)})
 
-@socketio.on('upload_file')
-def handle_file_upload(data):
-    """Handle file uploads and save temporarily"""
+@socketio.on('get_execution_plan')
+def handle_get_execution_plan(data=None):
+    """Report which model loads a council run would cause"""
+    data = data or {}
     try:
-        file_data = data['file_data']
-        file_name = data['file_name']
-        
-        file_bytes = base64.b64decode(file_data.split(',')[1] if ',' in file_data else file_data)
-        
-        temp_dir = tempfile.gettempdir()
-        file_path = os.path.join(temp_dir, file_name)
-        
-        with open(file_path, 'wb') as f:
-            f.write(file_bytes)
-        
+        plan = session_council().get_execution_plan(
+            mode=data.get('mode', 'normal'),
+            selected_model=data.get('selected_model'),
+            deliberation=data.get('deliberation', 'chain')
+        )
+        emit('execution_plan', {'success': True, 'plan': plan})
+    except Exception as e:
+        emit('execution_plan', {'success': False, 'error': str(e)})
+
+@socketio.on('upload_start')
+def handle_upload_start(data):
+    """Begin a chunked upload, or resume one given its upload_id (acknowledged with the offset to send from)"""
+    try:
+        upload = uploads.start(data.get('file_name'), data.get('size'), data.get('upload_id'))
+        return {
+            'success': True,
+            'upload_id': upload.upload_id,
+            'offset': upload.received,
+            'chunk_size': uploads.max_chunk_size
+        }
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+@socketio.on('upload_chunk')
+def handle_upload_chunk(data):
+    """Append one binary chunk to disk (acknowledged with the bytes received so far)"""
+    try:
+        received = uploads.write_chunk(data['upload_id'], data['offset'], data['data'])
+        return {'success': True, 'received': received}
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+@socketio.on('upload_finish')
+def handle_upload_finish(data):
+    """Move a complete upload into place (data may carry the file's sha256 to check against)"""
+    try:
+        result = uploads.finish(data['upload_id'], data.get('sha256'))
+        emit('file_uploaded', dict(result, success=True))
+    except UploadMismatch as e:
+        # The received bytes are wrong; resuming would only finish the same file
+        uploads.abort(data.get('upload_id'))
         emit('file_uploaded', {
-            'file_name': file_name,
-            'file_path': file_path,
-            'success': True
+            'success': False,
+            'error': str(e)
         })
     except Exception as e:
+        # Anything else (a full disk, a lost race) keeps the partial file for the client to retry
         emit('file_uploaded', {
             'success': False,
+            'retryable': True,
+            'upload_id': data.get('upload_id'),
             'error': str(e)
         })
 
+def route_job(session, job):
+    """The council and mode to run a job with, plus the routing decision sent with council_started"""
+    mode = job['mode']
+    if not job['route']:
+        return session, 'normal' if mode == 'auto' else mode, None
+    decision = session.route(job['question'], mode, job['enabled_tools'])
+    return session.routed(decision), decision['mode'], decision
+
+def job_options(job, emit_event, cancel, run_mode, history, run_stats):
+    """convene_council arguments for a job"""
+    def message_callback(message):
+        # Events still in flight when the run is cancelled are dropped
+        if not cancel.cancelled:
+            emit_event('council_message', message)
+    
+    return {
+        'question': job['question'],
+        'callback': message_callback,
+        'mode': run_mode,
+        'selected_model': job['selected_model'],
+        'enabled_tools': job['enabled_tools'],
+        'stream': job['stream'],
+        'deliberation': job['deliberation'],
+        'use_cache': job['use_cache'],
+        'stats': run_stats,
+        'cancel': cancel,
+        'history': history
+    }
+
+def run_council_job(session, job, emit_event, cancel):
+    """Run one convene_council request on a session's council, returning when it ends.
+    
+    Events go out through emit_event(event, data). Used by the local
+    scheduler under the thread engine, and by worker processes when
+    COUNCIL_QUEUE is set (under the async engine they wait on the loop).
+    """
+    if COUNCIL_ENGINE == 'async':
+        asyncio.run_coroutine_threadsafe(run_council_job_async(session, job, emit_event, cancel), council_loop).result()
+        return
+    
+    question = job['question']
+    conversation_id = job.get('conversation_id')
+    # Timings and token counts of every model and tool call, sent with council_complete
+    run_stats = []
+    
+    history = conversations.context(conversation_id) if conversation_id else ''
+    runner, run_mode, routing = route_job(session, job)
+    emit_event('council_started', {'question': question, 'mode': run_mode, 'routing': routing})
+    try:
+        # Planning asks the host which models are loaded, so it follows council_started
+        emit_event('council_plan', runner.get_execution_plan(run_mode, job['selected_model'], job['deliberation']))
+        responses = runner.convene_council(**job_options(job, emit_event, cancel, run_mode, history, run_stats))
+        turn = conversations.append(conversation_id, question, responses, run_mode) if conversation_id else None
+        emit_event('council_complete', {'responses': responses, 'stats': run_stats, 'turn': turn})
+    except CouncilCancelled as e:
+        emit_event('council_cancelled', {'reason': str(e), 'stats': run_stats})
+    except Exception as e:
+        emit_event('council_error', {'error': str(e)})
+
+async def run_council_job_async(session, job, emit_event, cancel):
+    """run_council_job for the async engine: runs on the council loop, blocking calls go to threads"""
+    question = job['question']
+    conversation_id = job.get('conversation_id')
+    run_stats = []
+    
+    history = await asyncio.to_thread(conversations.context, conversation_id) if conversation_id else ''
+    runner, run_mode, routing = await asyncio.to_thread(route_job, session, job)
+    emit_event('council_started', {'question': question, 'mode': run_mode, 'routing': routing})
+    try:
+        plan = await asyncio.to_thread(runner.get_execution_plan, run_mode, job['selected_model'], job['deliberation'])
+        emit_event('council_plan', plan)
+        responses = await runner.convene_council(**job_options(job, emit_event, cancel, run_mode, history, run_stats))
+        turn = await asyncio.to_thread(conversations.append, conversation_id, question, responses, run_mode) if conversation_id else None
+        emit_event('council_complete', {'responses': responses, 'stats': run_stats, 'turn': turn})
+    except CouncilCancelled as e:
+        emit_event('council_cancelled', {'reason': str(e), 'stats': run_stats})
+    except Exception as e:
+        emit_event('council_error', {'error': str(e)})
+
 @socketio.on('convene_council')
 def handle_council_question(data):
     question = data['question']
     mode = data.get('mode', 'normal')
-    selected_model = data.get('selected_model', None)
     enabled_tools = data.get('tools', {'document_reading': False, 'calculator': False})
     uploaded_file = data.get('uploaded_file', None)
+    # A new question replaces the session's earlier ones unless the client opts out
+    cancel_previous = data.get('cancel_previous', True)
     
     if uploaded_file and enabled_tools.get('document_reading'):
         question = f'Read and analyze the file "{uploaded_file}". {question}'
     
-    def message_callback(message):
-        socketio.emit('council_message', message)
+    # Conversation ids are issued here; an id this server never issued starts a new conversation
+    conversation_id = data.get('conversation_id')
+    if data.get('new_conversation') or (conversation_id and not conversations.exists(conversation_id)):
+        conversation_id = conversations.create()
+        emit('conversation_started', {'conversation_id': conversation_id})
+    
+    job = {
+        'question': question,
+        'mode': mode,
+        'selected_model': data.get('selected_model', None),
+        'enabled_tools': enabled_tools,
+        'stream': data.get('stream', False),
+        'deliberation': data.get('deliberation', 'chain'),
+        'use_cache': data.get('use_cache', False),
+        # Questions sharing a conversation id see a summary of the earlier turns
+        'conversation_id': conversation_id,
+        # Size the council to the question; mode='auto' lets the router pick the mode too
+        'route': data.get('route', COUNCIL_ROUTING)
+    }
+    
+    # Council events go only to the session that asked
+    sid = request.sid
+    session = session_council()
+    
+    if cancel_previous:
+        (jobs or scheduler).cancel_user(sid, 'Replaced by a new question')
     
-    def run_council():
-        socketio.emit('council_started', {'question': question, 'mode': mode})
+    if jobs:
+        # Workers rebuild the session's council from its host and advisors
+        job.update(sid=sid, ollama_host=session.ollama_host, advisors=session.advisors)
         try:
-            responses = council.convene_council(
-                question=question,
-                callback=message_callback,
-                mode=mode,
-                selected_model=selected_model,
-                enabled_tools=enabled_tools
-            )
-            socketio.emit('council_complete', {'responses': responses})
-        except Exception as e:
-            socketio.emit('council_error', {'error': str(e)})
+            jobs.put(job, user=sid, mode=mode)
+        except ValueError as e:
+            emit('council_error', {'error': str(e)})
+            return
+        start_queue_watcher()
+        return
+    
+    cancel = CancelToken()
+    
+    def emit_event(event, message):
+        socketio.emit(event, message, to=sid)
+    
+    if COUNCIL_ENGINE == 'async':
+        # Started on the council loop by the scheduler; no thread waits on it
+        async def run_queued():
+            await run_council_job_async(session, job, emit_event, cancel)
+    else:
+        def run_queued():
+            run_council_job(session, job, emit_event, cancel)
+    
+    def queued(position, queue_length):
+        socketio.emit('council_queued', {'position': position, 'queue_length': queue_length}, to=sid)
+    
+    try:
+        scheduler.submit(run_queued, user=sid, mode=mode, on_position=queued, cancel=cancel)
+    except ValueError as e:
+        emit('council_error', {'error': str(e)})
+
+worker_pool = None
+
+def start_worker_pool():
+    """Start COUNCIL_WORKERS council worker processes for this web process (queue mode only)"""
+    global worker_pool
+    if jobs and worker_pool is None:
+        from worker import WorkerPool
+        worker_pool = WorkerPool(
+            jobs,
+            count=int(os.environ.get('COUNCIL_WORKERS', 2)),
+            threads=int(os.environ.get('COUNCIL_MAX_RUNNING', 2))
+        ).start()
+
+def production_app():
+    """WSGI entry point for production, with the council workers started alongside.
+    
+        gunicorn --worker-class gthread --workers 1 --threads 100 --bind 0.0.0.0:6969 'app:production_app()'
     
-    thread = threading.Thread(target=run_council)
-    thread.daemon = True
-    thread.start()
+    One gunicorn worker serves every socket (Socket.IO sessions live in its
+    memory); with COUNCIL_QUEUE set the councils themselves run in the
+    COUNCIL_WORKERS processes, so PDF extraction and prompt assembly never
+    hold up event delivery.
+    """
+    start_worker_pool()
+    return app
 
 if __name__ == '__main__':
-    socketio.run(app, host='0.0.0.0', port=6969, debug=True)
+    # Werkzeug's development server; serve production_app() with gunicorn instead
+    start_worker_pool()
+    # The reloader would start a second set of workers from its watcher process
+    socketio.run(app, host='0.0.0.0', port=6969, debug=True, use_reloader=not jobs)
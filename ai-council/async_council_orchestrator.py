@@ -0,0 +1,223 @@
+from ollama import AsyncClient
+from council_orchestrator import AICouncil
+from cancellation import CouncilCancelled
+import asyncio
+import inspect
+import time
+
+class AsyncAICouncil(AICouncil):
+    """Asyncio-native council engine.
+    
+    Uses the same advisors, prompts and callback events as AICouncil, but every
+    model call goes through ollama.AsyncClient so many councils can share a
+    single event loop instead of one OS thread each. Callbacks may be plain
+    functions or coroutines.
+    
+    The modes and deliberations are AICouncil's own flows; this class only
+    swaps how their steps are carried out (see AICouncil._drive), so
+    web_search_mode, deep_research_mode and the rest return awaitables here.
+    """
+    
+    def __init__(self, ollama_host='http://localhost:11434', **kwargs):
+        super().__init__(ollama_host, **kwargs)
+        self.async_client = self._make_async_client()
+    
+    def set_ollama_host(self, host):
+        """Update Ollama host endpoint"""
+        super().set_ollama_host(host)
+        self.async_client = self._make_async_client()
+    
+    def _make_async_client(self):
+        """Async counterpart of self.client: the host pool's async view or a single AsyncClient"""
+        resources = self._host_resources(self.ollama_host)
+        with self._hosts_lock:
+            if 'async_client' not in resources:
+                if self.client is self.host_pool:
+                    resources['async_client'] = self.host_pool.async_client()
+                else:
+                    resources['async_client'] = AsyncClient(host=self.ollama_host)
+            return resources['async_client']
+    
+    async def _emit(self, callback, message):
+        """Deliver a callback event, awaiting it if the callback is async"""
+        if callback:
+            result = callback(message)
+            if inspect.isawaitable(result):
+                await result
+    
+    async def _chat(self, advisor, messages, options, callback=None, run=None):
+        """Run one advisor's chat call, forwarding chunks as 'delta' events when streaming"""
+        run = run or {}
+        self._check_cancelled(run)
+        cache_key = self._response_cache_key(advisor, messages, options, run)
+        if cache_key:
+            content = self.response_cache.get(cache_key)
+            if content is not None:
+                self._record_chat(advisor, run, outcome='cached')
+                return {'content': content, 'cached': True, 'stats': {}}
+        
+        started = time.time()
+        try:
+            content, stats = await self._chat_call(advisor, messages, options, callback, run, started)
+        except (CouncilCancelled, asyncio.CancelledError):
+            self._record_chat(advisor, run, outcome='cancelled')
+            raise
+        except Exception:
+            self._record_chat(advisor, run, outcome='error')
+            raise
+        
+        self._record_chat(advisor, run, stats)
+        if cache_key and content.strip():
+            self.response_cache.set(cache_key, content)
+        return {'content': content, 'cached': False, 'stats': stats}
+    
+    async def _chat_call(self, advisor, messages, options, callback, run, started):
+        """The Ollama call behind _chat; returns (content, stats)"""
+        first_token = None
+        cancel = run.get('cancel')
+        if not run.get('stream') and cancel is None:
+            response = await self.async_client.chat(
+                model=advisor['model'],
+                messages=messages,
+                options=options,
+                keep_alive=self.residency.keep_alive_for(advisor['model'])
+            )
+            content = response['message']['content']
+        else:
+            # Cancellable calls stream even when the client doesn't, so they can be dropped mid-generation
+            parts = []
+            response = {}
+            chunks = await self.async_client.chat(model=advisor['model'], messages=messages, options=options, stream=True,
+                                                  keep_alive=self.residency.keep_alive_for(advisor['model']))
+            try:
+                async for chunk in chunks:
+                    if cancel is not None and cancel.cancelled:
+                        break
+                    delta = chunk['message']['content']
+                    if chunk.get('done'):
+                        response = chunk
+                    if not delta:
+                        continue
+                    if first_token is None:
+                        first_token = time.time() - started
+                    parts.append(delta)
+                    if run.get('stream'):
+                        await self._emit(callback, {
+                            'name': advisor['name'],
+                            'role': advisor['role'],
+                            'content': delta,
+                            'status': 'delta'
+                        })
+            finally:
+                await chunks.aclose()
+            self._check_cancelled(run)
+            content = ''.join(parts)
+        
+        return content, self._response_stats(response, started, first_token)
+    
+    async def _drive(self, steps, callback=None, run=None):
+        """Carry out a council flow (see AICouncil._drive) on the event loop"""
+        result, error = None, None
+        while True:
+            try:
+                step = steps.throw(error) if error is not None else steps.send(result)
+            except StopIteration as done:
+                return done.value
+            result, error = None, None
+            try:
+                result = await self._run_step(step, callback, run)
+            except Exception as e:
+                error = e
+    
+    async def _run_step(self, step, callback, run):
+        """Carry out one step of a council flow; blocking calls run in a worker thread"""
+        kind, *args = step
+        if kind == 'emit':
+            await self._emit(callback, args[0])
+        elif kind == 'call':
+            function, *call_args = args
+            return await asyncio.to_thread(function, *call_args)
+        elif kind == 'chat':
+            advisor, messages, options = args
+            return await self._chat(advisor, messages, options, callback=callback, run=run)
+        elif kind == 'parallel':
+            advisors, steps_for, timeout_prefix = args
+            return await self._run_parallel(
+                advisors,
+                lambda advisor, advisor_callback: self._drive(steps_for(advisor), advisor_callback, run),
+                callback,
+                timeout_prefix=timeout_prefix,
+                run=run
+            )
+        else:
+            raise ValueError(f'Unknown council step: {kind}')
+    
+    async def _run_parallel(self, advisors, task, callback, timeout_prefix='Unable to respond', run=None):
+        """Run the coroutine task(advisor, callback) for every advisor, at most
+        max_parallel_advisors at a time, and return the non-empty results in advisor order"""
+        semaphore = asyncio.Semaphore(max(1, self.max_parallel_advisors))
+        
+        async def run_one(advisor):
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(task(advisor, callback), timeout=self.advisor_timeout)
+                except asyncio.TimeoutError:
+                    await self._emit(callback, {
+                        'name': advisor['name'],
+                        'role': advisor['role'],
+                        'content': f"{timeout_prefix}: timed out after {self.advisor_timeout}s",
+                        'status': 'error'
+                    })
+                    return None
+        
+        # Start advisors sharing a model back to back to avoid model swaps
+        order = await asyncio.to_thread(self.residency.schedule, advisors)
+        tasks = {idx: asyncio.ensure_future(run_one(advisors[idx])) for idx in order}
+        await asyncio.gather(*tasks.values())
+        
+        results = [tasks[idx].result() for idx in range(len(advisors))]
+        return [result for result in results if result]
+    
+    async def convene_council(self, question, callback=None, mode='normal', selected_model=None, enabled_tools=None, stream=False, deliberation='chain', use_cache=False, stats=None, cancel=None, history=None):
+        """Main method to run council in different modes.
+        
+        Cancelling the CancelToken passed as cancel also cancels the task running
+        the council, so in-flight requests are dropped at once; the coroutine
+        then raises CouncilCancelled.
+        """
+        started = time.time()
+        unsubscribe = None
+        if cancel is not None:
+            loop = asyncio.get_running_loop()
+            task = asyncio.current_task()
+            unsubscribe = cancel.on_cancel(lambda: loop.call_soon_threadsafe(task.cancel))
+        
+        try:
+            return await self._convene(question, callback, mode, selected_model, enabled_tools, stream, deliberation, use_cache, stats, cancel, history)
+        except asyncio.CancelledError:
+            if cancel is not None and cancel.cancelled:
+                raise CouncilCancelled(cancel.reason) from None
+            raise
+        finally:
+            if unsubscribe:
+                unsubscribe()
+            self.metrics.observe('council_run_seconds', time.time() - started, mode=mode)
+    
+    async def _normal_mode(self, question, callback, enabled_tools, run=None, deliberation='chain'):
+        """Original council mode with optional tools"""
+        # Tools are blocking (file parsing, math); keep them off the event loop.
+        # Their events are handed back to the loop as they happen, so progress shows live.
+        loop = asyncio.get_running_loop()
+        
+        def forward(event):
+            asyncio.run_coroutine_threadsafe(self._emit(callback, event), loop)
+        
+        tool_results = await asyncio.to_thread(
+            self._gather_tool_results, question, enabled_tools, forward if callback else None, run
+        )
+        
+        # Ranking file chunks against the question (BM25) is CPU work too
+        enhanced_question = await asyncio.to_thread(self._enhance_question, question, tool_results)
+        enhanced_question = self._with_history(enhanced_question, run)
+        self._check_cancelled(run)
+        return await self._drive(self._deliberation_steps(enhanced_question, deliberation, run), callback, run)
@@ -0,0 +1,364 @@
+"""Headless batch runs of the council.
+
+Reads questions from JSONL, one request per line:
+
+  {"id": "q1", "question": "Should we ...?", "mode": "normal", "deliberation": "chain"}
+
+Besides question, every field is optional: id (defaults to the line number),
+mode, deliberation, tools, selected_model and use_cache, as for
+convene_council. Results are written as JSONL as each question finishes:
+
+  {"id": "q1", "question": "...", "mode": "normal", "responses": [...], "stats": [...]}
+
+Progress is checkpointed in sqlite, so running the same command again after an
+interruption picks up where the batch stopped:
+
+  python ai-council/batch.py questions.jsonl -o results.jsonl --host http://localhost:11434
+"""
+from council_orchestrator import AICouncil
+from cancellation import CouncilCancelled
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+MODES = ('normal', 'web_search', 'deep_research')
+
+# Step index of a question that runs as one convene_council call
+WHOLE_RUN = -1
+
+
+def read_requests(lines):
+    """Batch requests from JSONL lines; each gets an id (its own, or its line number)"""
+    requests = []
+    seen = set()
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f'Line {number}: {e}')
+        if isinstance(request, str):
+            request = {'question': request}
+        if not isinstance(request, dict) or not request.get('question'):
+            raise ValueError(f'Line {number}: expected an object with a question')
+        
+        request.setdefault('id', number)
+        if str(request['id']) in seen:
+            raise ValueError(f"Line {number}: duplicate id {request['id']}")
+        seen.add(str(request['id']))
+        requests.append(request)
+    return requests
+
+
+class BatchCheckpoint:
+    """Finished results and per-question progress of a batch, kept in sqlite"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            'CREATE TABLE IF NOT EXISTS results (id TEXT PRIMARY KEY, finished_at REAL NOT NULL, result TEXT NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS progress (id TEXT PRIMARY KEY, state TEXT NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);'
+        )
+        self._db.commit()
+    
+    def load(self, advisors):
+        """(finished results in finishing order, {id: progress state}).
+        
+        Progress made with a different set of advisors is discarded; finished
+        results are kept.
+        """
+        signature = json.dumps([[advisor['name'], advisor['model']] for advisor in advisors])
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'advisors'").fetchone()
+            if row is None or row[0] != signature:
+                self._db.execute('DELETE FROM progress')
+                self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('advisors', ?)", (signature,))
+                self._db.commit()
+            
+            finished = [json.loads(result) for result, in self._db.execute('SELECT result FROM results ORDER BY finished_at')]
+            progress = {job_id: json.loads(state) for job_id, state in self._db.execute('SELECT id, state FROM progress')}
+        return finished, progress
+    
+    def save_progress(self, job_id, state):
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO progress (id, state) VALUES (?, ?)', (str(job_id), json.dumps(state)))
+            self._db.commit()
+    
+    def finish(self, job_id, result):
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO results (id, finished_at, result) VALUES (?, ?, ?)',
+                (str(job_id), time.time(), json.dumps(result))
+            )
+            self._db.execute('DELETE FROM progress WHERE id = ?', (str(job_id),))
+            self._db.commit()
+
+
+class BatchJob:
+    """One question's progress through a batch"""
+    
+    def __init__(self, request, state=None):
+        state = state or {}
+        self.request = request
+        self.id = request['id']
+        self.question = request['question']
+        self.mode = request.get('mode', 'normal')
+        self.deliberation = request.get('deliberation', 'chain')
+        self.enhanced_question = state.get('enhanced_question')
+        # Advisor index -> result (None when the advisor failed)
+        self.results = {int(idx): result for idx, result in state.get('results', {}).items()}
+        self.skipped = set(state.get('skipped', []))
+        self.stats = state.get('stats', [])
+        self.error = None if self.mode in MODES else f'Unknown mode: {self.mode}'
+        self.run = {
+            'stream': False, 'use_cache': request.get('use_cache', False), 'mode': self.mode,
+            'stats': self.stats, 'cancel': None, 'history': None
+        }
+    
+    def state(self):
+        return {
+            'enhanced_question': self.enhanced_question,
+            'results': self.results,
+            'skipped': sorted(self.skipped),
+            'stats': self.stats
+        }
+    
+    def opinions(self, before):
+        """(name, opinion) pairs of the advisors ahead of index before, as the chain passes them on"""
+        return [
+            (self.results[idx]['advisor'], self.results[idx]['response'])
+            for idx in sorted(self.results) if idx < before and self.results[idx]
+        ]
+
+
+class BatchRunner:
+    """Runs many council questions, grouping model calls by model.
+    
+    Each question is split into its model calls: one per advisor in the
+    chain (in order) or in deep research (in any order), a single call in
+    web search mode. Calls that are ready for the same model across all
+    questions run back to back (max_parallel at a time). The runner stays on
+    the last model while it has work, then moves to the model with the most
+    ready calls, so a batch loads each model a few times instead of once per
+    question. Pipelined deliberation can't be split this way; those
+    questions run whole once nothing else is ready. With a checkpoint, every
+    finished call and result is saved, and a rerun skips finished work.
+    
+    With a scheduler, every call waits for a council slot as a low priority
+    'batch' job of user, so a batch shares the server with interactive runs.
+    """
+    
+    def __init__(self, council, checkpoint=None, max_parallel=1, scheduler=None, user='batch'):
+        self.council = council
+        self.checkpoint = checkpoint
+        self.max_parallel = max(1, max_parallel)
+        self.scheduler = scheduler
+        self.user = user
+        self.model_switches = 0
+        self._lock = threading.Lock()
+    
+    def run(self, requests):
+        """Yield a result for every request as it finishes, starting with ones finished before"""
+        advisors = list(self.council.advisors)
+        finished, progress = self.checkpoint.load(advisors) if self.checkpoint else ([], {})
+        wanted = {str(request['id']) for request in requests}
+        done = set()
+        for result in finished:
+            if str(result['id']) in wanted:
+                done.add(str(result['id']))
+                yield result
+        
+        jobs = [BatchJob(request, progress.get(str(request['id']))) for request in requests if str(request['id']) not in done]
+        current_model = None
+        
+        with ThreadPoolExecutor(max_workers=self.max_parallel, thread_name_prefix='council-batch') as executor:
+            while jobs:
+                ready = {}
+                for job in jobs:
+                    for idx in self._ready_steps(job, advisors):
+                        ready.setdefault(self._step_model(job, idx, advisors), []).append((job, idx))
+                
+                if ready:
+                    # Whole runs load several models, so they wait until no single-model group is left
+                    models = [model for model in ready if model is not None] or [None]
+                    model = current_model if current_model in models else max(models, key=lambda m: len(ready[m]))
+                    if model != current_model:
+                        self.model_switches += 1
+                        current_model = model
+                    list(executor.map(lambda step: self._queued_step(step[0], step[1], advisors), ready[model]))
+                
+                remaining = []
+                for job in jobs:
+                    if job.error is not None or self._is_done(job, advisors):
+                        result = self._result(job, advisors)
+                        if self.checkpoint:
+                            self.checkpoint.finish(job.id, result)
+                        yield result
+                    else:
+                        remaining.append(job)
+                jobs = remaining
+    
+    def _ready_steps(self, job, advisors):
+        """Advisor indexes of the job's calls that can run now"""
+        if job.error is not None:
+            return []
+        if job.mode == 'web_search':
+            return [] if 0 in job.results else [0]
+        if job.mode == 'deep_research':
+            return [idx for idx in range(len(advisors)) if idx not in job.results]
+        if job.deliberation == 'pipelined':
+            return [] if WHOLE_RUN in job.results else [WHOLE_RUN]
+        
+        for idx in range(len(advisors)):
+            if idx not in job.results and idx not in job.skipped:
+                return [idx]
+        return []
+    
+    def _step_model(self, job, idx, advisors):
+        if idx == WHOLE_RUN:
+            return None
+        if job.mode == 'web_search':
+            return self.council._web_search_advisor(job.request.get('selected_model'))['model']
+        return advisors[idx]['model']
+    
+    def _is_done(self, job, advisors):
+        if job.mode == 'web_search':
+            return 0 in job.results
+        if job.mode == 'normal' and job.deliberation == 'pipelined':
+            return WHOLE_RUN in job.results
+        return all(idx in job.results or idx in job.skipped for idx in range(len(advisors)))
+    
+    def _queued_step(self, job, idx, advisors):
+        """Run a step, through the scheduler if there is one"""
+        if self.scheduler is None:
+            return self._run_step(job, idx, advisors)
+        try:
+            self.scheduler.call(lambda: self._run_step(job, idx, advisors), self.user, mode='batch')
+        except CouncilCancelled as e:
+            job.error = str(e)
+    
+    def _run_step(self, job, idx, advisors):
+        council = self.council
+        try:
+            if idx == WHOLE_RUN:
+                result = council.convene_council(
+                    job.question, mode='normal', deliberation=job.deliberation,
+                    enabled_tools=job.request.get('tools'), use_cache=job.run['use_cache'], stats=job.stats
+                )
+            elif job.mode == 'web_search':
+                result = council.web_search_mode(
+                    job.question, job.request.get('selected_model'), use_cache=job.run['use_cache'], stats=job.stats
+                )
+            elif job.mode == 'deep_research':
+                result = council._research_advisor(advisors[idx], job.question, None, job.run)
+            else:
+                result = self._chain_step(job, idx, advisors)
+        except Exception as e:
+            job.error = str(e)
+            return
+        
+        # Deep research runs several steps of one job at once
+        with self._lock:
+            job.results[idx] = result
+            if job.mode == 'normal' and idx != WHOLE_RUN:
+                self._check_consensus(job, idx, advisors)
+            if self.checkpoint:
+                self.checkpoint.save_progress(job.id, job.state())
+    
+    def _chain_step(self, job, idx, advisors):
+        """One advisor of a normal mode chain, after the job's tools have run"""
+        council = self.council
+        if job.enhanced_question is None:
+            tool_results = council._gather_tool_results(job.question, job.request.get('tools') or {}, None, job.run)
+            job.enhanced_question = council._enhance_question(job.question, tool_results)
+        
+        advisor = advisors[idx]
+        messages = council._chain_messages(advisor, job.enhanced_question, job.opinions(idx))
+        return council._round_result(advisor, council._consult(advisor, messages, None, job.run))
+    
+    def _check_consensus(self, job, idx, advisors):
+        """With adaptive deliberation, skip the remaining ministers once the ones so far agree"""
+        ministers = len(advisors) - 1
+        if job.deliberation != 'adaptive' or len(advisors) <= 2 or idx >= ministers - 1:
+            return
+        remaining = advisors[idx + 1:ministers]
+        if self.council._consensus_skips(job.enhanced_question, job.opinions(ministers), remaining, job.run):
+            job.skipped.update(range(idx + 1, ministers))
+    
+    def _result(self, job, advisors):
+        result = {'id': job.id, 'question': job.question, 'mode': job.mode}
+        if job.error is not None:
+            result['error'] = job.error
+        elif job.mode == 'web_search':
+            result['responses'] = job.results[0]
+        elif WHOLE_RUN in job.results:
+            result['responses'] = job.results[WHOLE_RUN]
+        else:
+            result['responses'] = [job.results[idx] for idx in sorted(job.results) if job.results[idx]]
+        result['stats'] = job.stats
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a JSONL file of council questions')
+    parser.add_argument('input', help="JSONL file of requests ('-' for stdin)")
+    parser.add_argument('-o', '--output', help="JSONL results file (default: INPUT.results.jsonl, '-' for stdout)")
+    parser.add_argument('--checkpoint', help='sqlite checkpoint for resuming (default: OUTPUT.checkpoint)')
+    parser.add_argument('--host', default=os.environ.get('OLLAMA_HOST', 'http://localhost:11434'))
+    parser.add_argument('--advisors', help='JSON file with a list of advisors (name, role, model, personality)')
+    parser.add_argument('--parallel', type=int, default=1, help='Concurrent calls to the same model')
+    parser.add_argument('--fresh', action='store_true', help='Ignore the checkpoint and start over')
+    args = parser.parse_args()
+    
+    if args.input == '-':
+        requests = read_requests(sys.stdin)
+        output = args.output or '-'
+    else:
+        with open(args.input, encoding='utf-8') as f:
+            requests = read_requests(f)
+        output = args.output or os.path.splitext(args.input)[0] + '.results.jsonl'
+    
+    checkpoint_path = args.checkpoint or (output + '.checkpoint' if output != '-' else None)
+    if checkpoint_path and args.fresh and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    
+    council = AICouncil(ollama_host=args.host)
+    if args.advisors:
+        with open(args.advisors, encoding='utf-8') as f:
+            council.update_advisors(json.load(f))
+    else:
+        council.get_available_models(wait=30)
+    if not council.advisors:
+        sys.exit(f'No advisors: no models found on {args.host}')
+    
+    runner = BatchRunner(council, BatchCheckpoint(checkpoint_path) if checkpoint_path else None, max_parallel=args.parallel)
+    out = sys.stdout if output == '-' else open(output, 'w', encoding='utf-8')
+    started = time.time()
+    errors = 0
+    try:
+        for count, result in enumerate(runner.run(requests), 1):
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+            errors += 'error' in result
+            print(f"[{count}/{len(requests)}] {result['id']} {'failed: ' + result['error'] if 'error' in result else 'done'}",
+                  file=sys.stderr, flush=True)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    
+    print(f'Finished {len(requests)} questions ({errors} failed) in {time.time() - started:.1f}s '
+          f'with {runner.model_switches} model switches', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
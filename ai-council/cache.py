@@ -0,0 +1,125 @@
+from collections import OrderedDict
+import json
+import sqlite3
+import threading
+import time
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry.
+    
+    Entries live in memory, bounded to max_entries (least recently used are
+    evicted first). When db_path is given, entries are also written to a
+    sqlite table so they survive restarts; values must then be
+    JSON-serializable.
+    """
+    
+    def __init__(self, max_entries=256, ttl=900, db_path=None, table='cache', max_disk_entries=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self.table = table
+        self.max_disk_entries = max_disk_entries or max_entries * 10
+        
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+        
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                f'CREATE TABLE IF NOT EXISTS {table} '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            self._db.commit()
+    
+    def get(self, key):
+        """Return the cached value, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            
+            value = self._load(key, now)
+            if value is None:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            return value
+    
+    def set(self, key, value, ttl=None):
+        """Store a value, evicting the least recently used entries if full"""
+        expires_at = time.time() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._db is not None:
+                self._store(key, value, expires_at)
+    
+    def clear(self):
+        """Drop every entry, in memory and on disk"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute(f'DELETE FROM {self.table}')
+                self._db.commit()
+    
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+    
+    def _remember(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _load(self, key, now):
+        """Promote a disk entry into memory (caller holds the lock)"""
+        if self._db is None:
+            return None
+        
+        row = self._db.execute(
+            f'SELECT value, expires_at FROM {self.table} WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        
+        raw, expires_at = row
+        if expires_at <= now:
+            self._db.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+            self._db.commit()
+            return None
+        
+        value = json.loads(raw)
+        self._db.execute(f'UPDATE {self.table} SET accessed_at = ? WHERE key = ?', (now, key))
+        self._db.commit()
+        self._remember(key, value, expires_at)
+        return value
+    
+    def _store(self, key, value, expires_at):
+        """Write an entry to disk and prune expired / excess rows (caller holds the lock)"""
+        now = time.time()
+        self._db.execute(
+            f'INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)',
+            (key, json.dumps(value), expires_at, now)
+        )
+        self._db.execute(f'DELETE FROM {self.table} WHERE expires_at <= ?', (now,))
+        self._db.execute(
+            f'DELETE FROM {self.table} WHERE key NOT IN '
+            f'(SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT ?)',
+            (self.max_disk_entries,)
+        )
+        self._db.commit()
@@ -0,0 +1,61 @@
+import threading
+
+
+class CouncilCancelled(BaseException):
+    """Raised inside a council run once its cancel token is cancelled.
+    
+    Like asyncio.CancelledError it is not an Exception, so the per-advisor
+    error handlers that turn failures into "Unable to respond" let it through
+    and the whole run stops.
+    """
+
+
+class CancelToken:
+    """Cancellation flag shared between a council run and whoever may stop it"""
+    
+    def __init__(self):
+        self.reason = None
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+    
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+    
+    def cancel(self, reason='Cancelled'):
+        """Cancel the run; returns False if it was already cancelled"""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            callbacks = list(self._callbacks)
+        
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in cancel callback: {e}")
+        return True
+    
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise CouncilCancelled(self.reason)
+    
+    def on_cancel(self, callback):
+        """Call callback() when the token is cancelled (right away if it already is).
+        
+        Returns a function that unregisters the callback.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+    
+    def _remove(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
@@ -0,0 +1,74 @@
+from collections import Counter
+from retrieval import STOPWORDS
+import itertools
+import math
+import re
+
+# Words that carry no position; unlike retrieval's STOPWORDS, negations stay in
+FILLER_WORDS = STOPWORDS | {'i', 'we', 'would', 'should', 'could', 'our', 'their', 'they', 'them', 'it', 'be', 'but',
+                            'so', 'than', 'more', 'some', 'now', 'd', 's', 'll', 've'}
+
+SUFFIXES = ('ations', 'ation', 'ments', 'ment', 'ingly', 'ing', 'edly', 'ed', 'ies', 'es', 'ers', 'er', 'ly', 's')
+
+JUDGE_PROMPT = (
+    "Several advisors answered the question below. Do they all recommend the same course of action? "
+    "Ignore differences in wording, detail and emphasis; a recommendation phrased with a negation "
+    "(\"don't wait, do it\") still counts as what it recommends.\n\n"
+    "Question: {question}\n\n{opinions}\n\n"
+    "Answer with one word: AGREE or DISAGREE.\n\nAnswer:"
+)
+
+
+def stem(word):
+    """Crude suffix stripping, so 'cycling' and 'cyclists' or 'separated' and 'separation' meet"""
+    for suffix in SUFFIXES:
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def words(text):
+    """Lowercased words with "n't" spelled out as 'not'"""
+    return re.findall(r"\w+", text.lower().replace("n't", " not"))
+
+
+def term_vector(text):
+    """Sublinear weights of a text's stemmed content words"""
+    counts = Counter(stem(word) for word in words(text) if word not in FILLER_WORDS)
+    return {term: 1 + math.log(count) for term, count in counts.items()}
+
+
+def similarity(first, second):
+    """Cosine similarity of two term vectors (0 = nothing in common, 1 = same words)"""
+    if not first or not second:
+        return 0.0
+    dot = sum(weight * second.get(term, 0) for term, weight in first.items())
+    norm = math.sqrt(sum(w * w for w in first.values())) * math.sqrt(sum(w * w for w in second.values()))
+    return dot / norm if norm else 0.0
+
+
+def overlap(opinions):
+    """Word overlap of the least similar pair of opinions, from 0 to 1.
+
+    Only near-identical answers score high. Overlap says nothing about what
+    an answer recommends ("Don't wait: migrate" and "Don't migrate" share most
+    of their words), so it is a fallback for when no judge model answers.
+    """
+    vectors = [term_vector(opinion) for opinion in opinions]
+    scores = [similarity(first, second) for first, second in itertools.combinations(vectors, 2)]
+    return min(scores) if scores else 0.0
+
+
+def judge_prompt(question, opinions, opinion_tokens=200):
+    """Prompt asking a model whether (name, opinion) pairs recommend the same thing"""
+    max_chars = opinion_tokens * 4
+    listed = "\n\n".join(f"{name}: {' '.join(opinion.split())[:max_chars].rstrip()}" for name, opinion in opinions)
+    return JUDGE_PROMPT.format(question=' '.join(question.split())[:1000], opinions=listed)
+
+
+def read_judgement(answer):
+    """True for AGREE, False for DISAGREE, None if the judge said neither"""
+    found = re.findall(r'[a-z]+', answer.lower())
+    if found and found[0] in ('agree', 'disagree'):
+        return found[0] == 'agree'
+    return None
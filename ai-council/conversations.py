@@ -0,0 +1,158 @@
+from retrieval import estimate_tokens
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+
+class ConversationStore:
+    """Multi-turn council sessions kept in sqlite.
+    
+    Every turn is appended to the session's transcript and never rewritten.
+    Each session also keeps a rolling summary, one short line per earlier
+    exchange, plus the latest question and answer. When a turn is added the
+    previous latest exchange is folded into the summary (the oldest lines are
+    dropped once it exceeds summary_tokens), so updates never re-read the
+    transcript. context() returns the summary and the latest answer, so a
+    follow-up carries at most about summary_tokens + answer_tokens of history
+    however long the conversation gets.
+    
+    Session ids are issued by create() and are random, so knowing one is what
+    gives access to a conversation; ids the store didn't issue don't exist.
+    """
+    
+    def __init__(self, db_path=None, summary_tokens=400, answer_tokens=400, line_tokens=60):
+        self.db_path = db_path or os.path.join(tempfile.gettempdir(), 'council-conversations.db')
+        self.summary_tokens = summary_tokens
+        self.answer_tokens = answer_tokens
+        self.line_tokens = line_tokens
+        self._lock = threading.Lock()
+        
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.executescript(
+            'CREATE TABLE IF NOT EXISTS turns '
+            '(session_id TEXT NOT NULL, turn INTEGER NOT NULL, mode TEXT NOT NULL, question TEXT NOT NULL, '
+            'responses TEXT NOT NULL, created_at REAL NOT NULL, PRIMARY KEY (session_id, turn));'
+            'CREATE TABLE IF NOT EXISTS sessions '
+            '(session_id TEXT PRIMARY KEY, turns INTEGER NOT NULL, summary TEXT NOT NULL, omitted INTEGER NOT NULL, '
+            'last_question TEXT NOT NULL, last_answer TEXT NOT NULL, updated_at REAL NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS issued (session_id TEXT PRIMARY KEY, created_at REAL NOT NULL);'
+        )
+        self._db.commit()
+    
+    def create(self):
+        """Start a conversation; returns its new, unguessable session id"""
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute('INSERT INTO issued (session_id, created_at) VALUES (?, ?)', (session_id, time.time()))
+            self._db.commit()
+        return session_id
+    
+    def exists(self, session_id):
+        """Whether create() issued this session id"""
+        with self._lock:
+            row = self._db.execute('SELECT 1 FROM issued WHERE session_id = ?', (session_id,)).fetchone()
+        return row is not None
+    
+    def append(self, session_id, question, responses, mode='normal'):
+        """Record a finished turn and update the session's summary; returns the turn number"""
+        answer = self._answer(responses, mode)
+        now = time.time()
+        
+        with self._lock:
+            row = self._db.execute(
+                'SELECT turns, summary, omitted, last_question, last_answer FROM sessions WHERE session_id = ?',
+                (session_id,)
+            ).fetchone()
+            turns, summary, omitted, last_question, last_answer = row or (0, '', 0, '', '')
+            
+            if turns:
+                summary, omitted = self._fold(summary, omitted, self._line(last_question, last_answer))
+            
+            turn = turns + 1
+            self._db.execute(
+                'INSERT INTO turns (session_id, turn, mode, question, responses, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (session_id, turn, mode, question, json.dumps(responses), now)
+            )
+            self._db.execute(
+                'INSERT OR REPLACE INTO sessions '
+                '(session_id, turns, summary, omitted, last_question, last_answer, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (session_id, turn, summary, omitted, question, answer, now)
+            )
+            self._db.commit()
+        return turn
+    
+    def context(self, session_id):
+        """The conversation so far, bounded in size, or '' for a new session"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT summary, omitted, last_question, last_answer FROM sessions WHERE session_id = ?',
+                (session_id,)
+            ).fetchone()
+        if row is None:
+            return ''
+        
+        summary, omitted, last_question, last_answer = row
+        parts = ["**Conversation so far:**"]
+        if omitted:
+            parts.append(f"({omitted} earlier exchanges omitted)")
+        if summary:
+            parts.append(summary)
+        parts.append(f"Previous question: {self._clip(last_question, self.line_tokens)}")
+        parts.append(f"Council's answer: {self._clip(last_answer, self.answer_tokens)}")
+        return "\n".join(parts)
+    
+    def turns(self, session_id):
+        """Number of turns recorded for a session"""
+        with self._lock:
+            row = self._db.execute('SELECT turns FROM sessions WHERE session_id = ?', (session_id,)).fetchone()
+        return row[0] if row else 0
+    
+    def transcript(self, session_id):
+        """Every turn of a session, oldest first"""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT turn, mode, question, responses, created_at FROM turns WHERE session_id = ? ORDER BY turn',
+                (session_id,)
+            ).fetchall()
+        return [
+            {'turn': turn, 'mode': mode, 'question': question, 'responses': json.loads(responses), 'created_at': created_at}
+            for turn, mode, question, responses, created_at in rows
+        ]
+    
+    def _answer(self, responses, mode):
+        """The text a turn is remembered by: the final synthesis, or every finding in deep research"""
+        if not responses:
+            return ''
+        if mode == 'deep_research':
+            return "\n".join(f"{r['advisor']}: {self._first_sentence(r['response'])}" for r in responses)
+        return responses[-1]['response']
+    
+    def _line(self, question, answer):
+        """One summary line for an exchange"""
+        question = ' '.join(question.split())
+        line = f"- Q: {self._clip(question, self.line_tokens // 3)} A: {self._first_sentence(answer)}"
+        return self._clip(line, self.line_tokens)
+    
+    def _fold(self, summary, omitted, line):
+        """Add a line to the summary, dropping the oldest lines past summary_tokens"""
+        lines = summary.splitlines() + [line]
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_tokens:
+            lines.pop(0)
+            omitted += 1
+        return "\n".join(lines), omitted
+    
+    def _first_sentence(self, text):
+        text = ' '.join(text.split())
+        match = re.match(r'(.+?[.!?])\s', text)
+        return match.group(1) if match else text
+    
+    def _clip(self, text, tokens):
+        """Cut text to about tokens, marking the cut"""
+        text = text.strip()
+        max_chars = tokens * 4
+        return text if len(text) <= max_chars else text[:max_chars].rstrip() + " [...]"
@@ -1,14 +1,119 @@
 import ollama
 from ollama import Client
 from tools import CouncilTools
+from cancellation import CouncilCancelled
+from cache import TTLCache
+from model_residency import ModelResidencyManager
+from model_catalog import ModelCatalog
+from retrieval import DocumentRetriever
+from prompts import PromptBuilder
+from consensus import judge_prompt, overlap, read_judgement
+from router import QuestionRouter
+from metrics import metrics as default_metrics
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import OrderedDict
+from urllib.parse import urlparse
+import copy
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
 import re
+import weakref
+
+# Ways a question refers to a document, in order of precedence
+FILE_PATTERNS = [
+    r'["\']([^"\']+\.(?:pdf|docx|txt|doc))["\']',
+    r'(?:read|analyze|summarize)\s+([^\s]+\.(?:pdf|docx|txt))',
+    r'((?:\/|\.\/|~\/)[^\s]+\.(?:pdf|docx|txt))'
+]
+
+MATH_PATTERN = r'(\d+[\s\+\-\*/\^\(\)\.]+[\d\s\+\-\*/\^\(\)\.]+\d+)'
+
+ROUTER_PROMPT = (
+    "Classify how much expert deliberation this question needs. Answer with one word: "
+    "simple (a fact, definition or small talk), moderate, or complex (trade-offs, strategy, "
+    "multi-part analysis).\n\nQuestion: {question}\n\nAnswer:"
+)
+
+# Seconds before normal mode stops waiting for a tool
+TOOL_TIMEOUTS = {
+    'read_document': 120,
+    'calculate': 5,
+    'web_search': 30
+}
+
+def weak_listener(method):
+    """A callback that calls a bound method while its object lives, without keeping it alive"""
+    ref = weakref.WeakMethod(method)
+    
+    def listener(*args):
+        target = ref()
+        if target is not None:
+            target(*args)
+    return listener
 
 class AICouncil:
-    def __init__(self, ollama_host='http://localhost:11434'):
-        self.ollama_host = ollama_host
-        self.client = Client(host=ollama_host)
+    def __init__(self, ollama_host='http://localhost:11434', max_parallel_advisors=4, advisor_timeout=180, response_cache=None,
+                 keep_alive='30m', max_loaded_models=1, host_pool=None, model_refresh_interval=60,
+                 document_context_tokens=1500, prompt_budget_tokens=3072, metrics=None,
+                 consensus_threshold=0.8, consensus_min_opinions=2, consensus_model=None, tool_timeouts=None,
+                 router_model=None, router_small_models=False, max_hosts=8, allowed_hosts=None):
+        # A HostPool spreads calls over several Ollama servers and stands in for the client
+        self.host_pool = host_pool
         self.tools = CouncilTools()
         
+        # Long documents are cut down to the excerpts relevant to the question
+        self.retriever = DocumentRetriever(budget_tokens=document_context_tokens)
+        
+        # Normal mode prompts: shared-prefix layout within each model's token budget
+        self.prompts = PromptBuilder(budget_tokens=prompt_budget_tokens)
+        
+        # Latency and token counters, exported on /metrics
+        self.metrics = metrics if metrics is not None else default_metrics
+        
+        # Adaptive deliberation: once this many ministers agree, skip to the Prime Minister. consensus_model
+        # (default: router_model, else the Prime Minister's) judges agreement; if it gives no verdict, only
+        # answers whose word overlap reaches consensus_threshold count as agreeing
+        self.consensus_threshold = consensus_threshold
+        self.consensus_min_opinions = consensus_min_opinions
+        self.consensus_model = consensus_model
+        
+        # Sizes the council to the question; router_model (a small model) settles borderline cases.
+        # router_small_models also moves simple questions onto the smallest model, replacing the advisors' own
+        self.router_model = router_model
+        self.router = QuestionRouter(tiers={'simple': {'small_models': router_small_models}})
+        
+        # Normal mode tools run concurrently, each given up on after its timeout
+        self.tool_timeouts = dict(TOOL_TIMEOUTS, **(tool_timeouts or {}))
+        
+        # Concurrency settings for modes where advisors work independently
+        self.max_parallel_advisors = max_parallel_advisors
+        self.advisor_timeout = advisor_timeout
+        
+        # Memoized answers for identical (model, messages, options) calls; only
+        # consulted for deterministic calls or when a run opts in with use_cache
+        self.response_cache = response_cache if response_cache is not None else TTLCache(
+            max_entries=512, ttl=60 * 60, table='response_cache'
+        )
+        
+        # Model warm-up, keep_alive and swap-aware ordering
+        self.keep_alive = keep_alive
+        self.max_loaded_models = max_loaded_models
+        self.model_refresh_interval = model_refresh_interval
+        
+        # Client, residency manager and model catalog per Ollama host, shared with forked sessions.
+        # Sessions may pick their own host: allowed_hosts (URLs or host names) limits which, and only
+        # the max_hosts most recently picked keep their resources (the council's own host always does)
+        self.hosts = OrderedDict()
+        self._hosts_lock = threading.Lock()
+        self.max_hosts = max(1, max_hosts)
+        self.allowed_hosts = {host.rstrip('/') for host in allowed_hosts} if allowed_hosts else None
+        self._home_host = ollama_host
+        self._use_host(ollama_host)
+        
         # Ministry-themed role templates
         self.ministry_roles = [
             {
@@ -53,17 +158,18 @@ class AICouncil:
             }
         ]
         
-        # Auto-detect and assign models (will be populated on first load)
+        # Auto-detect and assign models (populated when the catalog first lists them)
         self.default_advisors = []
         self.advisors = []
         
-        # Try to auto-populate
-        self.auto_assign_models()
-
-    def auto_assign_models(self):
+        # Model list is refreshed in the background so startup never waits on Ollama
+        self.catalog.start()
+    
+    def auto_assign_models(self, available=None):
         """Auto-detect available models and assign them to ministries"""
         try:
-            available = self.get_available_models()
+            if available is None:
+                available = self.get_available_models()
             
             if not available or len(available) == 0:
                 print("No models detected. Using empty advisor list.")
@@ -72,7 +178,7 @@ class AICouncil:
                 return
             
             # Sort models by size (prefer larger models for better quality)
-            available.sort(key=lambda x: x.get('size', 0), reverse=True)
+            available = sorted(available, key=lambda x: x.get('size', 0), reverse=True)
             
             # Assign up to 5 models + 1 Prime Minister
             num_ministers = min(5, len(available))
@@ -102,58 +208,152 @@ class AICouncil:
             self.advisors = advisors.copy()
             
             print(f"✓ Auto-assigned {len(advisors)} advisors to available models")
-            
+        
         except Exception as e:
             print(f"Error auto-assigning models: {e}")
             # Fallback to empty list
             self.default_advisors = []
             self.advisors = []
-
+    
+    def _on_models_listed(self, models):
+        """Assign default advisors the first time the catalog finds models"""
+        if self.default_advisors:
+            return
+        
+        custom_advisors = self.advisors
+        self.auto_assign_models(models)
+        if custom_advisors:
+            self.advisors = custom_advisors
+    
     
     def set_ollama_host(self, host):
-        """Update Ollama host endpoint"""
+        """Update Ollama host endpoint (ValueError if it isn't an allowed http(s) URL)"""
+        self.check_host(host)
+        self._use_host(host)
+        self.catalog.start()
+    
+    def check_host(self, host):
+        """Raise ValueError unless host is an http(s) URL this council may connect to"""
+        url = urlparse(host if '://' in host else f'http://{host}')
+        if url.scheme not in ('http', 'https') or not url.hostname or url.username or url.password:
+            raise ValueError(f'Invalid Ollama host: {host}')
+        
+        allowed = self.allowed_hosts
+        if allowed is None or host == self._home_host or host.rstrip('/') in allowed or url.hostname in allowed:
+            return
+        if self.host_pool is not None and host in self.host_pool.urls():
+            return
+        raise ValueError(f'Ollama host not allowed: {host}')
+    
+    def fork(self):
+        """A council for one user session.
+        
+        The fork has its own advisors and Ollama host setting but shares this
+        council's clients, caches, residency managers and model catalogs.
+        """
+        session = copy.copy(self)
+        session.default_advisors = list(self.default_advisors)
+        session.advisors = list(self.advisors)
+        return session
+    
+    def _use_host(self, host):
+        """Point this council at a host, reusing that host's shared resources"""
+        resources = self._host_resources(host)
         self.ollama_host = host
-        self.client = Client(host=host)
+        self.client = resources['client']
+        self.residency = resources['residency']
+        self.catalog = resources['catalog']
+        
+        # A host that was already listed can assign default advisors right away
+        models = self.catalog.get()
+        if models:
+            self._on_models_listed(models)
+    
+    def _host_resources(self, host):
+        """Client, residency manager and model catalog for a host, created on first use"""
+        # Any member of the pool means "use the pool"
+        in_pool = self.host_pool is not None and host in self.host_pool.urls()
+        key = 'pool' if in_pool else host
+        
+        with self._hosts_lock:
+            resources = self.hosts.get(key)
+            if resources is None:
+                client = self.host_pool if in_pool else Client(host=host)
+                # Nothing here holds on to self: the fork that first used a host may be long gone
+                catalog = ModelCatalog(functools.partial(self._fetch_models, client), refresh_interval=self.model_refresh_interval)
+                catalog.subscribe(weak_listener(self._on_models_listed))
+                resources = self.hosts[key] = {
+                    'client': client,
+                    'residency': ModelResidencyManager(
+                        client, keep_alive=self.keep_alive, max_loaded_models=self.max_loaded_models
+                    ),
+                    'catalog': catalog
+                }
+                self._evict_hosts(key)
+            self.hosts.move_to_end(key)
+            return resources
+    
+    def _evict_hosts(self, keep):
+        """Forget the least recently picked hosts beyond max_hosts (caller holds the lock).
+        
+        Their catalogs stop refreshing. Sessions still on an evicted host keep
+        its client and last model list, and get fresh resources when they pick
+        a host again.
+        """
+        for key in list(self.hosts):
+            if len(self.hosts) <= self.max_hosts:
+                break
+            if key not in (keep, 'pool', self._home_host):
+                self.hosts.pop(key)['catalog'].stop()
     
     def update_advisors(self, custom_advisors):
         """Update advisors with custom configurations"""
         self.advisors = custom_advisors if custom_advisors else self.default_advisors.copy()
     
-    def get_available_models(self):
-        """Get list of all available Ollama models from the server"""
-        try:
-            models_response = self.client.list()
-            models = []
+    def get_available_models(self, force_refresh=False, wait=None):
+        """Get list of all available Ollama models from the catalog.
+        
+        force_refresh lists models from the server now; wait blocks up to that
+        many seconds for the catalog's first listing.
+        """
+        models = self.catalog.get(force_refresh=force_refresh, wait=wait)
+        if models is not None:
+            return models
+        
+        # Return default models as fallback
+        return [{'name': a['model'], 'size': 0, 'size_formatted': 'Unknown', 'modified': ''} 
+                for a in self.default_advisors]
+    
+    @staticmethod
+    def _fetch_models(client):
+        """List models on an Ollama server (used by the catalog's refresh)"""
+        models_response = client.list()
+        models = []
+        
+        for model in models_response.get('models', []):
+            name = model.get('name', model.get('model', 'unknown'))
+            size = model.get('size', 0)
+            modified = model.get('modified_at', '')
             
-            for model in models_response.get('models', []):
-                name = model.get('name', model.get('model', 'unknown'))
-                size = model.get('size', 0)
-                modified = model.get('modified_at', '')
-                
-                # Convert datetime to string if needed
-                if modified and hasattr(modified, 'isoformat'):
-                    modified = modified.isoformat()
-                elif modified:
-                    modified = str(modified)
-                
-                # Format size
-                size_gb = size / (1024**3) if size > 0 else 0
-                size_str = f"{size_gb:.1f} GB" if size_gb > 0 else "Unknown"
-                
-                models.append({
-                    'name': name,
-                    'size': size,
-                    'size_formatted': size_str,
-                    'modified': modified
-                })
+            # Convert datetime to string if needed
+            if modified and hasattr(modified, 'isoformat'):
+                modified = modified.isoformat()
+            elif modified:
+                modified = str(modified)
             
-            return models
-        except Exception as e:
-            print(f"Error fetching models: {e}")
-            # Return default models as fallback
-            return [{'name': a['model'], 'size': 0, 'size_formatted': 'Unknown', 'modified': ''} 
-                    for a in self.default_advisors]
-
+            # Format size
+            size_gb = size / (1024**3) if size > 0 else 0
+            size_str = f"{size_gb:.1f} GB" if size_gb > 0 else "Unknown"
+            
+            models.append({
+                'name': name,
+                'size': size,
+                'size_formatted': size_str,
+                'modified': modified
+            })
+        
+        return models
+    
     
     def test_connection(self):
         """Test if Ollama server is reachable"""
@@ -163,256 +363,854 @@ class AICouncil:
         except Exception as e:
             return False, str(e)
     
-    def web_search_mode(self, question, selected_model, callback=None):
+    def web_search_mode(self, question, selected_model, callback=None, stream=False, use_cache=False, stats=None, cancel=None, history=None):
         """Single model performs web search and answers"""
-        advisor = next((a for a in self.advisors if a['model'] == selected_model), self.advisors[0])
-        
-        if callback:
-            callback({
-                'name': 'System',
-                'role': 'Web Search',
-                'content': f'🔍 {advisor["name"]} is searching the web...',
-                'status': 'tool_info'
-            })
+        run = self._new_run('web_search', stream, use_cache, stats, cancel, history)
+        return self._drive(self._web_search_steps(question, selected_model, run), callback, run)
+    
+    def deep_research_mode(self, question, callback=None, parallel=True, stream=False, use_cache=False, stats=None, cancel=None, history=None):
+        """All models independently search and provide opinions"""
+        run = self._new_run('deep_research', stream, use_cache, stats, cancel, history)
+        return self._drive(self._deep_research_steps(question, parallel, run), callback, run)
+    
+    def _research_advisor(self, advisor, question, callback=None, run=None):
+        """Search and analysis pipeline for a single deep research advisor"""
+        return self._drive(self._research_steps(advisor, question, run), callback, run)
+    
+    def _consult(self, advisor, messages, callback=None, run=None, status_text='Thinking...'):
+        """Ask one normal mode advisor and report progress; returns None on failure"""
+        return self._drive(self._consult_steps(advisor, messages, run, status_text), callback, run)
+    
+    def _new_run(self, mode, stream=False, use_cache=False, stats=None, cancel=None, history=None):
+        """Per-run settings and state handed down to every call of a council run"""
+        return {'stream': stream, 'use_cache': use_cache, 'mode': mode, 'stats': stats, 'cancel': cancel, 'history': history}
+    
+    def _drive(self, steps, callback=None, run=None):
+        """Carry out a council flow with blocking calls and return its result.
         
-        search_results = self.tools.web_search(question, max_results=5)
+        Council flows (the modes, deliberations and single advisors below) are
+        generators shared by both engines. They yield steps, and each step's
+        result is sent back at the yield (a failed step raises there instead):
+            
+            ('emit', event)                       pass an event to the callback
+            ('call', function, *args)             blocking work such as a search
+            ('chat', advisor, messages, options)  one model call, returning _chat's reply
+            ('parallel', advisors, steps_for, timeout_prefix)
+                                                  run the flow steps_for(advisor) for every
+                                                  advisor at once, returning their non-empty
+                                                  results in advisor order
         
-        if callback:
-            callback({
-                'name': advisor['name'],
-                'role': advisor['role'],
-                'content': 'Analyzing search results...',
-                'status': 'thinking'
-            })
+        AsyncAICouncil drives the same flows on its event loop.
+        """
+        result, error = None, None
+        while True:
+            try:
+                step = steps.throw(error) if error is not None else steps.send(result)
+            except StopIteration as done:
+                return done.value
+            result, error = None, None
+            try:
+                result = self._run_step(step, callback, run)
+            except Exception as e:
+                error = e
+    
+    def _run_step(self, step, callback, run):
+        """Carry out one step of a council flow for _drive"""
+        kind, *args = step
+        if kind == 'emit':
+            if callback:
+                callback(args[0])
+        elif kind == 'call':
+            function, *call_args = args
+            return function(*call_args)
+        elif kind == 'chat':
+            advisor, messages, options = args
+            return self._chat(advisor, messages, options, callback=callback, run=run)
+        elif kind == 'parallel':
+            advisors, steps_for, timeout_prefix = args
+            return self._run_parallel(
+                advisors,
+                lambda advisor, advisor_callback: self._drive(steps_for(advisor), advisor_callback, run),
+                callback,
+                timeout_prefix=timeout_prefix,
+                run=run
+            )
+        else:
+            raise ValueError(f'Unknown council step: {kind}')
+    
+    def _event(self, advisor, content, status, **fields):
+        """A callback event from an advisor, or from {'name': 'System', 'role': ...}"""
+        return dict({'name': advisor['name'], 'role': advisor['role'], 'content': content}, **fields, status=status)
+    
+    def _web_search_steps(self, question, selected_model, run):
+        """Flow of web search mode (see _drive)"""
+        advisor = self._web_search_advisor(selected_model)
+        yield ('emit', self._event(
+            {'name': 'System', 'role': 'Web Search'}, f'🔍 {advisor["name"]} is searching the web...', 'tool_info'
+        ))
         
-        enhanced_question = f"{question}\n\n**Web Search Results:**\n{search_results}\n\nBased on these search results, provide a comprehensive answer."
+        search_results = yield ('call', self._run_tool, 'web_search', lambda: self.tools.web_search(question, max_results=5), run)
+        self._check_cancelled(run)
         
-        messages = [
-            {'role': 'system', 'content': f"{advisor['personality']} You have access to web search results. Provide a detailed, well-informed answer (4-5 sentences)."},
-            {'role': 'user', 'content': enhanced_question}
-        ]
+        yield ('emit', self._event(advisor, 'Analyzing search results...', 'thinking'))
+        messages = self._web_search_messages(advisor, self._with_history(question, run), search_results)
         
         try:
-            response = self.client.chat(
-                model=advisor['model'],
-                messages=messages,
-                options={'temperature': 0.7, 'num_predict': 250}
-            )
-            
-            answer = response['message']['content'].strip()
+            reply = yield ('chat', advisor, messages, {'temperature': 0.7, 'num_predict': 250})
+            answer = reply['content'].strip()
             if not answer:
                 answer = "I couldn't generate a response based on the search results."
             
-            if callback:
-                callback({
-                    'name': advisor['name'],
-                    'role': advisor['role'],
-                    'content': answer,
-                    'status': 'complete'
-                })
-            
+            yield ('emit', self._event(advisor, answer, 'complete', cached=reply['cached'], stats=reply['stats']))
             return [{'advisor': advisor['name'], 'role': advisor['role'], 'response': answer}]
-            
+        
         except Exception as e:
             error_msg = f"Unable to respond: {str(e)}"
-            if callback:
-                callback({
-                    'name': advisor['name'],
-                    'role': advisor['role'],
-                    'content': error_msg,
-                    'status': 'error'
-                })
+            yield ('emit', self._event(advisor, error_msg, 'error'))
             return [{'advisor': advisor['name'], 'role': advisor['role'], 'response': error_msg}]
     
-    def deep_research_mode(self, question, callback=None):
-        """All models independently search and provide opinions"""
-        if callback:
-            callback({
-                'name': 'System',
-                'role': 'Deep Research',
-                'content': '🔬 Initiating deep research mode - all advisors will search independently...',
-                'status': 'tool_info'
-            })
+    def _deep_research_steps(self, question, parallel, run):
+        """Flow of deep research mode (see _drive)"""
+        yield ('emit', self._event(
+            {'name': 'System', 'role': 'Deep Research'},
+            '🔬 Initiating deep research mode - all advisors will search independently...',
+            'tool_info'
+        ))
         
-        all_responses = []
+        if not parallel or self.max_parallel_advisors <= 1 or len(self.advisors) <= 1:
+            all_responses = []
+            for advisor in self.advisors:
+                result = yield from self._research_steps(advisor, question, run)
+                if result:
+                    all_responses.append(result)
+            return all_responses
         
-        for advisor in self.advisors:
-            if callback:
-                callback({
-                    'name': advisor['name'],
-                    'role': advisor['role'],
-                    'content': 'Searching the web...',
-                    'status': 'thinking'
-                })
-            
-            search_results = self.tools.web_search(question, max_results=3)
-            
-            if callback:
-                callback({
-                    'name': advisor['name'],
-                    'role': advisor['role'],
-                    'content': 'Analyzing findings...',
-                    'status': 'thinking'
-                })
-            
-            enhanced_question = f"{question}\n\n**Your Research Findings:**\n{search_results}\n\nBased on your research, provide your unique perspective."
-            
-            messages = [
-                {'role': 'system', 'content': advisor['personality']},
-                {'role': 'user', 'content': enhanced_question}
-            ]
+        return (yield ('parallel', self.advisors, lambda advisor: self._research_steps(advisor, question, run), 'Research error'))
+    
+    def _research_steps(self, advisor, question, run):
+        """Flow of one deep research advisor: search, then analyze (see _drive)"""
+        yield ('emit', self._event(advisor, 'Searching the web...', 'thinking'))
+        search_results = yield ('call', self._run_tool, 'web_search', lambda: self.tools.web_search(question, max_results=3), run)
+        
+        yield ('emit', self._event(advisor, 'Analyzing findings...', 'thinking'))
+        messages = self._research_messages(advisor, self._with_history(question, run), search_results)
+        
+        try:
+            reply = yield ('chat', advisor, messages, {'temperature': 0.7, 'num_predict': 200})
+            advisor_response = reply['content'].strip()
+            if not advisor_response:
+                advisor_response = "I need more time to analyze the research."
             
-            try:
-                response = self.client.chat(
-                    model=advisor['model'],
-                    messages=messages,
-                    options={'temperature': 0.7, 'num_predict': 200}
-                )
-                
-                advisor_response = response['message']['content'].strip()
-                if not advisor_response:
-                    advisor_response = "I need more time to analyze the research."
-                
-                if callback:
-                    callback({
-                        'name': advisor['name'],
-                        'role': advisor['role'],
-                        'content': advisor_response,
-                        'status': 'complete'
-                    })
+            yield ('emit', self._event(advisor, advisor_response, 'complete', cached=reply['cached'], stats=reply['stats']))
+            return self._round_result(advisor, advisor_response)
+        
+        except Exception as e:
+            yield ('emit', self._event(advisor, f"Research error: {str(e)}", 'error'))
+            return None
+    
+    def _run_parallel(self, advisors, task, callback, timeout_prefix='Unable to respond', run=None):
+        """Run task(advisor, callback) for every advisor on a bounded worker pool.
+        
+        Events stream through the callback as each advisor progresses, advisors
+        exceeding advisor_timeout are reported as errors, and the non-empty
+        results are returned in advisor order. Cancelling the run's token
+        stops waiting at once and drops advisors that haven't started.
+        """
+        results = [None] * len(advisors)
+        order = self.residency.schedule(advisors)
+        started = {}
+        abandoned = set()
+        lock = threading.Lock()
+        
+        def make_callback(idx):
+            def guarded(message):
+                # Drop late events from advisors that already timed out
+                with lock:
+                    if idx in abandoned:
+                        return
+                    if callback:
+                        callback(message)
+            return guarded
+        
+        def run_one(idx, advisor):
+            with lock:
+                started[idx] = time.monotonic()
+            return task(advisor, make_callback(idx))
+        
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(self.max_parallel_advisors, len(advisors))),
+            thread_name_prefix='council-advisor'
+        )
+        # Submit advisors sharing a model back to back to avoid model swaps
+        futures = {
+            executor.submit(run_one, idx, advisors[idx]): idx
+            for idx in order
+        }
+        pending = set(futures)
+        
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                self._check_cancelled(run)
                 
-                all_responses.append({
-                    'advisor': advisor['name'],
-                    'role': advisor['role'],
-                    'response': advisor_response
-                })
+                for future in done:
+                    idx = futures[future]
+                    try:
+                        results[idx] = future.result()
+                    except Exception as e:
+                        print(f"Advisor worker failed for {advisors[idx]['name']}: {e}")
                 
-            except Exception as e:
-                error_msg = f"Research error: {str(e)}"
-                if callback:
-                    callback({
-                        'name': advisor['name'],
-                        'role': advisor['role'],
-                        'content': error_msg,
-                        'status': 'error'
-                    })
+                now = time.monotonic()
+                for future in list(pending):
+                    idx = futures[future]
+                    with lock:
+                        timed_out = idx in started and now - started[idx] > self.advisor_timeout
+                        if timed_out:
+                            abandoned.add(idx)
+                    if not timed_out:
+                        continue
+                    
+                    pending.discard(future)
+                    advisor = advisors[idx]
+                    if callback:
+                        callback({
+                            'name': advisor['name'],
+                            'role': advisor['role'],
+                            'content': f"{timeout_prefix}: timed out after {self.advisor_timeout}s",
+                            'status': 'error'
+                        })
+        finally:
+            # Timed-out workers finish in the background; their events are already dropped
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        return all_responses
+        return [result for result in results if result]
+    
+    def convene_council(self, question, callback=None, mode='normal', selected_model=None, enabled_tools=None, stream=False, deliberation='chain', use_cache=False, stats=None, cancel=None, history=None):
+        """Main method to run council in different modes.
+        
+        With stream=True each advisor's tokens are forwarded through the callback
+        as 'delta' events before the usual 'complete' event. In normal mode,
+        deliberation='pipelined' replaces the strict advisor chain with two
+        parallel rounds, and deliberation='adaptive' ends the chain early,
+        going straight to the Prime Minister once the ministers so far agree
+        (see consensus_model). Pass a list as stats to collect the timings and token
+        counts of every model and tool call in the run. Cancelling the
+        CancelToken passed as cancel stops the run between advisors and
+        mid-generation, and convene_council raises CouncilCancelled.
+        history is the earlier conversation (see ConversationStore.context);
+        advisors see it ahead of the question, while searches and tool
+        detection use the question alone.
+        """
+        started = time.time()
+        try:
+            return self._convene(question, callback, mode, selected_model, enabled_tools, stream, deliberation, use_cache, stats, cancel, history)
+        finally:
+            self.metrics.observe('council_run_seconds', time.time() - started, mode=mode)
     
-    def convene_council(self, question, callback=None, mode='normal', selected_model=None, enabled_tools=None):
-        """Main method to run council in different modes"""
+    def _convene(self, question, callback, mode, selected_model, enabled_tools, stream, deliberation, use_cache, stats, cancel, history):
+        """Start the run for a mode; under AsyncAICouncil the result is awaitable"""
         if mode == 'web_search':
-            return self.web_search_mode(question, selected_model, callback)
+            return self.web_search_mode(question, selected_model, callback, stream=stream, use_cache=use_cache, stats=stats, cancel=cancel, history=history)
         elif mode == 'deep_research':
-            return self.deep_research_mode(question, callback)
+            return self.deep_research_mode(question, callback, stream=stream, use_cache=use_cache, stats=stats, cancel=cancel, history=history)
         else:
-            return self._normal_mode(question, callback, enabled_tools or {})
+            run = self._new_run('normal', stream, use_cache, stats, cancel, history)
+            return self._normal_mode(question, callback, enabled_tools or {}, run, deliberation=deliberation)
     
-    def _normal_mode(self, question, callback, enabled_tools):
+    def _normal_mode(self, question, callback, enabled_tools, run=None, deliberation='chain'):
         """Original council mode with optional tools"""
-        tool_results = {}
+        tool_results = self._gather_tool_results(question, enabled_tools, callback, run)
+        enhanced_question = self._with_history(self._enhance_question(question, tool_results), run)
+        self._check_cancelled(run)
+        return self._drive(self._deliberation_steps(enhanced_question, deliberation, run), callback, run)
+    
+    def _deliberation_steps(self, enhanced_question, deliberation, run):
+        """Flow of normal mode's advisors for a deliberation style (see _drive)"""
+        if deliberation == 'pipelined' and len(self.advisors) > 1:
+            return (yield from self._pipelined_steps(enhanced_question, run))
+        if deliberation == 'adaptive' and len(self.advisors) > 2:
+            return (yield from self._adaptive_steps(enhanced_question, run))
         
-        if enabled_tools.get('document_reading', False):
-            file_patterns = [
-                r'["\']([^"\']+\.(?:pdf|docx|txt|doc))["\']',
-                r'(?:read|analyze|summarize)\s+([^\s]+\.(?:pdf|docx|txt))',
-                r'((?:\/|\.\/|~\/)[^\s]+\.(?:pdf|docx|txt))'
-            ]
+        all_responses = []
+        previous_opinions = []
+        
+        for advisor in self.advisors:
+            self._check_cancelled(run)
+            messages = self._chain_messages(advisor, enhanced_question, previous_opinions)
+            advisor_response = yield from self._consult_steps(advisor, messages, run)
             
-            for pattern in file_patterns:
-                matches = re.findall(pattern, question, re.IGNORECASE)
-                if matches:
-                    file_path = matches[0]
-                    tool_results['document'] = self.tools.read_document(file_path)
-                    
-                    if callback:
+            if advisor_response is None:
+                continue
+            
+            previous_opinions.append((advisor['name'], advisor_response))
+            all_responses.append(self._round_result(advisor, advisor_response))
+        
+        return all_responses
+    
+    def _adaptive_steps(self, enhanced_question, run):
+        """The advisor chain, cut short once the ministers so far agree.
+        
+        After each minister a judge model is asked whether the opinions so far
+        recommend the same thing; if they do, the remaining ministers are
+        skipped (and reported as 'skipped') and the Prime Minister synthesizes
+        what was said.
+        """
+        ministers = self.advisors[:-1]
+        prime_minister = self.advisors[-1]
+        all_responses = []
+        previous_opinions = []
+        
+        for idx, advisor in enumerate(ministers):
+            self._check_cancelled(run)
+            messages = self._chain_messages(advisor, enhanced_question, previous_opinions)
+            advisor_response = yield from self._consult_steps(advisor, messages, run)
+            if advisor_response is not None:
+                previous_opinions.append((advisor['name'], advisor_response))
+                all_responses.append(self._round_result(advisor, advisor_response))
+            
+            # The consensus judge is a blocking model call
+            skipped = yield ('call', self._consensus_skips, enhanced_question, previous_opinions, ministers[idx + 1:], run)
+            if skipped:
+                for event in skipped:
+                    yield ('emit', event)
+                break
+        
+        self._check_cancelled(run)
+        messages = self._chain_messages(prime_minister, enhanced_question, previous_opinions)
+        result = self._round_result(prime_minister, (yield from self._consult_steps(prime_minister, messages, run)))
+        if result:
+            all_responses.append(result)
+        return all_responses
+    
+    def _pipelined_steps(self, enhanced_question, run):
+        """Two-round deliberation: ministers answer independently in parallel,
+        then every minister and the Prime Minister respond to the others'
+        first-round opinions, again in parallel"""
+        ministers = self.advisors[:-1]
+        prime_minister = self.advisors[-1]
+        
+        # Round 1: independent opinions
+        def first_round(advisor):
+            messages = self._chain_messages(advisor, enhanced_question, [])
+            return self._round_result(advisor, (yield from self._consult_steps(advisor, messages, run)))
+        
+        opinions = {
+            result['advisor']: result['response']
+            for result in (yield ('parallel', ministers, first_round, 'Unable to respond'))
+        }
+        
+        # Round 2: ministers refine, the Prime Minister synthesizes
+        def second_round(advisor):
+            # Every second-round prompt lists the same first-round opinions, so they share a prefix
+            if advisor is prime_minister:
+                messages = self._chain_messages(advisor, enhanced_question, list(opinions.items()))
+                status_text = 'Synthesizing the council...'
+            else:
+                messages = self._deliberation_messages(advisor, enhanced_question, list(opinions.items()))
+                status_text = 'Reviewing the other ministers...'
+            
+            result = self._round_result(advisor, (yield from self._consult_steps(advisor, messages, run, status_text)))
+            if result and advisor['name'] in opinions:
+                result['initial_response'] = opinions[advisor['name']]
+            return result
+        
+        return (yield ('parallel', ministers + [prime_minister], second_round, 'Unable to respond'))
+    
+    def _consult_steps(self, advisor, messages, run, status_text='Thinking...'):
+        """Flow of one normal mode advisor (see _drive); returns None on failure"""
+        yield ('emit', self._event(advisor, status_text, 'thinking'))
+        
+        try:
+            reply = yield ('chat', advisor, messages, {'temperature': 0.7})
+            advisor_response = reply['content'].strip()
+            
+            if not advisor_response:
+                advisor_response = "I need more time to consider this."
+            
+            yield ('emit', self._event(
+                advisor, advisor_response, 'complete',
+                cached=reply['cached'],
+                stats=reply['stats'],
+                prompt_tokens=self._prompt_tokens(advisor, messages, reply)
+            ))
+            return advisor_response
+        
+        except Exception:
+            yield ('emit', self._event(advisor, "Unable to respond.", 'error'))
+            return None
+    
+    def _round_result(self, advisor, advisor_response):
+        """Wrap a deliberation response in the standard result shape"""
+        if advisor_response is None:
+            return None
+        return {
+            'advisor': advisor['name'],
+            'role': advisor['role'],
+            'response': advisor_response
+        }
+    
+    def _chat(self, advisor, messages, options, callback=None, run=None):
+        """Run one advisor's chat call and return {'content', 'cached', 'stats'}.
+        
+        When streaming, every chunk is forwarded to the callback as a 'delta'
+        event so the client can render the answer as it is generated. Cacheable
+        calls are answered from the response cache without touching Ollama.
+        """
+        run = run or {}
+        self._check_cancelled(run)
+        cache_key = self._response_cache_key(advisor, messages, options, run)
+        if cache_key:
+            content = self.response_cache.get(cache_key)
+            if content is not None:
+                self._record_chat(advisor, run, outcome='cached')
+                return {'content': content, 'cached': True, 'stats': {}}
+        
+        started = time.time()
+        try:
+            content, stats = self._chat_call(advisor, messages, options, callback, run, started)
+        except CouncilCancelled:
+            self._record_chat(advisor, run, outcome='cancelled')
+            raise
+        except Exception:
+            self._record_chat(advisor, run, outcome='error')
+            raise
+        
+        self._record_chat(advisor, run, stats)
+        if cache_key and content.strip():
+            self.response_cache.set(cache_key, content)
+        return {'content': content, 'cached': False, 'stats': stats}
+    
+    def _chat_call(self, advisor, messages, options, callback, run, started):
+        """The Ollama call behind _chat; returns (content, stats)"""
+        first_token = None
+        cancel = run.get('cancel')
+        if not run.get('stream') and cancel is None:
+            response = self.client.chat(
+                model=advisor['model'],
+                messages=messages,
+                options=options,
+                keep_alive=self.residency.keep_alive_for(advisor['model'])
+            )
+            content = response['message']['content']
+        else:
+            # Cancellable calls stream even when the client doesn't, so they can be dropped mid-generation
+            parts = []
+            response = {}
+            chunks = self.client.chat(model=advisor['model'], messages=messages, options=options, stream=True,
+                                      keep_alive=self.residency.keep_alive_for(advisor['model']))
+            try:
+                for chunk in chunks:
+                    if cancel is not None and cancel.cancelled:
+                        break
+                    delta = chunk['message']['content']
+                    if chunk.get('done'):
+                        response = chunk
+                    if not delta:
+                        continue
+                    if first_token is None:
+                        first_token = time.time() - started
+                    parts.append(delta)
+                    if callback and run.get('stream'):
                         callback({
-                            'name': 'System',
-                            'role': 'Tools',
-                            'content': f'📄 Document read: {file_path}',
-                            'status': 'tool_info'
+                            'name': advisor['name'],
+                            'role': advisor['role'],
+                            'content': delta,
+                            'status': 'delta'
                         })
-                    break
+            finally:
+                # Closing the stream drops the connection, and Ollama stops generating
+                chunks.close()
+            self._check_cancelled(run)
+            content = ''.join(parts)
         
-        if enabled_tools.get('calculator', False):
-            math_pattern = r'(\d+[\s\+\-\*/\^\(\)\.]+[\d\s\+\-\*/\^\(\)\.]+\d+)'
-            match = re.search(math_pattern, question)
-            if match:
-                expression = match.group(1).strip()
-                tool_results['calculation'] = self.tools.calculate(expression)
-                
-                if callback:
-                    callback({
-                        'name': 'System',
-                        'role': 'Tools',
-                        'content': f'🧮 {tool_results["calculation"]}',
-                        'status': 'tool_info'
-                    })
+        return content, self._response_stats(response, started, first_token)
+    
+    def _prompt_tokens(self, advisor, messages, reply):
+        """Prompt size of a normal mode call: estimated, evaluated as reported by Ollama, and the model's budget"""
+        return {
+            'estimated': self.prompts.count(messages),
+            'evaluated': reply['stats'].get('prompt_eval_count'),
+            'budget': self.prompts.budget_for(advisor['model'])
+        }
+    
+    def _response_stats(self, response, started, first_token=None):
+        """Timings and token counts Ollama reports for a call, plus our own wall-clock time"""
+        stats = {'wall_seconds': round(time.time() - started, 3)}
+        if first_token is not None:
+            stats['first_token_seconds'] = round(first_token, 3)
+        for field in ('prompt_eval_count', 'eval_count'):
+            if response.get(field) is not None:
+                stats[field] = response.get(field)
+        for field in ('total_duration', 'load_duration', 'prompt_eval_duration', 'eval_duration'):
+            if response.get(field) is not None:
+                # Ollama reports durations in nanoseconds
+                stats[field.replace('duration', 'seconds')] = round(response.get(field) / 1e9, 3)
+        if stats.get('eval_count') and stats.get('eval_seconds'):
+            stats['tokens_per_second'] = round(stats['eval_count'] / stats['eval_seconds'], 1)
+        return stats
+    
+    def _record_chat(self, advisor, run, stats=None, outcome='ok'):
+        """Add a chat call to the metrics and to the run's stats list"""
+        model = advisor['model']
+        mode = run.get('mode', 'normal')
+        self.metrics.inc('council_chat_requests_total', model=model, mode=mode, outcome=outcome)
         
-        enhanced_question = question
-        if tool_results:
-            enhanced_question += "\n\n**Additional Information:**\n"
-            for tool_name, result in tool_results.items():
-                truncated_result = result[:2000] + "..." if len(result) > 2000 else result
-                enhanced_question += f"\n{truncated_result}\n"
+        if stats:
+            self.metrics.observe('council_chat_seconds', stats['wall_seconds'], model=model, mode=mode)
+            if 'first_token_seconds' in stats:
+                self.metrics.observe('council_first_token_seconds', stats['first_token_seconds'], model=model)
+            for metric, field in (('council_load_seconds_total', 'load_seconds'),
+                                  ('council_prompt_tokens_total', 'prompt_eval_count'),
+                                  ('council_prompt_eval_seconds_total', 'prompt_eval_seconds'),
+                                  ('council_eval_tokens_total', 'eval_count'),
+                                  ('council_eval_seconds_total', 'eval_seconds')):
+                if field in stats:
+                    self.metrics.inc(metric, stats[field], model=model)
+            if 'tokens_per_second' in stats:
+                self.metrics.set('council_tokens_per_second', stats['tokens_per_second'], model=model)
         
-        all_responses = []
-        previous_opinions = ""
+        if run.get('stats') is not None:
+            run['stats'].append(dict(stats or {}, advisor=advisor['name'], model=model, mode=mode, outcome=outcome))
+    
+    def _consensus_skips(self, question, opinions, remaining, run=None):
+        """Events for the remaining advisors if the opinions so far agree enough to skip them, else []"""
+        if not remaining or len(opinions) < self.consensus_min_opinions:
+            return []
         
-        for idx, advisor in enumerate(self.advisors):
-            if callback:
+        model = self.consensus_model or self.router_model or self.advisors[-1]['model']
+        agreed = self._judge_consensus(model, question, opinions, run)
+        if agreed is None:
+            score = round(overlap([opinion for _, opinion in opinions]), 3)
+            agreed = score >= self.consensus_threshold
+            judged = f'word overlap {score:.2f}'
+        else:
+            score = 1.0 if agreed else 0.0
+            judged = f'judged by {model}'
+        if not agreed:
+            return []
+        
+        events = [{
+            'name': 'System',
+            'role': 'Consensus',
+            'content': f'🤝 The first {len(opinions)} ministers agree ({judged}); skipping to the synthesis',
+            'consensus': score,
+            'status': 'tool_info'
+        }]
+        for advisor in remaining:
+            self._record_chat(advisor, run or {}, outcome='skipped')
+            events.append({
+                'name': advisor['name'],
+                'role': advisor['role'],
+                'content': 'Skipped: the council already reached consensus.',
+                'consensus': score,
+                'status': 'skipped'
+            })
+        return events
+    
+    def _judge_consensus(self, model, question, opinions, run=None):
+        """Ask model whether the (name, opinion) pairs recommend the same thing; None if it can't say"""
+        prompt = judge_prompt(question, opinions)
+        try:
+            response = self._run_tool('consensus', lambda: self.client.generate(
+                model=model, prompt=prompt, options={'temperature': 0, 'num_predict': 4}, keep_alive=self.keep_alive
+            ), run)
+        except Exception as e:
+            print(f"Consensus judge failed, falling back to word overlap: {e}")
+            return None
+        return read_judgement(response['response'])
+    
+    def _check_cancelled(self, run):
+        """Raise CouncilCancelled if the run's cancel token has been cancelled"""
+        cancel = (run or {}).get('cancel')
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+    
+    def _with_history(self, question, run):
+        """Put the conversation so far ahead of a follow-up question"""
+        history = (run or {}).get('history')
+        if not history:
+            return question
+        return f"{history}\n\n**Follow-up question:** {question}"
+    
+    def _run_tool(self, tool, call, run=None):
+        """Run a tool call, timing it for the metrics and the run's stats"""
+        started = time.time()
+        try:
+            return call()
+        finally:
+            seconds = time.time() - started
+            self.metrics.observe('council_tool_seconds', seconds, tool=tool)
+            if run and run.get('stats') is not None:
+                run['stats'].append({'tool': tool, 'seconds': round(seconds, 3)})
+    
+    def _response_cache_key(self, advisor, messages, options, run):
+        """Hash of model, messages and options, or None if the call shouldn't be cached"""
+        if self.response_cache is None:
+            return None
+        if not run.get('use_cache') and (options or {}).get('temperature') != 0:
+            return None
+        
+        payload = json.dumps([advisor['model'], messages, options], sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def route(self, question, mode='normal', enabled_tools=None):
+        """Decide how many ministers, and which models, a question needs (see QuestionRouter)"""
+        sizes = {model['name']: model['size'] for model in self.catalog.get() or []}
+        # Bound here rather than in the shared router, so the session's own host answers
+        classifier = self._classify_with_model if self.router_model else None
+        return self.router.route(question, self.advisors, mode, enabled_tools, sizes, classifier)
+    
+    def routed(self, decision):
+        """A fork of this council that convenes only the advisors and models a routing decision picked"""
+        session = self.fork()
+        session.advisors = self.router.apply(self.advisors, decision)
+        return session
+    
+    def _classify_with_model(self, question):
+        """Ask router_model whether a question is simple, moderate or complex"""
+        prompt = ROUTER_PROMPT.format(question=question[:1000])
+        response = self._run_tool('route', lambda: self.client.generate(
+            model=self.router_model, prompt=prompt, options={'temperature': 0, 'num_predict': 4}, keep_alive=self.keep_alive
+        ))
+        words = re.findall(r'[a-z]+', response['response'].lower())
+        return words[0] if words else None
+    
+    def get_execution_plan(self, mode='normal', selected_model=None, deliberation='chain'):
+        """Predict which model loads a council run will cause.
+        
+        Parallel stages are planned in their swap-minimizing submission order;
+        with several advisors in flight the real interleaving may differ.
+        """
+        loaded = self.residency.loaded_models()
+        plan = self.residency.plan(self._execution_sequence(mode, selected_model, deliberation, loaded), loaded)
+        plan['mode'] = mode
+        return plan
+    
+    def warm_up_models(self):
+        """Pre-load the models the council will need first"""
+        if not self.advisors:
+            # Advisors are assigned once the catalog's first listing lands
+            self.catalog.get(wait=30)
+        return self.residency.warm_up(a['model'] for a in self._execution_sequence('normal'))
+    
+    def _execution_sequence(self, mode='normal', selected_model=None, deliberation='chain', loaded=None):
+        """Advisors in the order a run would call them"""
+        if not self.advisors:
+            return []
+        if mode == 'web_search':
+            return [self._web_search_advisor(selected_model)]
+        if mode == 'deep_research':
+            return [self.advisors[idx] for idx in self.residency.schedule(self.advisors, loaded)]
+        if deliberation == 'pipelined' and len(self.advisors) > 1:
+            ministers = self.advisors[:-1]
+            first_round = [ministers[idx] for idx in self.residency.schedule(ministers, loaded)]
+            second_round = [self.advisors[idx] for idx in self.residency.schedule(self.advisors, loaded)]
+            return first_round + second_round
+        return list(self.advisors)
+    
+    # Prompt and tool helpers shared by the sync and async engines
+    
+    def _web_search_advisor(self, selected_model):
+        """Pick the advisor that answers in web search mode"""
+        return next((a for a in self.advisors if a['model'] == selected_model), self.advisors[0])
+    
+    def _web_search_messages(self, advisor, question, search_results):
+        """Build the chat messages for web search mode"""
+        enhanced_question = f"{question}\n\n**Web Search Results:**\n{search_results}\n\nBased on these search results, provide a comprehensive answer."
+        
+        return [
+            {'role': 'system', 'content': f"{advisor['personality']} You have access to web search results. Provide a detailed, well-informed answer (4-5 sentences)."},
+            {'role': 'user', 'content': enhanced_question}
+        ]
+    
+    def _research_messages(self, advisor, question, search_results):
+        """Build the chat messages for a deep research advisor"""
+        enhanced_question = f"{question}\n\n**Your Research Findings:**\n{search_results}\n\nBased on your research, provide your unique perspective."
+        
+        return [
+            {'role': 'system', 'content': advisor['personality']},
+            {'role': 'user', 'content': enhanced_question}
+        ]
+    
+    def _chain_messages(self, advisor, enhanced_question, previous_opinions):
+        """Build the chat messages for an advisor in the normal mode chain"""
+        return self.prompts.chain(advisor, enhanced_question, previous_opinions)
+    
+    def _deliberation_messages(self, advisor, enhanced_question, opinions):
+        """Build the second-round messages for a minister in pipelined deliberation"""
+        return self.prompts.deliberation(advisor, enhanced_question, opinions)
+    
+    def _extraction_progress(self, file_path, callback):
+        """Report document extraction progress through the callback, about 20 updates per document"""
+        if not callback:
+            return None
+        
+        file_name = os.path.basename(file_path)
+        
+        def progress(done, total):
+            step = max(1, total // 20)
+            if done == total or done % step == 0:
                 callback({
-                    'name': advisor['name'],
-                    'role': advisor['role'],
-                    'content': 'Thinking...',
-                    'status': 'thinking'
+                    'name': 'System',
+                    'role': 'Tools',
+                    'content': f'📄 Reading {file_name}: page {done} of {total}',
+                    'status': 'progress',
+                    'task': f'document:{file_path}',
+                    'progress': {'done': done, 'total': total}
                 })
+        
+        return progress
+    
+    def _detect_tool_calls(self, question, enabled_tools):
+        """Every tool call the question asks for, found in one pass.
+        
+        Returns (key, tool, call, describe) tuples in the order they appear in
+        the question; describe(result) is the message shown when the call finishes.
+        """
+        calls = []
+        
+        if enabled_tools.get('document_reading', False):
+            # Earlier patterns win where matches overlap, e.g. a quoted path after "read"
+            spans = []
+            for pattern in FILE_PATTERNS:
+                for match in re.finditer(pattern, question, re.IGNORECASE):
+                    if not any(match.start() < end and start < match.end() for start, end, _ in spans):
+                        spans.append((match.start(), match.end(), match.group(1)))
             
-            if idx == 0:
-                user_message = f"Question: {enhanced_question}\n\nProvide your perspective."
-            else:
-                user_message = f"Question: {enhanced_question}\n\nPrevious advisors:\n{previous_opinions}\n\nYour unique perspective:"
+            paths = []
+            for _, _, file_path in sorted(spans):
+                if file_path not in paths:
+                    paths.append(file_path)
             
-            messages = [
-                {'role': 'system', 'content': advisor['personality']},
-                {'role': 'user', 'content': user_message}
-            ]
+            for file_path in paths:
+                calls.append((
+                    f'document:{file_path}',
+                    'read_document',
+                    lambda file_path=file_path, progress=None: self.tools.read_document(file_path, progress=progress),
+                    lambda result, file_path=file_path: f'📄 Document read: {file_path}'
+                ))
+        
+        if enabled_tools.get('calculator', False):
+            expressions = []
+            for match in re.finditer(MATH_PATTERN, question):
+                expression = match.group(1).strip()
+                if expression not in expressions:
+                    expressions.append(expression)
             
-            try:
-                response = self.client.chat(
-                    model=advisor['model'],
-                    messages=messages,
-                    options={'temperature': 0.7}
-                )
-                
-                advisor_response = response['message']['content'].strip()
-                if not advisor_response:
-                    advisor_response = "I need more time to consider this."
-                
-                previous_opinions += f"\n{advisor['name']}: {advisor_response}\n"
-                
+            for expression in expressions:
+                calls.append((
+                    f'calculation:{expression}',
+                    'calculate',
+                    lambda expression=expression: self.tools.calculate(expression),
+                    lambda result: f'🧮 {result}'
+                ))
+        
+        if enabled_tools.get('web_search', False):
+            calls.append((
+                'web_search',
+                'web_search',
+                lambda: self.tools.web_search(question, max_results=3),
+                lambda result: f'🌐 Web search done: {question[:80]}'
+            ))
+        
+        return calls
+    
+    def _gather_tool_results(self, question, enabled_tools, callback=None, run=None):
+        """Run the tools enabled for normal mode concurrently and collect their output.
+        
+        Each call is reported as it finishes. Calls that outlast their
+        tool_timeouts entry are reported and left out. Results keep question
+        order so the prompt doesn't depend on which tool finished first.
+        """
+        calls = self._detect_tool_calls(question, enabled_tools)
+        if not calls:
+            return {}
+        
+        results = {}
+        abandoned = set()
+        lock = threading.Lock()
+        
+        def make_callback(key):
+            def guarded(message):
+                # Drop progress from tools that already timed out
+                with lock:
+                    if key in abandoned:
+                        return
                 if callback:
-                    callback({
-                        'name': advisor['name'],
-                        'role': advisor['role'],
-                        'content': advisor_response,
-                        'status': 'complete'
-                    })
+                    callback(message)
+            return guarded
+        
+        def run_one(key, tool, call):
+            if tool == 'read_document':
+                file_path = key.split(':', 1)[1]
+                progress = self._extraction_progress(file_path, make_callback(key) if callback else None)
+                return self._run_tool(tool, lambda: call(progress=progress), run)
+            return self._run_tool(tool, call, run)
+        
+        executor = ThreadPoolExecutor(max_workers=len(calls), thread_name_prefix='council-tool')
+        started = time.monotonic()
+        futures = {executor.submit(run_one, key, tool, call): (key, tool, describe) for key, tool, call, describe in calls}
+        pending = set(futures)
+        
+        try:
+            while pending:
+                # Wake up in time for the next timeout
+                elapsed = time.monotonic() - started
+                timeouts = [self.tool_timeouts.get(futures[future][1]) for future in pending]
+                poll = min([0.5] + [timeout - elapsed for timeout in timeouts if timeout is not None])
+                done, pending = wait(pending, timeout=max(0.05, poll), return_when=FIRST_COMPLETED)
+                self._check_cancelled(run)
                 
-                all_responses.append({
-                    'advisor': advisor['name'],
-                    'role': advisor['role'],
-                    'response': advisor_response
-                })
+                for future in done:
+                    key, tool, describe = futures[future]
+                    try:
+                        results[key] = future.result()
+                        content = describe(results[key])
+                    except Exception as e:
+                        print(f"Tool {tool} failed: {e}")
+                        content = f'⚠️ {tool} failed: {e}'
+                    if callback:
+                        callback({'name': 'System', 'role': 'Tools', 'content': content, 'status': 'tool_info'})
                 
-            except Exception as e:
-                error_msg = f"Unable to respond."
-                if callback:
-                    callback({
-                        'name': advisor['name'],
-                        'role': advisor['role'],
-                        'content': error_msg,
-                        'status': 'error'
-                    })
+                elapsed = time.monotonic() - started
+                for future in list(pending):
+                    key, tool, _ = futures[future]
+                    timeout = self.tool_timeouts.get(tool)
+                    if timeout is None or elapsed <= timeout:
+                        continue
+                    
+                    pending.discard(future)
+                    with lock:
+                        abandoned.add(key)
+                    if callback:
+                        target = key.partition(':')[2]
+                        callback({
+                            'name': 'System',
+                            'role': 'Tools',
+                            'content': f'⏱️ {tool} timed out after {timeout}s' + (f': {target}' if target else ''),
+                            'status': 'tool_info'
+                        })
+        finally:
+            # Timed-out tools finish in the background; their results are ignored
+            executor.shutdown(wait=False, cancel_futures=True)
         
-        return all_responses
+        return {key: results[key] for key, _, _, _ in calls if key in results}
+    
+    def _enhance_question(self, question, tool_results):
+        """Append tool output to the question"""
+        enhanced_question = question
+        if tool_results:
+            documents = [name for name in tool_results if name.startswith('document')]
+            enhanced_question += "\n\n**Additional Information:**\n"
+            for tool_name, result in tool_results.items():
+                if tool_name.startswith('document'):
+                    # Several documents share the excerpt budget
+                    result = self.retriever.select(
+                        question, result, budget_tokens=self.retriever.budget_tokens // len(documents)
+                    )
+                    if len(documents) > 1:
+                        result = f"📄 {os.path.basename(tool_name.split(':', 1)[-1])}:\n{result}"
+                elif len(result) > 2000:
+                    result = result[:2000] + "..."
+                enhanced_question += f"\n{result}\n"
+        return enhanced_question
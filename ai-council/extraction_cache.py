@@ -0,0 +1,117 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+class ExtractionCache:
+    """Extracted document text on disk, keyed by file content hash.
+    
+    Each entry is one JSON file. Once the directory grows past max_bytes the
+    least recently used entries are deleted. The hashes of the last
+    max_hashes files are remembered by (path, size, mtime) so an unchanged
+    file is only read once per process.
+    """
+    
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024, max_hashes=1024):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'council-extractions')
+        self.max_bytes = max_bytes
+        self.max_hashes = max_hashes
+        self._hashes = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def file_hash(self, file_path):
+        """sha256 of a file's content"""
+        stat = os.stat(file_path)
+        signature = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._hashes.get(signature)
+            if digest is not None:
+                self._hashes.move_to_end(signature)
+                return digest
+        
+        sha256 = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha256.update(block)
+        digest = sha256.hexdigest()
+        
+        with self._lock:
+            self._hashes[signature] = digest
+            self._hashes.move_to_end(signature)
+            while len(self._hashes) > self.max_hashes:
+                self._hashes.popitem(last=False)
+        return digest
+    
+    def get(self, key):
+        """Return the cached entry, or None"""
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    value = json.load(f)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+            
+            # The file's mtime doubles as its last-used time for eviction
+            os.utime(path)
+            self.hits += 1
+            return value
+    
+    def set(self, key, value):
+        """Store an entry, then evict least recently used entries over max_bytes"""
+        path = self._path(key)
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(value, f)
+            os.replace(temp_path, path)
+            self._evict()
+    
+    def clear(self):
+        """Delete every entry"""
+        with self._lock:
+            for path, _, _ in self._entries():
+                os.remove(path)
+    
+    def stats(self):
+        """Hit/miss counters and current size on disk"""
+        with self._lock:
+            entries = self._entries()
+            return {
+                'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+    
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+    
+    def _entries(self):
+        """(path, size, mtime) of every entry (caller holds the lock)"""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+    
+    def _evict(self):
+        """Delete least recently used entries until the cache fits (caller holds the lock)"""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        # Never evict the newest entry, even if it alone is over the limit
+        for path, size, _ in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
@@ -0,0 +1,278 @@
+from ollama import Client, AsyncClient, ResponseError
+import httpx
+import threading
+import time
+
+# Errors that mean the host itself is unreachable or broken, not the request
+HOST_ERRORS = (ConnectionError, httpx.TransportError)
+
+
+class OllamaHost:
+    """One Ollama server in the pool and what we know about it"""
+    
+    def __init__(self, url):
+        self.url = url
+        self.client = Client(host=url)
+        self._async_client = None
+        self.listed = []
+        self.models = None  # None until the first successful poll
+        self.in_flight = 0
+        self.healthy = True
+        self.failures = 0
+        self.last_error = None
+        self.last_seen = None
+    
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            self._async_client = AsyncClient(host=self.url)
+        return self._async_client
+    
+    def has_model(self, model):
+        return self.models is None or model in self.models
+    
+    def status(self):
+        return {
+            'url': self.url,
+            'healthy': self.healthy,
+            'models': sorted(self.models) if self.models is not None else None,
+            'in_flight': self.in_flight,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'last_seen': self.last_seen
+        }
+
+
+class HostPool:
+    """Routes Ollama calls across several hosts.
+    
+    Each host's model list is polled in the background; calls go to the
+    least-loaded healthy host holding the model and fail over to another host
+    when one dies. The pool implements the parts of ollama.Client the council
+    uses (chat, list, ps, generate), so it can stand in for a single client.
+    """
+    
+    def __init__(self, urls, poll_interval=30, max_retries=2):
+        self.hosts = [OllamaHost(url) for url in urls]
+        self.poll_interval = poll_interval
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._poller = None
+        self._stop = threading.Event()
+    
+    def urls(self):
+        return [host.url for host in self.hosts]
+    
+    def start(self):
+        """Poll host health and model lists in the background"""
+        if self._poller is None:
+            self._poller = threading.Thread(target=self._poll_loop, name='ollama-host-poller', daemon=True)
+            self._poller.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+    
+    def refresh(self):
+        """Poll every host once for its model list; marks hosts healthy or not"""
+        for host in self.hosts:
+            try:
+                listed = list(host.client.list().get('models', []))
+                names = {m.get('model') or m.get('name') for m in listed}
+                with self._lock:
+                    host.listed = listed
+                    host.models = names
+                    host.healthy = True
+                    host.failures = 0
+                    host.last_error = None
+                    host.last_seen = time.time()
+            except Exception as e:
+                self._mark_failed(host, e)
+    
+    def status(self):
+        with self._lock:
+            return [host.status() for host in self.hosts]
+    
+    # Client-compatible API
+    
+    def list(self):
+        """Models available anywhere in the pool"""
+        self.refresh()
+        models, seen = [], set()
+        with self._lock:
+            healthy = [host for host in self.hosts if host.healthy]
+            for host in healthy:
+                for model in host.listed:
+                    name = model.get('model') or model.get('name')
+                    if name not in seen:
+                        seen.add(name)
+                        models.append(model)
+        if not healthy:
+            raise ConnectionError(f"No Ollama host reachable: {', '.join(self.urls())}")
+        return {'models': models}
+    
+    def ps(self):
+        """Models currently loaded on any healthy host"""
+        loaded = []
+        for host in self._healthy_hosts():
+            try:
+                loaded.extend(host.client.ps().get('models', []))
+            except Exception as e:
+                self._mark_failed(host, e)
+        return {'models': loaded}
+    
+    def generate(self, model, **kwargs):
+        return self._call(model, lambda host: host.client.generate(model=model, **kwargs))
+    
+    def chat(self, model, stream=False, **kwargs):
+        if stream:
+            return self._stream(model, kwargs)
+        return self._call(model, lambda host: host.client.chat(model=model, **kwargs))
+    
+    def async_client(self):
+        """An AsyncClient-compatible view of the pool"""
+        return AsyncHostPool(self)
+    
+    # Routing
+    
+    def acquire(self, model, exclude=()):
+        """Pick the least-loaded healthy host that has the model and mark it busy"""
+        with self._lock:
+            candidates = [
+                host for host in self.hosts
+                if host.url not in exclude and host.has_model(model)
+            ]
+            # Prefer healthy hosts; a host marked down still gets a chance if nothing else is left
+            candidates = [host for host in candidates if host.healthy] or candidates
+            if not candidates:
+                return None
+            host = min(candidates, key=lambda h: (h.in_flight, h.failures))
+            host.in_flight += 1
+            return host
+    
+    def release(self, host):
+        with self._lock:
+            host.in_flight -= 1
+    
+    def _call(self, model, request):
+        """Run request(host) with failover across hosts"""
+        tried = set()
+        last_error = None
+        for _ in range(self.max_retries + 1):
+            host = self.acquire(model, exclude=tried)
+            if host is None:
+                break
+            tried.add(host.url)
+            try:
+                return request(host)
+            except Exception as e:
+                if not self._handle_error(host, model, e):
+                    raise
+                last_error = e
+            finally:
+                self.release(host)
+        raise last_error or ConnectionError(f"No healthy Ollama host has model '{model}'")
+    
+    def _stream(self, model, kwargs):
+        """Streaming chat; fails over only until the first chunk has been produced"""
+        tried = set()
+        last_error = None
+        for _ in range(self.max_retries + 1):
+            host = self.acquire(model, exclude=tried)
+            if host is None:
+                break
+            tried.add(host.url)
+            started = False
+            try:
+                for chunk in host.client.chat(model=model, stream=True, **kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or not self._handle_error(host, model, e):
+                    raise
+                last_error = e
+            finally:
+                self.release(host)
+        raise last_error or ConnectionError(f"No healthy Ollama host has model '{model}'")
+    
+    def _handle_error(self, host, model, error):
+        """Record a failed call; returns True if another host should be tried"""
+        if isinstance(error, HOST_ERRORS) or (isinstance(error, ResponseError) and error.status_code >= 500):
+            self._mark_failed(host, error)
+            return True
+        if isinstance(error, ResponseError) and error.status_code == 404:
+            # The host lost (or never had) the model; route elsewhere until the next poll
+            with self._lock:
+                if host.models is not None:
+                    host.models.discard(model)
+            return True
+        return False
+    
+    def _mark_failed(self, host, error):
+        with self._lock:
+            host.healthy = False
+            host.failures += 1
+            host.last_error = str(error)
+        print(f"Ollama host {host.url} unavailable: {error}")
+    
+    def _healthy_hosts(self):
+        with self._lock:
+            return [host for host in self.hosts if host.healthy]
+    
+    def _poll_loop(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.poll_interval)
+
+
+class AsyncHostPool:
+    """AsyncClient-compatible view of a HostPool, sharing its routing state"""
+    
+    def __init__(self, pool):
+        self.pool = pool
+    
+    async def chat(self, model, stream=False, **kwargs):
+        if stream:
+            return self._stream(model, kwargs)
+        
+        pool = self.pool
+        tried = set()
+        last_error = None
+        for _ in range(pool.max_retries + 1):
+            host = pool.acquire(model, exclude=tried)
+            if host is None:
+                break
+            tried.add(host.url)
+            try:
+                return await host.async_client.chat(model=model, **kwargs)
+            except Exception as e:
+                if not pool._handle_error(host, model, e):
+                    raise
+                last_error = e
+            finally:
+                pool.release(host)
+        raise last_error or ConnectionError(f"No healthy Ollama host has model '{model}'")
+    
+    async def _stream(self, model, kwargs):
+        pool = self.pool
+        tried = set()
+        last_error = None
+        for _ in range(pool.max_retries + 1):
+            host = pool.acquire(model, exclude=tried)
+            if host is None:
+                break
+            tried.add(host.url)
+            started = False
+            try:
+                async for chunk in await host.async_client.chat(model=model, stream=True, **kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started or not pool._handle_error(host, model, e):
+                    raise
+                last_error = e
+            finally:
+                pool.release(host)
+        raise last_error or ConnectionError(f"No healthy Ollama host has model '{model}'")
@@ -0,0 +1,189 @@
+from message_queue import connect, sqlite_path
+from scheduler import MODE_PRIORITIES, SERVED_MEMORY, admission_order
+from collections import namedtuple
+import json
+import time
+import uuid
+
+QueuedJob = namedtuple('QueuedJob', 'job_id user mode priority submitted_at')
+
+
+class JobQueue:
+    """Council requests waiting for a worker process, kept in a sqlite file.
+    
+    The web process put()s each request and worker processes claim() them in
+    CouncilScheduler's order: mode priority (MODE_PRIORITIES) with aging,
+    then round-robin between users, then arrival. Claiming runs in an
+    immediate transaction so two workers never take the same job.
+    Cancelling a user's jobs deletes the waiting ones and flags the running
+    ones; workers poll cancel_requests() and stop those runs.
+    """
+    
+    def __init__(self, url, mode_priorities=None, max_queued_per_user=3, aging_seconds=60):
+        self.db_path = sqlite_path(url)
+        self.mode_priorities = dict(MODE_PRIORITIES, **(mode_priorities or {}))
+        self.max_queued_per_user = max_queued_per_user
+        self.aging_seconds = aging_seconds
+        db = connect(self.db_path)
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS jobs '
+            '(job_id TEXT PRIMARY KEY, user TEXT NOT NULL, mode TEXT NOT NULL, priority INTEGER NOT NULL, '
+            'payload TEXT NOT NULL, state TEXT NOT NULL, worker TEXT, cancel_reason TEXT, '
+            'submitted_at REAL NOT NULL, started_at REAL)'
+        )
+        db.execute('CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, submitted_at)')
+        # When each user's latest job was claimed, for round-robin
+        db.execute('CREATE TABLE IF NOT EXISTS served (user TEXT PRIMARY KEY, claimed_at REAL NOT NULL)')
+        db.close()
+    
+    def put(self, payload, user, mode='normal'):
+        """Queue a job for the workers; returns its id.
+        
+        Raises ValueError when the user already has max_queued_per_user jobs waiting.
+        """
+        db = connect(self.db_path)
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            queued = db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE user = ? AND state = 'waiting'", (user,)
+            ).fetchone()[0]
+            if self.max_queued_per_user and queued >= self.max_queued_per_user:
+                db.execute('ROLLBACK')
+                raise ValueError(f'Too many queued requests ({queued}); wait for one to finish')
+            
+            job_id = uuid.uuid4().hex
+            db.execute(
+                "INSERT INTO jobs (job_id, user, mode, priority, payload, state, submitted_at) "
+                "VALUES (?, ?, ?, ?, ?, 'waiting', ?)",
+                (job_id, user, mode, self.mode_priorities.get(mode, 1), json.dumps(payload), time.time())
+            )
+            db.execute('COMMIT')
+            return job_id
+        finally:
+            db.close()
+    
+    def claim(self, worker):
+        """Take the next waiting job as (job_id, user, payload), or None when the queue is empty"""
+        db = connect(self.db_path)
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            order = self._order(db)
+            row = None
+            if order:
+                job_id = order[0].job_id
+                now = time.time()
+                row = db.execute('SELECT job_id, user, payload FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+                db.execute(
+                    "UPDATE jobs SET state = 'running', worker = ?, started_at = ? WHERE job_id = ?",
+                    (worker, now, job_id)
+                )
+                db.execute('INSERT OR REPLACE INTO served (user, claimed_at) VALUES (?, ?)', (order[0].user, now))
+                db.execute(
+                    'DELETE FROM served WHERE user NOT IN (SELECT user FROM served ORDER BY claimed_at DESC LIMIT ?)',
+                    (SERVED_MEMORY,)
+                )
+            db.execute('COMMIT')
+        finally:
+            db.close()
+        if row is None:
+            return None
+        job_id, user, payload = row
+        return job_id, user, json.loads(payload)
+    
+    def finish(self, job_id):
+        """Forget a job its worker is done with"""
+        db = connect(self.db_path)
+        try:
+            db.execute('DELETE FROM jobs WHERE job_id = ?', (job_id,))
+        finally:
+            db.close()
+    
+    def cancel_user(self, user, reason='Cancelled'):
+        """Drop a user's waiting jobs and flag their running ones.
+        
+        Returns how many jobs were {'waiting', 'running', 'total'}, like CouncilScheduler.cancel_user.
+        """
+        db = connect(self.db_path)
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            waiting = db.execute("DELETE FROM jobs WHERE user = ? AND state = 'waiting'", (user,)).rowcount
+            running = db.execute(
+                "UPDATE jobs SET cancel_reason = ? WHERE user = ? AND state = 'running' AND cancel_reason IS NULL",
+                (reason, user)
+            ).rowcount
+            db.execute('COMMIT')
+        finally:
+            db.close()
+        return {'waiting': waiting, 'running': running, 'total': waiting + running}
+    
+    def cancel_requests(self, job_ids):
+        """{job_id: reason} for the given running jobs that have been cancelled"""
+        if not job_ids:
+            return {}
+        job_ids = list(job_ids)
+        placeholders = ', '.join('?' * len(job_ids))
+        db = connect(self.db_path)
+        try:
+            rows = db.execute(
+                f'SELECT job_id, cancel_reason FROM jobs WHERE job_id IN ({placeholders}) AND cancel_reason IS NOT NULL',
+                job_ids
+            ).fetchall()
+        finally:
+            db.close()
+        return dict(rows)
+    
+    def requeue_worker(self, worker):
+        """Put a dead worker's running jobs back in the queue (dropping cancelled ones); returns how many"""
+        db = connect(self.db_path)
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            db.execute("DELETE FROM jobs WHERE worker = ? AND state = 'running' AND cancel_reason IS NOT NULL", (worker,))
+            requeued = db.execute(
+                "UPDATE jobs SET state = 'waiting', worker = NULL, started_at = NULL WHERE worker = ? AND state = 'running'",
+                (worker,)
+            ).rowcount
+            db.execute('COMMIT')
+        finally:
+            db.close()
+        return requeued
+    
+    def waiting(self):
+        """(job_id, user, position, queue_length) for every waiting job, in claim order"""
+        db = connect(self.db_path)
+        try:
+            order = self._order(db)
+        finally:
+            db.close()
+        return [(job.job_id, job.user, position, len(order)) for position, job in enumerate(order, 1)]
+    
+    def status(self):
+        """Running and waiting jobs, like CouncilScheduler.status"""
+        db = connect(self.db_path)
+        try:
+            running = db.execute(
+                "SELECT job_id, user, mode, worker, started_at FROM jobs WHERE state = 'running' ORDER BY started_at"
+            ).fetchall()
+            order = self._order(db)
+        finally:
+            db.close()
+        now = time.time()
+        return {
+            'queue': self.db_path,
+            'running': [
+                {'job_id': job_id, 'user': user, 'mode': mode, 'worker': worker, 'seconds': round(now - started_at, 1)}
+                for job_id, user, mode, worker, started_at in running
+            ],
+            'waiting': [
+                {'job_id': job.job_id, 'user': job.user, 'mode': job.mode, 'seconds': round(now - job.submitted_at, 1)}
+                for job in order
+            ]
+        }
+    
+    def _order(self, db):
+        """Waiting jobs in the order workers will claim them"""
+        waiting = [QueuedJob(*row) for row in db.execute(
+            "SELECT job_id, user, mode, priority, submitted_at FROM jobs WHERE state = 'waiting' ORDER BY submitted_at"
+        )]
+        running_users = [user for (user,) in db.execute("SELECT user FROM jobs WHERE state = 'running'")]
+        last_served = dict(db.execute('SELECT user, claimed_at FROM served'))
+        return admission_order(waiting, running_users, time.time(), self.aging_seconds, last_served)
@@ -0,0 +1,80 @@
+from socketio import PubSubManager
+import json
+import sqlite3
+import threading
+import time
+
+
+def sqlite_path(url):
+    """The database file of a sqlite:///path URL (sqlite:////tmp/queue.db is /tmp/queue.db)"""
+    if not url.startswith('sqlite:///'):
+        raise ValueError(f'Expected a sqlite:///path URL, got {url!r}')
+    return url[len('sqlite:///'):]
+
+
+def connect(path):
+    """A sqlite connection several processes can write through at once (WAL, no fsync per commit)"""
+    db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    return db
+
+
+class SqliteManager(PubSubManager):
+    """Socket.IO client manager that shares emits between processes through a sqlite file.
+    
+    A single-box stand-in for the Redis or RabbitMQ managers: every emit is
+    appended to a messages table and each server process polls the table for
+    rows from other processes, delivering them to its own clients. Worker
+    processes use a write_only instance to emit to a client by sid without
+    running a Socket.IO server. Messages older than retention seconds are
+    deleted as new ones are written.
+    """
+    
+    name = 'sqlite'
+    
+    def __init__(self, url, channel='socketio', write_only=False, logger=None, json=None,
+                 poll_interval=0.05, retention=60):
+        super().__init__(channel=channel, write_only=write_only, logger=logger, json=json)
+        self.db_path = sqlite_path(url)
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._last_pruned = 0
+        self._local = threading.local()
+        self._db = connect(self.db_path)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS messages '
+            '(id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, message TEXT NOT NULL, created_at REAL NOT NULL)'
+        )
+    
+    def _publish(self, data):
+        now = time.time()
+        db = self._connection()
+        db.execute(
+            'INSERT INTO messages (channel, message, created_at) VALUES (?, ?, ?)',
+            (self.channel, json.dumps(data), now)
+        )
+        if now - self._last_pruned > self.retention:
+            self._last_pruned = now
+            db.execute('DELETE FROM messages WHERE created_at < ?', (now - self.retention,))
+    
+    def _connection(self):
+        """The calling thread's connection, opened on its first emit (streamed tokens emit many times)"""
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = self._local.db = connect(self.db_path)
+        return db
+    
+    def _listen(self):
+        # Only messages published after this server started are delivered
+        last_id = self._db.execute('SELECT COALESCE(MAX(id), 0) FROM messages').fetchone()[0]
+        while True:
+            rows = self._db.execute(
+                'SELECT id, message FROM messages WHERE channel = ? AND id > ? ORDER BY id',
+                (self.channel, last_id)
+            ).fetchall()
+            for message_id, message in rows:
+                last_id = message_id
+                yield json.loads(message)
+            if not rows:
+                time.sleep(self.poll_interval)
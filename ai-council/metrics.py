@@ -0,0 +1,101 @@
+import threading
+
+# Latency buckets in seconds, from a cached answer to a cold model load on CPU
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+METRIC_HELP = {
+    'council_run_seconds': 'End-to-end duration of a council run',
+    'council_chat_seconds': 'Wall-clock duration of one advisor chat call',
+    'council_chat_requests_total': 'Advisor chat calls by outcome (ok, error, cached)',
+    'council_first_token_seconds': 'Time from request to first streamed token',
+    'council_load_seconds_total': 'Time Ollama spent loading models',
+    'council_prompt_tokens_total': 'Prompt tokens evaluated by Ollama',
+    'council_prompt_eval_seconds_total': 'Time Ollama spent evaluating prompts',
+    'council_eval_tokens_total': 'Tokens generated by Ollama',
+    'council_eval_seconds_total': 'Time Ollama spent generating tokens',
+    'council_tokens_per_second': 'Generation speed of the most recent call',
+    'council_tool_seconds': 'Duration of a tool call',
+    'council_queue_wait_seconds': 'Time a council request waited for a free slot',
+    'council_queue_length': 'Council requests waiting to run',
+    'council_running': 'Council runs in progress',
+}
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and histograms rendered in Prometheus text format.
+    
+    Metrics are created on first use; labels are passed as keyword arguments.
+    """
+    
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._kinds = {}
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, name, value=1, **labels):
+        """Add to a counter"""
+        with self._lock:
+            key = self._key(name, 'counter', labels)
+            self._values[key] = self._values.get(key, 0) + value
+    
+    def set(self, name, value, **labels):
+        """Set a gauge"""
+        with self._lock:
+            self._values[self._key(name, 'gauge', labels)] = value
+    
+    def observe(self, name, value, **labels):
+        """Record one observation in a histogram"""
+        with self._lock:
+            key = self._key(name, 'histogram', labels)
+            histogram = self._values.get(key)
+            if histogram is None:
+                histogram = self._values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram['buckets'][idx] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+    
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            lines = []
+            for name in sorted(self._kinds):
+                kind = self._kinds[name]
+                if name in METRIC_HELP:
+                    lines.append(f'# HELP {name} {METRIC_HELP[name]}')
+                lines.append(f'# TYPE {name} {kind}')
+                
+                for (metric, labels), value in sorted(self._values.items(), key=lambda item: item[0]):
+                    if metric != name:
+                        continue
+                    if kind != 'histogram':
+                        lines.append(f'{name}{self._labels(labels)} {value}')
+                        continue
+                    for bound, count in zip(self.buckets, value['buckets']):
+                        lines.append(f'{name}_bucket{self._labels(labels + (("le", str(bound)),))} {count}')
+                    lines.append(f'{name}_bucket{self._labels(labels + (("le", "+Inf"),))} {value["count"]}')
+                    lines.append(f'{name}_sum{self._labels(labels)} {value["sum"]}')
+                    lines.append(f'{name}_count{self._labels(labels)} {value["count"]}')
+            return '\n'.join(lines) + '\n'
+    
+    def _key(self, name, kind, labels):
+        """Register the metric's kind and return its storage key (caller holds the lock)"""
+        registered = self._kinds.setdefault(name, kind)
+        if registered != kind:
+            raise ValueError(f'Metric {name} is a {registered}, not a {kind}')
+        return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+    
+    def _labels(self, labels):
+        if not labels:
+            return ''
+        pairs = []
+        for label, value in labels:
+            value = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            pairs.append(f'{label}="{value}"')
+        return '{' + ','.join(pairs) + '}'
+
+
+# Shared by every council in the process
+metrics = MetricsRegistry()
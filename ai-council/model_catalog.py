@@ -0,0 +1,90 @@
+import threading
+import time
+
+class ModelCatalog:
+    """In-memory list of available Ollama models, refreshed in the background.
+    
+    Reads never touch Ollama: they return the last successful listing. The
+    first listing happens on the background thread right after start(), so
+    nothing blocks on a slow or missing Ollama server. refresh() forces an
+    immediate listing (e.g. for the refresh button).
+    """
+    
+    def __init__(self, fetch, refresh_interval=60):
+        self.fetch = fetch
+        self.refresh_interval = refresh_interval
+        self.last_refresh = None
+        self.last_error = None
+        
+        self._models = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._populated = threading.Event()
+        self._wake = threading.Event()
+        self._listeners = []
+        self._thread = None
+        self._stopped = threading.Event()
+    
+    def start(self):
+        """Begin background refreshing; the first listing happens immediately"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refresh_loop, name='model-catalog', daemon=True)
+            self._thread.start()
+        return self
+    
+    def get(self, force_refresh=False, wait=None):
+        """Current model list, or None if no listing has succeeded yet.
+        
+        force_refresh lists the models now; wait blocks up to that many seconds
+        for the first listing if there hasn't been one.
+        """
+        if force_refresh:
+            self.refresh()
+        elif wait and not self._populated.is_set():
+            self._populated.wait(wait)
+        
+        with self._lock:
+            return list(self._models) if self._models is not None else None
+    
+    def refresh(self):
+        """List models now; returns True on success"""
+        with self._refresh_lock:
+            try:
+                models = self.fetch()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Error fetching models: {e}")
+                return False
+            
+            with self._lock:
+                self._models = models
+                self.last_refresh = time.time()
+                self.last_error = None
+        
+        for listener in list(self._listeners):
+            try:
+                listener(models)
+            except Exception as e:
+                print(f"Model catalog listener failed: {e}")
+        # Set after listeners so waiters see what they derived (e.g. default advisors)
+        self._populated.set()
+        return True
+    
+    def stop(self):
+        """End background refreshing; the last listing stays readable"""
+        self._stopped.set()
+        self._wake.set()
+    
+    def invalidate(self):
+        """Schedule a background refresh as soon as possible (e.g. after a host change)"""
+        self._wake.set()
+    
+    def subscribe(self, listener):
+        """Call listener(models) after every successful refresh"""
+        self._listeners.append(listener)
+    
+    def _refresh_loop(self):
+        while not self._stopped.is_set():
+            self.refresh()
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
@@ -0,0 +1,108 @@
+class ModelResidencyManager:
+    """Keeps council models resident on the Ollama host.
+    
+    Loading a model into VRAM/RAM usually costs more than the answer itself,
+    so this pre-warms models, sets keep_alive per model, orders independent
+    advisors so those sharing a model run back to back, and predicts which
+    model loads a council run will cause.
+    """
+    
+    def __init__(self, client, keep_alive='30m', max_loaded_models=1):
+        self.client = client
+        self.default_keep_alive = keep_alive
+        self.keep_alive = {}
+        # How many models the host can hold at once (OLLAMA_MAX_LOADED_MODELS / memory bound)
+        self.max_loaded_models = max(1, max_loaded_models)
+    
+    def keep_alive_for(self, model):
+        """keep_alive value sent with every request for this model"""
+        return self.keep_alive.get(model, self.default_keep_alive)
+    
+    def set_keep_alive(self, model, keep_alive):
+        """Override how long Ollama keeps a model loaded after use (e.g. '1h', 0, -1)"""
+        self.keep_alive[model] = keep_alive
+    
+    def loaded_models(self):
+        """Names of the models currently loaded on the host, most recent first"""
+        try:
+            response = self.client.ps()
+            return [m.get('model') or m.get('name') for m in response.get('models', [])]
+        except Exception as e:
+            print(f"Error fetching loaded models: {e}")
+            return []
+    
+    def warm_up(self, models):
+        """Load models ahead of the first question, up to what the host can hold.
+        
+        Models are warmed in the order given, so pass them in order of first use.
+        Returns {model: 'ok' | error message}.
+        """
+        results = {}
+        for model in self._distinct(models)[:self.max_loaded_models]:
+            try:
+                # An empty prompt loads the model without generating anything
+                self.client.generate(model=model, prompt='', keep_alive=self.keep_alive_for(model))
+                results[model] = 'ok'
+            except Exception as e:
+                results[model] = str(e)
+        return results
+    
+    def schedule(self, advisors, loaded=None):
+        """Execution order (advisor indices) for advisors that don't depend on each other.
+        
+        Advisors sharing a model are grouped together, and groups whose model is
+        already loaded go first. Order within a group is preserved.
+        """
+        loaded = self.loaded_models() if loaded is None else loaded
+        groups = {}
+        for idx, advisor in enumerate(advisors):
+            groups.setdefault(advisor['model'], []).append(idx)
+        
+        models = sorted(groups, key=lambda model: (model not in loaded, groups[model][0]))
+        return [idx for model in models for idx in groups[model]]
+    
+    def plan(self, advisors, loaded=None):
+        """Simulate a run over advisors in the given order and report model loads.
+        
+        The host is modelled as an LRU of max_loaded_models, seeded with the
+        models loaded right now.
+        """
+        loaded = self.loaded_models() if loaded is None else loaded
+        resident = list(reversed(loaded[:self.max_loaded_models]))
+        steps = []
+        loads = 0
+        
+        for advisor in advisors:
+            model = advisor['model']
+            evicts = []
+            needs_load = model not in resident
+            
+            if needs_load:
+                loads += 1
+                if len(resident) >= self.max_loaded_models:
+                    evicts.append(resident.pop(0))
+            else:
+                resident.remove(model)
+            resident.append(model)
+            
+            steps.append({
+                'advisor': advisor['name'],
+                'model': model,
+                'load': needs_load,
+                'evicts': evicts
+            })
+        
+        return {
+            'steps': steps,
+            'loads': loads,
+            'models': self._distinct(a['model'] for a in advisors),
+            'initially_loaded': loaded,
+            'max_loaded_models': self.max_loaded_models
+        }
+    
+    def _distinct(self, models):
+        seen = []
+        for model in models:
+            if model not in seen:
+                seen.append(model)
+        return seen
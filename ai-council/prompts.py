@@ -0,0 +1,103 @@
+from retrieval import estimate_tokens
+import re
+
+COUNCIL_PREAMBLE = (
+    "You are one advisor on a council. Each advisor answers the same question from the perspective "
+    "and in the role described at the end of the user's message."
+)
+
+
+class PromptBuilder:
+    """Assembles normal mode advisor prompts within a per-model token budget.
+    
+    Everything advisors have in common comes first: one shared system message,
+    the question, then earlier opinions in a fixed order. The advisor's own
+    personality and instruction come last. Consecutive calls to a model then
+    share a long prompt prefix that Ollama serves from its prompt cache instead
+    of prefilling it again. When a prompt would not fit the model's budget,
+    the oldest opinions are cut to their first sentence, then left out.
+    """
+    
+    def __init__(self, budget_tokens=3072, response_tokens=512, model_budgets=None):
+        self.budget_tokens = budget_tokens
+        # Room left for the answer inside the model's context
+        self.response_tokens = response_tokens
+        self.model_budgets = dict(model_budgets or {})
+    
+    def budget_for(self, model):
+        """Prompt + answer token budget for a model (its context window)"""
+        return self.model_budgets.get(model, self.budget_tokens)
+    
+    def set_budget(self, model, tokens):
+        self.model_budgets[model] = tokens
+    
+    def count(self, messages):
+        """Estimated prompt tokens of a message list"""
+        return sum(estimate_tokens(message['content']) + 4 for message in messages)
+    
+    def chain(self, advisor, question, opinions):
+        """Messages for an advisor in the chain; opinions are (name, opinion) pairs so far"""
+        instruction = "Your unique perspective:" if opinions else "Provide your perspective."
+        return self._build(advisor, question, opinions, instruction)
+    
+    def deliberation(self, advisor, question, opinions):
+        """Second-round messages for a minister; opinions include the minister's own first one"""
+        instruction = "Refine your perspective in light of the other advisors:"
+        if any(name == advisor['name'] for name, _ in opinions):
+            instruction = f"Your first opinion is the one from {advisor['name']}. " + instruction
+        return self._build(advisor, question, opinions, instruction)
+    
+    def _build(self, advisor, question, opinions, instruction):
+        tail = f"\n\n{advisor['personality']}\n\n{instruction}"
+        head = f"Question: {question}"
+        fixed = self.count([
+            {'role': 'system', 'content': COUNCIL_PREAMBLE},
+            {'role': 'user', 'content': head + tail}
+        ])
+        available = self.budget_for(advisor['model']) - self.response_tokens - fixed
+        
+        user_message = head
+        if opinions:
+            user_message += f"\n\nPrevious advisors:\n{self._fit_opinions(opinions, available)}"
+        
+        return [
+            {'role': 'system', 'content': COUNCIL_PREAMBLE},
+            {'role': 'user', 'content': user_message + tail}
+        ]
+    
+    def _fit_opinions(self, opinions, available):
+        """Format opinions, compressing the oldest first until they fit in available tokens"""
+        entries = [(name, opinion) for name, opinion in opinions]
+        
+        def render(entries, omitted=0):
+            text = "".join(f"\n{name}: {opinion}\n" for name, opinion in entries)
+            if omitted:
+                text = f"\n({omitted} earlier opinions omitted for length)\n" + text
+            return text
+        
+        text = render(entries)
+        if estimate_tokens(text) <= available:
+            return text
+        
+        # Oldest opinions shrink to their first sentence; the latest stays whole
+        for idx in range(len(entries) - 1):
+            name, opinion = entries[idx]
+            entries[idx] = (name, self._first_sentence(opinion))
+            text = render(entries)
+            if estimate_tokens(text) <= available:
+                return text
+        
+        # Still too long: leave out the oldest
+        omitted = 0
+        while len(entries) > 1 and estimate_tokens(text) > available:
+            entries.pop(0)
+            omitted += 1
+            text = render(entries, omitted)
+        return text
+    
+    def _first_sentence(self, text):
+        """First sentence of an opinion, marked as shortened"""
+        text = text.strip()
+        match = re.match(r'(.+?[.!?])\s', text, re.DOTALL)
+        sentence = (match.group(1) if match else text)[:300]
+        return sentence if sentence == text else sentence + " [...]"
@@ -0,0 +1,155 @@
+from collections import Counter
+from cache import TTLCache
+import hashlib
+import math
+import re
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'how', 'in', 'is', 'it', 'its',
+    'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'what', 'when', 'where', 'which', 'who',
+    'why', 'will', 'with', 'you', 'your', 'read', 'analyze', 'summarize', 'file', 'document'
+}
+
+PAGE_MARKER = re.compile(r'^--- Page (\d+) ---$')
+
+
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token for English text)"""
+    return len(text) // 4 + 1
+
+
+def tokenize(text):
+    return [word for word in re.findall(r'\w+', text.lower()) if word not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 ranking over a fixed list of text chunks"""
+    
+    def __init__(self, chunks, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.terms = [Counter(tokenize(chunk)) for chunk in chunks]
+        self.lengths = [sum(terms.values()) for terms in self.terms]
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0
+        
+        document_frequency = Counter()
+        for terms in self.terms:
+            document_frequency.update(terms.keys())
+        total = len(self.terms)
+        self.idf = {
+            term: math.log(1 + (total - count + 0.5) / (count + 0.5))
+            for term, count in document_frequency.items()
+        }
+    
+    def scores(self, query):
+        """BM25 score of every chunk for the query"""
+        query_terms = set(tokenize(query))
+        scores = []
+        for terms, length in zip(self.terms, self.lengths):
+            score = 0.0
+            for term in query_terms:
+                frequency = terms.get(term)
+                if frequency:
+                    norm = self.k1 * (1 - self.b + self.b * length / (self.average_length or 1))
+                    score += self.idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+            scores.append(score)
+        return scores
+    
+    def rank(self, query):
+        """Chunk indices, best match first (document order breaks ties)"""
+        scores = self.scores(query)
+        return sorted(range(len(scores)), key=lambda idx: (-scores[idx], idx))
+
+
+class DocumentRetriever:
+    """Picks the parts of a long document that matter for a question.
+    
+    Documents that fit budget_tokens are passed through whole. Longer ones are
+    split into chunks of about chunk_tokens, ranked against the question with
+    BM25, and the best chunks that fit the budget are returned in document
+    order, labelled with their page. Indexes are cached by document content,
+    so follow-up questions about the same document skip chunking.
+    """
+    
+    def __init__(self, budget_tokens=1500, chunk_tokens=200, cache_entries=8):
+        self.budget_tokens = budget_tokens
+        self.chunk_tokens = chunk_tokens
+        self.indexes = TTLCache(max_entries=cache_entries, ttl=60 * 60)
+    
+    def select(self, question, text, budget_tokens=None):
+        """The document, or its most relevant excerpts if it exceeds the budget"""
+        budget_tokens = budget_tokens or self.budget_tokens
+        if estimate_tokens(text) <= budget_tokens:
+            return text
+        
+        chunks, index = self._index(text)
+        chosen = []
+        used = 0
+        for idx in index.rank(question):
+            cost = estimate_tokens(chunks[idx]['text'])
+            if used + cost > budget_tokens:
+                continue
+            chosen.append(idx)
+            used += cost
+        
+        excerpts = []
+        for idx in sorted(chosen):
+            chunk = chunks[idx]
+            label = f"[Page {chunk['page']}] " if chunk['page'] else ''
+            excerpts.append(f"{label}{chunk['text']}")
+        
+        header = f"(Excerpts most relevant to the question: {len(chosen)} of {len(chunks)} sections)"
+        return header + "\n\n" + "\n...\n".join(excerpts)
+    
+    def chunk(self, text):
+        """Split text into chunks of about chunk_tokens, tracking the page each comes from"""
+        max_chars = self.chunk_tokens * 4
+        chunks = []
+        lines = []
+        size = 0
+        page = None
+        chunk_page = None
+        
+        for line in self._lines(text, max_chars):
+            marker = PAGE_MARKER.match(line.strip())
+            if marker:
+                # Chunks never span pages, so each excerpt's page label is exact
+                if lines:
+                    chunks.append({'text': '\n'.join(lines).strip(), 'page': chunk_page})
+                    lines, size = [], 0
+                page = int(marker.group(1))
+                continue
+            
+            if lines and size + len(line) > max_chars:
+                chunks.append({'text': '\n'.join(lines).strip(), 'page': chunk_page})
+                lines, size = [], 0
+            if not lines:
+                chunk_page = page
+            lines.append(line)
+            size += len(line) + 1
+        
+        if lines:
+            chunks.append({'text': '\n'.join(lines).strip(), 'page': chunk_page})
+        return [chunk for chunk in chunks if chunk['text']]
+    
+    def _lines(self, text, max_chars):
+        """Lines of text, with very long ones (e.g. PDFs extracted without line breaks) split on words"""
+        for line in text.splitlines():
+            while len(line) > max_chars:
+                cut = line.rfind(' ', 0, max_chars)
+                if cut <= 0:
+                    cut = max_chars
+                yield line[:cut]
+                line = line[cut:].lstrip()
+            yield line
+    
+    def _index(self, text):
+        key = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        cached = self.indexes.get(key)
+        if cached is not None:
+            return cached
+        
+        chunks = self.chunk(text)
+        cached = (chunks, BM25Index([chunk['text'] for chunk in chunks]))
+        self.indexes.set(key, cached)
+        return cached
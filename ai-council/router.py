@@ -0,0 +1,168 @@
+import re
+
+# How much council each tier convenes: ministers=None means all of them. small_models moves the
+# convened advisors onto the smallest model the council uses, overriding the models people picked,
+# so it is off unless asked for
+TIERS = {
+    'simple': {'ministers': 1, 'small_models': False},
+    'moderate': {'ministers': 3, 'small_models': False},
+    'complex': {'ministers': None, 'small_models': False}
+}
+
+COMPLEX_WORDS = re.compile(
+    r'\b(compare|comparison|versus|vs|trade-?offs?|pros and cons|strategy|strategic|implications?|design|'
+    r'architecture|evaluate|assess|risks?|plan|should|recommend|why|ethic\w*|long-term|impact)\b',
+    re.IGNORECASE
+)
+
+SIMPLE_START = re.compile(
+    r"^\s*(hi|hello|hey|thanks|thank you|what is|what's|who is|who was|when is|when was|when did|where is|"
+    r"define|how many|how much is|translate|spell|convert)\b",
+    re.IGNORECASE
+)
+
+CURRENT_WORDS = re.compile(
+    r'\b(latest|today|tonight|yesterday|this week|news|current(ly)?|right now|price of|weather|score|'
+    r'recent(ly)?|20\d\d)\b',
+    re.IGNORECASE
+)
+
+DOCUMENT_REFERENCE = re.compile(r'\.(?:pdf|docx?|txt)\b', re.IGNORECASE)
+
+
+class QuestionRouter:
+    """Decides how much council a question needs before it is convened.
+    
+    Cheap heuristics (length, wording, several questions, attached documents)
+    score the question into a tier from TIERS. When the score lands in the
+    uncertain middle band and a classifier is given (per call or to the
+    router), classifier(question) (a small local model) settles it by returning 'simple', 'moderate' or
+    'complex'. Simple questions go to fewer ministers (on the smallest model
+    the council already uses, if the tier has small_models); complex ones
+    get the full council.
+    """
+    
+    def __init__(self, tiers=None, classifier=None, simple_at_most=0, complex_from=3):
+        self.tiers = {tier: dict(settings) for tier, settings in TIERS.items()}
+        for tier, settings in (tiers or {}).items():
+            self.tiers.setdefault(tier, {}).update(settings)
+        self.classifier = classifier
+        self.simple_at_most = simple_at_most
+        self.complex_from = complex_from
+    
+    def classify(self, question, enabled_tools=None, classifier=None):
+        """(tier, score, reasons, source) for a question"""
+        enabled_tools = enabled_tools or {}
+        classifier = classifier or self.classifier
+        words = len(question.split())
+        score = 1
+        reasons = []
+        
+        if words < 8:
+            score -= 1
+            reasons.append('short question')
+        elif words > 40:
+            score += 2
+            reasons.append('long question')
+        elif words > 20:
+            score += 1
+            reasons.append('detailed question')
+        
+        if SIMPLE_START.match(question):
+            score -= 2
+            reasons.append('lookup or small talk')
+        
+        complex_terms = {match.lower() for match in COMPLEX_WORDS.findall(question)}
+        if complex_terms:
+            score += min(3, len(complex_terms))
+            reasons.append(f"asks for {', '.join(sorted(complex_terms))}")
+        
+        if question.count('?') > 1:
+            score += 1
+            reasons.append('several questions')
+        
+        if enabled_tools.get('document_reading') and DOCUMENT_REFERENCE.search(question):
+            score += 2
+            reasons.append('document analysis')
+        
+        if score <= self.simple_at_most:
+            return 'simple', score, reasons, 'heuristics'
+        if score >= self.complex_from:
+            return 'complex', score, reasons, 'heuristics'
+        
+        if classifier:
+            try:
+                tier = classifier(question)
+                if tier in self.tiers:
+                    return tier, score, reasons, 'model'
+            except Exception as e:
+                print(f"Question classifier failed, using heuristics: {e}")
+        return 'moderate', score, reasons, 'heuristics'
+    
+    def route(self, question, advisors, mode='normal', enabled_tools=None, model_sizes=None, classifier=None):
+        """The routing decision for a question.
+        
+        mode='auto' also picks the mode: questions about current events go to
+        web search (or deep research when complex), everything else to normal
+        mode. Only normal mode changes the council. model_sizes maps model
+        names to bytes and drives the estimated saving: a call's cost is taken
+        to be proportional to its model's size. classifier overrides the
+        router's own for this question.
+        """
+        tier, score, reasons, source = self.classify(question, enabled_tools, classifier)
+        settings = self.tiers[tier]
+        
+        if mode == 'auto':
+            if CURRENT_WORDS.search(question):
+                mode = 'deep_research' if tier == 'complex' else 'web_search'
+                reasons = reasons + ['needs current information']
+            else:
+                mode = 'normal'
+        
+        decision = {
+            'mode': mode,
+            'tier': tier,
+            'score': score,
+            'reasons': reasons,
+            'source': source,
+            'advisors': self._convened(advisors, range(len(advisors))),
+            'estimated_saving': 0.0
+        }
+        if mode != 'normal' or len(advisors) < 3:
+            return decision
+        
+        # Advisors are tracked by their place in the council, since several may share a name
+        ministers = list(range(len(advisors) - 1))
+        keep = settings.get('ministers')
+        indexes = (ministers[:keep] if keep else ministers) + [len(advisors) - 1]
+        convened = [advisors[idx] for idx in indexes]
+        
+        model_sizes = model_sizes or {}
+        if settings.get('small_models'):
+            # Only models already assigned to advisors are candidates, so they're known to chat
+            sized = [advisor['model'] for advisor in advisors if model_sizes.get(advisor['model'])]
+            if sized:
+                smallest = min(sized, key=lambda model: model_sizes[model])
+                convened = [dict(advisor, model=smallest) for advisor in convened]
+        
+        decision['advisors'] = self._convened(convened, indexes)
+        full_cost = self._cost(advisors, model_sizes)
+        decision['estimated_saving'] = round(1 - self._cost(convened, model_sizes) / full_cost, 2) if full_cost else 0.0
+        return decision
+    
+    def apply(self, advisors, decision):
+        """The advisors a decision convenes, in council order"""
+        return [dict(advisors[entry['index']], model=entry['model']) for entry in decision['advisors']]
+    
+    def _convened(self, advisors, indexes):
+        """Decision entries for advisors at the given council indexes"""
+        return [
+            {'index': idx, 'name': advisor['name'], 'model': advisor['model']}
+            for idx, advisor in zip(indexes, advisors)
+        ]
+    
+    def _cost(self, advisors, model_sizes):
+        # Models of unknown size count as the median known size
+        known = sorted(size for size in model_sizes.values() if size)
+        default = known[len(known) // 2] if known else 1
+        return sum(model_sizes.get(advisor['model']) or default for advisor in advisors)
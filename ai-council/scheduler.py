@@ -0,0 +1,260 @@
+from cancellation import CancelToken, CouncilCancelled
+from metrics import metrics as default_metrics
+import asyncio
+import inspect
+import itertools
+import threading
+import time
+
+# Lower runs first: a single-model web search is cheap, deep research keeps every model busy
+MODE_PRIORITIES = {
+    'web_search': 0,
+    'normal': 1,
+    'deep_research': 2,
+    # Headless batch steps (POST /batch) give way to anyone waiting at the page
+    'batch': 3
+}
+
+
+# How many users' latest admissions are remembered for round-robin
+SERVED_MEMORY = 1024
+
+
+def admission_order(waiting, running_users, now, aging_seconds=60, last_served=None):
+    """Waiting jobs (in arrival order) sorted into the order they will be admitted.
+    
+    Jobs need user, priority and submitted_at. The key is the mode priority
+    less one level per aging_seconds waited, then the job's rank among its
+    user's jobs (running_users lists the user of every running job, so a
+    user's first waiting job goes before anyone's second), then the users
+    served longest ago (last_served maps users to an increasing number for
+    their latest admission), then arrival.
+    """
+    last_served = last_served or {}
+    user_rank = {}
+    for user in running_users:
+        user_rank[user] = user_rank.get(user, 0) + 1
+    
+    keyed = []
+    for arrival, job in enumerate(waiting):
+        rank = user_rank.get(job.user, 0)
+        user_rank[job.user] = rank + 1
+        aged = int((now - job.submitted_at) / aging_seconds) if aging_seconds else 0
+        keyed.append(((max(0, job.priority - aged), rank, last_served.get(job.user, 0), arrival), job))
+    
+    return [job for _, job in sorted(keyed, key=lambda item: item[0])]
+
+
+class CouncilJob:
+    """One council request, waiting or running"""
+    
+    def __init__(self, job_id, user, mode, priority, run, on_position=None, cancel=None):
+        self.job_id = job_id
+        self.user = user
+        self.mode = mode
+        self.priority = priority
+        self.run = run
+        self.on_position = on_position
+        self.cancel = cancel or CancelToken()
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.position = None
+
+
+class CouncilScheduler:
+    """Admission control for council runs.
+    
+    At most max_running councils run at once; the rest wait. Waiting jobs are
+    ordered by mode priority, then round-robin between users (each user's
+    first waiting job, counting the ones already running, goes before anyone's
+    second, and users served longest ago go first), then by arrival. A job gains one priority level per aging_seconds
+    waited so cheap requests can't starve expensive ones forever. Waiting jobs
+    are told their position whenever it changes. Cancelling a job drops it
+    from the queue, or cancels its token if it is already running.
+    
+    Jobs run on a thread each, except coroutine functions when loop is set:
+    those are started on that event loop and finish through a done callback,
+    so a running async council holds no thread.
+    """
+    
+    def __init__(self, max_running=2, mode_priorities=None, aging_seconds=60, max_queued_per_user=3, metrics=None,
+                 loop=None):
+        self.max_running = max(1, max_running)
+        self.mode_priorities = dict(MODE_PRIORITIES, **(mode_priorities or {}))
+        self.aging_seconds = aging_seconds
+        self.max_queued_per_user = max_queued_per_user
+        self.metrics = metrics or default_metrics
+        self.loop = loop
+        self._waiting = []
+        self._running = {}
+        self._served = {}
+        self._serial = itertools.count(1)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+    
+    def submit(self, run, user, mode='normal', on_position=None, cancel=None):
+        """Queue run() for execution on a council thread (or on the loop, for coroutine functions).
+        
+        on_position(position, queue_length) is called while the job waits,
+        each time its 1-based place in the queue changes. cancel is the
+        CancelToken run() passes to its council. Raises ValueError when the
+        user already has max_queued_per_user jobs waiting.
+        """
+        with self._lock:
+            queued = sum(1 for job in self._waiting if job.user == user)
+            if self.max_queued_per_user and queued >= self.max_queued_per_user:
+                raise ValueError(f'Too many queued requests ({queued}); wait for one to finish')
+            job = self._add(run, user, mode, on_position, cancel)
+        
+        self._dispatch()
+        return job
+    
+    def call(self, run, user, mode='batch', cancel=None):
+        """Queue run() like submit, wait for it to finish and return its result (or raise its error).
+        
+        For the server's own work, such as batch steps: it waits for a council
+        slot like any job but isn't held to max_queued_per_user. Raises
+        CouncilCancelled if the job is cancelled before it starts.
+        """
+        outcome = {}
+        done = threading.Event()
+        
+        def run_and_keep():
+            try:
+                outcome['result'] = run()
+            except BaseException as e:
+                outcome['error'] = e
+            finally:
+                done.set()
+        
+        with self._lock:
+            job = self._add(run_and_keep, user, mode, None, cancel)
+        self._dispatch()
+        
+        # A job cancelled while waiting is dropped without ever running
+        while not done.wait(0.5):
+            if job.cancel.cancelled and job.started_at is None:
+                raise CouncilCancelled(job.cancel.reason)
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome.get('result')
+    
+    def _add(self, run, user, mode, on_position, cancel):
+        """Append a new waiting job (caller holds the lock)"""
+        job = CouncilJob(next(self._ids), user, mode, self.mode_priorities.get(mode, 1), run, on_position, cancel)
+        self._waiting.append(job)
+        return job
+    
+    def cancel(self, job_id, reason='Cancelled'):
+        """Drop a waiting job or cancel a running one; returns False if the job is unknown or finished"""
+        return bool(self._cancel_where(lambda job: job.job_id == job_id, reason)['total'])
+    
+    def cancel_user(self, user, reason='Cancelled'):
+        """Drop a user's waiting jobs and cancel their running ones (e.g. when their socket disconnects).
+        
+        Returns how many jobs were {'waiting', 'running', 'total'}.
+        """
+        return self._cancel_where(lambda job: job.user == user, reason)
+    
+    def _cancel_where(self, predicate, reason):
+        with self._lock:
+            dropped = [job for job in self._waiting if predicate(job)]
+            self._waiting = [job for job in self._waiting if not predicate(job)]
+            running = [job for job in self._running.values() if predicate(job)]
+        
+        # Running jobs stop at their next check and free their slot when run() returns
+        for job in dropped + running:
+            job.cancel.cancel(reason)
+        if dropped:
+            self._dispatch()
+        return {'waiting': len(dropped), 'running': len(running), 'total': len(dropped) + len(running)}
+    
+    def status(self):
+        """Running and waiting jobs, in the order the waiting ones will start"""
+        with self._lock:
+            now = time.time()
+            return {
+                'max_running': self.max_running,
+                'running': [
+                    {'job_id': job.job_id, 'user': job.user, 'mode': job.mode, 'seconds': round(now - job.started_at, 1)}
+                    for job in self._running.values()
+                ],
+                'waiting': [
+                    {'job_id': job.job_id, 'user': job.user, 'mode': job.mode, 'seconds': round(now - job.submitted_at, 1)}
+                    for job in self._order(now)
+                ]
+            }
+    
+    def _order(self, now):
+        """Waiting jobs in the order they will be admitted (caller holds the lock)"""
+        return admission_order(
+            sorted(self._waiting, key=lambda job: job.job_id),
+            [job.user for job in self._running.values()],
+            now,
+            self.aging_seconds,
+            self._served
+        )
+    
+    def _dispatch(self):
+        """Start jobs while there is room, then tell waiting jobs their new positions"""
+        notify = []
+        started = []
+        with self._lock:
+            now = time.time()
+            while self._waiting and len(self._running) < self.max_running:
+                job = self._order(now)[0]
+                self._waiting.remove(job)
+                job.started_at = now
+                self._running[job.job_id] = job
+                # Most recently served last, so the oldest entries are the ones forgotten
+                self._served.pop(job.user, None)
+                self._served[job.user] = next(self._serial)
+                if len(self._served) > SERVED_MEMORY:
+                    del self._served[next(iter(self._served))]
+                self.metrics.observe('council_queue_wait_seconds', now - job.submitted_at, mode=job.mode)
+                started.append(job)
+            
+            order = self._order(now)
+            for position, job in enumerate(order, 1):
+                if job.position != position:
+                    job.position = position
+                    if job.on_position:
+                        notify.append((job.on_position, position))
+            
+            self.metrics.set('council_queue_length', len(self._waiting))
+            self.metrics.set('council_running', len(self._running))
+            queue_length = len(order)
+        
+        # Started outside the lock: a done callback can fire right away and re-enter _dispatch
+        for job in started:
+            if self.loop is not None and inspect.iscoroutinefunction(job.run):
+                future = asyncio.run_coroutine_threadsafe(job.run(), self.loop)
+                future.add_done_callback(lambda future, job=job: self._finished(job, future))
+            else:
+                threading.Thread(target=self._run, args=(job,), name=f'council-{job.job_id}', daemon=True).start()
+        
+        for on_position, position in notify:
+            try:
+                on_position(position, queue_length)
+            except Exception as e:
+                print(f"Error reporting queue position: {e}")
+    
+    def _run(self, job):
+        try:
+            job.run()
+        except Exception as e:
+            print(f"Council job {job.job_id} failed: {e}")
+        finally:
+            self._release(job)
+    
+    def _finished(self, job, future):
+        """Done callback of a job running on the loop"""
+        if not future.cancelled() and isinstance(future.exception(), Exception):
+            print(f"Council job {job.job_id} failed: {future.exception()}")
+        self._release(job)
+    
+    def _release(self, job):
+        """Free a finished job's slot and start whatever can run next"""
+        with self._lock:
+            self._running.pop(job.job_id, None)
+        self._dispatch()
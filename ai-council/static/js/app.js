@@ -2,6 +2,7 @@ const socket = io();
 
 // DOM Elements
 const sendBtn = document.getElementById('send-btn');
+const stopBtn = document.getElementById('stop-btn');
 const progress = document.getElementById('progress');
 const messagesDiv = document.getElementById('messages');
 const chatContainer = document.getElementById('chat-container');
@@ -112,9 +113,12 @@ const rolePresets = {
 // State
 let currentMode = 'normal';
 let advisorElements = {};
+let advisorStreams = {};
+let toolProgressElements = {};
 let availableModels = [];
 let availableOllamaModels = [];
 let uploadedFile = null;
+let pendingUpload = null;
 let menuOpen = false;
 let draggedIndex = null;
 let settings = {
@@ -145,6 +149,11 @@ socket.on('connect', () => {
     socket.emit('get_models');
     socket.emit('get_default_settings');
     loadSettings();
+    
+    // Pick an interrupted upload back up where the server left off
+    if (pendingUpload) {
+        uploadFileToServer(pendingUpload.file, pendingUpload.uploadId);
+    }
 });
 
 socket.on('models_list', (data) => {
@@ -490,19 +499,66 @@ function handleFileSelect(files) {
     }
 }
 
-function uploadFileToServer(file) {
-    const reader = new FileReader();
-    reader.onload = function(e) {
-        socket.emit('upload_file', {
-            file_name: file.name,
-            file_data: e.target.result
+// Files are sent as binary chunks, one at a time; each chunk waits for the server's ack
+function uploadFileToServer(file, uploadId = null, retries = 0) {
+    pendingUpload = { file: file, uploadId: uploadId, retries: retries };
+    progress.textContent = 'Uploading file...';
+    
+    socket.emit('upload_start', {
+        file_name: file.name,
+        size: file.size,
+        upload_id: uploadId
+    }, (ready) => {
+        if (!ready.success) {
+            pendingUpload = null;
+            progress.textContent = 'File upload failed: ' + ready.error;
+            return;
+        }
+        pendingUpload.uploadId = ready.upload_id;
+        sendUploadChunk(file, ready.upload_id, ready.offset, ready.chunk_size);
+    });
+}
+
+function sendUploadChunk(file, uploadId, offset, chunkSize) {
+    if (!pendingUpload || pendingUpload.uploadId !== uploadId) return;
+    
+    if (offset >= file.size) {
+        socket.emit('upload_finish', { upload_id: uploadId });
+        return;
+    }
+    
+    file.slice(offset, offset + chunkSize).arrayBuffer().then((data) => {
+        socket.emit('upload_chunk', {
+            upload_id: uploadId,
+            offset: offset,
+            data: data
+        }, (ack) => {
+            if (!ack.success) {
+                pendingUpload = null;
+                progress.textContent = 'File upload failed: ' + ack.error;
+                return;
+            }
+            progress.textContent = `Uploading file... ${Math.floor(ack.received / file.size * 100)}%`;
+            sendUploadChunk(file, uploadId, ack.received, chunkSize);
         });
-        progress.textContent = 'Uploading file...';
-    };
-    reader.readAsDataURL(file);
+    });
 }
 
+// How many times a failed upload_finish is retried before giving up
+const MAX_UPLOAD_RETRIES = 3;
+
 socket.on('file_uploaded', (data) => {
+    // The server kept the partial file: resume it (a no-op resend if every byte arrived) and finish again
+    if (!data.success && data.retryable && pendingUpload && pendingUpload.retries < MAX_UPLOAD_RETRIES) {
+        const retry = pendingUpload;
+        setTimeout(() => {
+            // Unless the file was removed meanwhile
+            if (pendingUpload === retry) uploadFileToServer(retry.file, data.upload_id, retry.retries + 1);
+        }, 1000 * (retry.retries + 1));
+        return;
+    }
+    
+    pendingUpload = null;
     if (data.success) {
         uploadedFile = data.file_path;
         fileNameSpan.textContent = data.file_name;
@@ -516,6 +572,7 @@ socket.on('file_uploaded', (data) => {
 
 function removeFile() {
     uploadedFile = null;
+    pendingUpload = null;
     fileAttachment.classList.remove('visible');
     fileInput.value = '';
 }
@@ -553,6 +610,24 @@ function handleKeyPress(event) {
     }
 }
 
+// Follow-up questions share a conversation id, so the council remembers the earlier turns.
+// The server issues the id when the first question of a conversation is sent.
+let conversationId = null;
+
+// Start over: the next question gets no earlier context
+function newConversation() {
+    if (sendBtn?.disabled) cancelCouncil();
+    conversationId = null;
+    messagesDiv.innerHTML = `
+        <div class="empty-state">
+            <div class="empty-icon">💬</div>
+            <div class="empty-text">New conversation</div>
+            <div class="empty-subtext">Earlier questions won't be used as context</div>
+        </div>
+    `;
+    progress.textContent = '';
+}
+
 // Main chat function
 // Main chat function
 function conveneCouncil() {
@@ -575,20 +650,30 @@ function conveneCouncil() {
     const data = {
         question: question,
         mode: currentMode,
-        uploaded_file: uploadedFile || null
+        uploaded_file: uploadedFile || null,
+        stream: true,
+        use_cache: document.getElementById('toggle-cache')?.checked || false,
+        route: document.getElementById('toggle-routing')?.checked ?? true,
+        conversation_id: conversationId,
+        new_conversation: !conversationId
     };
     
     if (currentMode === 'web_search') {
         data.selected_model = modelSelect?.value || '';
         console.log('Web search mode, model:', data.selected_model);
-    } else if (currentMode === 'normal') {
+    } else if (currentMode === 'normal' || currentMode === 'auto') {
         const docToggle = document.getElementById('toggle-document');
         const calcToggle = document.getElementById('toggle-calculator');
+        const searchToggle = document.getElementById('toggle-websearch');
+        const pipelinedToggle = document.getElementById('toggle-pipelined');
         
         data.tools = {
             document_reading: docToggle?.checked || false,
-            calculator: calcToggle?.checked || false
+            calculator: calcToggle?.checked || false,
+            web_search: searchToggle?.checked || false
         };
+        const adaptiveToggle = document.getElementById('toggle-adaptive');
+        data.deliberation = pipelinedToggle?.checked ? 'pipelined' : (adaptiveToggle?.checked ? 'adaptive' : 'chain');
         console.log('Normal mode, tools:', data.tools);
     }
     
@@ -596,12 +681,14 @@ function conveneCouncil() {
     
     // Disable send button
     if (sendBtn) sendBtn.disabled = true;
+    if (stopBtn) stopBtn.style.display = 'block';
     if (progress) progress.textContent = currentMode === 'deep_research' ? 
         'Starting deep research...' : 'Processing...';
     
     // Clear previous messages
     if (messagesDiv) messagesDiv.innerHTML = '';
     advisorElements = {};
+    advisorStreams = {};
     
     // Emit the event
     try {
@@ -611,6 +698,7 @@ function conveneCouncil() {
         console.error('Error emitting event:', error);
         if (progress) progress.textContent = 'Error: ' + error.message;
         if (sendBtn) sendBtn.disabled = false;
+        if (stopBtn) stopBtn.style.display = 'none';
         return;
     }
     
@@ -630,6 +718,30 @@ function conveneCouncil() {
 
 
 // Socket events
+// Long-running tools (e.g. reading a large PDF) update one line instead of adding many
+function showToolProgress(data) {
+    let toolDiv = toolProgressElements[data.task];
+    if (!toolDiv) {
+        toolDiv = document.createElement('div');
+        toolDiv.className = 'tool-info-message';
+        toolDiv.innerHTML = `
+            <div class="tool-info-content">
+                <span>🛠️</span>
+                <span class="tool-progress-text"></span>
+            </div>
+        `;
+        messagesDiv.appendChild(toolDiv);
+        toolProgressElements[data.task] = toolDiv;
+        chatContainer.scrollTop = chatContainer.scrollHeight;
+    }
+    
+    toolDiv.querySelector('.tool-progress-text').textContent = data.content;
+    
+    if (data.progress.done >= data.progress.total) {
+        delete toolProgressElements[data.task];
+    }
+}
+
 socket.on('council_message', (data) => {
     if (data.status === 'tool_info') {
         const toolDiv = document.createElement('div');
@@ -645,65 +757,197 @@ socket.on('council_message', (data) => {
         return;
     }
     
+    if (data.status === 'progress') {
+        showToolProgress(data);
+        return;
+    }
+    
+    if (data.status === 'delta') {
+        appendAdvisorDelta(data);
+        return;
+    }
+    
     if (!advisorElements[data.name]) {
-        const msgDiv = document.createElement('div');
-        msgDiv.className = 'advisor-message';
-        msgDiv.id = `advisor-${data.name}`;
-        
-        const initial = data.name.charAt(0).toUpperCase();
-        
-        // Render content as markdown
         const isThinking = data.status === 'thinking';
-        const renderedContent = isThinking ? escapeHtml(data.content) : renderMarkdown(data.content);
         
-        msgDiv.innerHTML = `
-            <div class="advisor-content">
-                <div class="advisor-avatar">${initial}</div>
-                <div class="advisor-body">
-                    <div class="advisor-header">
-                        <span class="advisor-name">${escapeHtml(data.name)}</span>
-                        <span class="advisor-role">${escapeHtml(data.role)}</span>
-                    </div>
-                    <div class="advisor-response ${isThinking ? 'thinking' : ''}" id="response-${data.name}">
-                        ${renderedContent}
-                    </div>
-                </div>
-            </div>
-        `;
-        
-        messagesDiv.appendChild(msgDiv);
-        advisorElements[data.name] = msgDiv;
+        // Render content as markdown
+        const renderedContent = isThinking || data.status === 'skipped' ? escapeHtml(data.content) : renderMarkdown(data.content);
+        createAdvisorMessage(data, renderedContent, isThinking);
+        if (data.status === 'skipped') {
+            document.getElementById(`response-${data.name}`).className = 'advisor-response skipped';
+        }
     } else {
         const responseDiv = document.getElementById(`response-${data.name}`);
         
-        if (data.status === 'thinking') {
+        if (data.status === 'thinking' || data.status === 'skipped') {
             responseDiv.textContent = data.content;
-            responseDiv.className = 'advisor-response thinking';
+            responseDiv.className = `advisor-response ${data.status}`;
         } else {
             responseDiv.innerHTML = renderMarkdown(data.content);
             responseDiv.className = 'advisor-response';
         }
     }
     
+    // Final content replaces whatever was streamed
+    delete advisorStreams[data.name];
+    
+    if (data.cached) {
+        markCachedResponse(data.name);
+    }
+    
     chatContainer.scrollTop = chatContainer.scrollHeight;
 });
 
 
+function createAdvisorMessage(data, renderedContent, isThinking) {
+    const msgDiv = document.createElement('div');
+    msgDiv.className = 'advisor-message';
+    msgDiv.id = `advisor-${data.name}`;
+    
+    const initial = data.name.charAt(0).toUpperCase();
+    
+    msgDiv.innerHTML = `
+        <div class="advisor-content">
+            <div class="advisor-avatar">${initial}</div>
+            <div class="advisor-body">
+                <div class="advisor-header">
+                    <span class="advisor-name">${escapeHtml(data.name)}</span>
+                    <span class="advisor-role">${escapeHtml(data.role)}</span>
+                </div>
+                <div class="advisor-response ${isThinking ? 'thinking' : ''}" id="response-${data.name}">
+                    ${renderedContent}
+                </div>
+            </div>
+        </div>
+    `;
+    
+    messagesDiv.appendChild(msgDiv);
+    advisorElements[data.name] = msgDiv;
+}
+
+function markCachedResponse(name) {
+    const header = advisorElements[name]?.querySelector('.advisor-header');
+    if (header && !header.querySelector('.advisor-badge')) {
+        header.insertAdjacentHTML('beforeend', '<span class="advisor-badge" title="Answer reused from cache">cached</span>');
+    }
+}
+
+// Streaming: buffer token deltas per advisor and re-render at most once per frame
+function appendAdvisorDelta(data) {
+    if (!advisorElements[data.name]) {
+        createAdvisorMessage(data, '', false);
+    }
+    
+    let stream = advisorStreams[data.name];
+    if (!stream) {
+        stream = advisorStreams[data.name] = { text: '', scheduled: false };
+    }
+    stream.text += data.content;
+    
+    if (stream.scheduled) return;
+    stream.scheduled = true;
+    
+    requestAnimationFrame(() => {
+        stream.scheduled = false;
+        // Skip if the final 'complete' message arrived in the meantime
+        if (advisorStreams[data.name] !== stream) return;
+        
+        const responseDiv = document.getElementById(`response-${data.name}`);
+        responseDiv.innerHTML = renderMarkdown(stream.text);
+        responseDiv.className = 'advisor-response streaming';
+        chatContainer.scrollTop = chatContainer.scrollHeight;
+    });
+}
+
+socket.on('council_queued', (data) => {
+    progress.textContent = `Waiting in queue: position ${data.position} of ${data.queue_length}...`;
+});
+
+socket.on('conversation_started', (data) => {
+    conversationId = data.conversation_id;
+});
+
+socket.on('council_started', (data) => {
+    // Tasks a cancelled or failed run never finished would otherwise keep updating its old lines
+    toolProgressElements = {};
+    
+    if (progress.textContent.startsWith('Waiting in queue')) {
+        progress.textContent = data.mode === 'deep_research' ? 'Starting deep research...' : 'Processing...';
+    }
+    
+    showRouting(data.routing);
+});
+
+socket.on('council_plan', (plan) => {
+    if (!plan || !plan.loads) return;
+    
+    const loading = plan.steps.filter(step => step.load).map(step => step.model);
+    const toolDiv = document.createElement('div');
+    toolDiv.className = 'tool-info-message';
+    toolDiv.innerHTML = `
+        <div class="tool-info-content">
+            <span>⏳</span>
+            <span>${escapeHtml(`This run loads ${plan.loads} model${plan.loads === 1 ? '' : 's'}: ${loading.join(', ')}`)}</span>
+        </div>
+    `;
+    messagesDiv.appendChild(toolDiv);
+});
+
 socket.on('council_complete', (data) => {
     progress.textContent = '';
     const statusDiv = document.createElement('div');
     statusDiv.className = 'status-message';
-    statusDiv.textContent = '✓ Discussion complete';
+    statusDiv.textContent = data.turn > 1 ? `✓ Discussion complete (follow-up ${data.turn - 1})` : '✓ Discussion complete';
     messagesDiv.appendChild(statusDiv);
     sendBtn.disabled = false;
+    stopBtn.style.display = 'none';
     chatContainer.scrollTop = chatContainer.scrollHeight;
 });
 
 socket.on('council_error', (data) => {
     progress.textContent = 'Error: ' + data.error;
     sendBtn.disabled = false;
+    stopBtn.style.display = 'none';
+});
+
+socket.on('council_cancelled', (data) => {
+    progress.textContent = '';
+    const statusDiv = document.createElement('div');
+    statusDiv.className = 'status-message';
+    statusDiv.textContent = '■ Discussion stopped';
+    messagesDiv.appendChild(statusDiv);
+    sendBtn.disabled = false;
+    stopBtn.style.display = 'none';
 });
 
+// Tell the user when the router picked the mode or convened a smaller council
+function showRouting(routing) {
+    if (!routing || (routing.estimated_saving <= 0 && currentMode !== 'auto')) return;
+    
+    const advisors = routing.advisors;
+    const models = [...new Set(advisors.map(advisor => advisor.model))];
+    let text = `${routing.tier[0].toUpperCase()}${routing.tier.slice(1)} question`;
+    if (currentMode === 'auto') text += ` → ${routing.mode.replace('_', ' ')} mode`;
+    if (routing.mode === 'normal') text += `: convening ${advisors.length} advisor${advisors.length === 1 ? '' : 's'} on ${models.join(', ')}`;
+    if (routing.estimated_saving > 0) text += ` (~${Math.round(routing.estimated_saving * 100)}% less compute)`;
+    
+    const toolDiv = document.createElement('div');
+    toolDiv.className = 'tool-info-message';
+    toolDiv.innerHTML = `
+        <div class="tool-info-content">
+            <span>🧭</span>
+            <span>${escapeHtml(text)}</span>
+        </div>
+    `;
+    messagesDiv.appendChild(toolDiv);
+}
+
+// Stop the running discussion; the server stops generating right away
+function cancelCouncil() {
+    socket.emit('cancel_council');
+    progress.textContent = 'Stopping...';
+}
+
 function escapeHtml(text) {
     const div = document.createElement('div');
     div.textContent = text;
@@ -1,16 +1,56 @@
 from ddgs import DDGS
+from cache import TTLCache
+from extraction_cache import ExtractionCache
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
 import PyPDF2
+import threading
+import atexit
 import os
 
+def _extract_pdf_pages(file_path, start, stop):
+    """Text of pages [start, stop) of a PDF; runs in a worker process for large documents"""
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [pdf_reader.pages[page_num].extract_text() or '' for page_num in range(start, stop)]
+
 class CouncilTools:
     """Tools available to the AI Council"""
     
+    # Raw search results keyed by normalized query, shared by every council.
+    # Replace with a db-backed TTLCache to keep results across restarts.
+    search_cache = TTLCache(max_entries=256, ttl=15 * 60, table='search_cache')
+    
+    # Fetch at least this many results so later, larger requests hit the cache too
+    search_prefetch = 5
+    
+    # Class with DDGS's text(query, max_results) method; the benchmarks swap in a stub
+    search_backend = DDGS
+    
+    _inflight_searches = {}
+    _inflight_lock = threading.Lock()
+    
+    # Extracted document text keyed by file content hash, so follow-up questions skip parsing.
+    # Bump extractor_version whenever extraction output changes to retire old entries.
+    extraction_cache = ExtractionCache()
+    extractor_version = 2
+    
+    # PDFs with at least this many pages are extracted in batches across worker processes
+    pdf_parallel_threshold = 40
+    pdf_batch_size = 16
+    pdf_workers = os.cpu_count() or 1
+    
+    # One worker pool shared by every document, started on first use. Workers are
+    # spawned rather than forked, since forking a threaded server can copy held locks.
+    _pdf_executor = None
+    _pdf_executor_lock = threading.Lock()
+    
     @staticmethod
     def web_search(query, max_results=5):
         """Search the web using DuckDuckGo"""
         try:
-            ddgs = DDGS()
-            results = list(ddgs.text(query, max_results=max_results))
+            results = CouncilTools._cached_search(query, max_results)
             
             if not results:
                 return "No search results found."
@@ -28,33 +68,63 @@ class CouncilTools:
             return f"Search failed: {str(e)}"
     
     @staticmethod
-    def read_pdf(file_path):
+    def _normalize_query(query):
+        """Cache key for a search query: case and whitespace insensitive"""
+        return ' '.join(query.lower().split())
+    
+    @staticmethod
+    def _cached_search(query, max_results):
+        """Return raw search results, answering from the cache when possible.
+        
+        A cached result set also serves any request for fewer results, and
+        concurrent identical searches wait for the one already in flight
+        instead of querying DuckDuckGo again.
+        """
+        key = CouncilTools._normalize_query(query)
+        
+        while True:
+            entry = CouncilTools.search_cache.get(key)
+            if entry and (entry['max_results'] >= max_results or len(entry['results']) < entry['max_results']):
+                return entry['results'][:max_results]
+            
+            with CouncilTools._inflight_lock:
+                pending = CouncilTools._inflight_searches.get(key)
+                if pending is None:
+                    pending = CouncilTools._inflight_searches[key] = threading.Event()
+                    break
+            
+            # Another thread is running this search; reuse its results if they suffice
+            pending.wait(timeout=30)
+        
+        try:
+            fetch = max(max_results, CouncilTools.search_prefetch)
+            results = list(CouncilTools.search_backend().text(query, max_results=fetch))
+            if results:
+                CouncilTools.search_cache.set(key, {'max_results': fetch, 'results': results})
+            return results[:max_results]
+        finally:
+            with CouncilTools._inflight_lock:
+                CouncilTools._inflight_searches.pop(key, None)
+            pending.set()
+    
+    @staticmethod
+    def read_pdf(file_path, progress=None):
         """Extract text from a PDF file"""
         try:
             if not os.path.exists(file_path):
                 return f"Error: File not found at {file_path}"
             
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                
-                # Read all pages (limit to first 10 for brevity)
-                max_pages = min(10, len(pdf_reader.pages))
-                for page_num in range(max_pages):
-                    page = pdf_reader.pages[page_num]
-                    text += f"\n--- Page {page_num + 1} ---\n"
-                    text += page.extract_text()
-                
-                if len(pdf_reader.pages) > max_pages:
-                    text += f"\n\n(Truncated. Total pages: {len(pdf_reader.pages)})"
-                
-                return text if text.strip() else "No text could be extracted from the PDF."
+            text = CouncilTools.extract_document(file_path, progress)['text']
+            return text if text.strip() else "No text could be extracted from the PDF."
         except Exception as e:
             return f"Error reading PDF: {str(e)}"
     
     @staticmethod
-    def read_document(file_path):
-        """Read text from various document formats"""
+    def read_document(file_path, progress=None):
+        """Read text from various document formats.
+        
+        progress(done, total) is called as PDF pages are extracted.
+        """
         try:
             if not os.path.exists(file_path):
                 return f"Error: File not found at {file_path}"
@@ -62,16 +132,13 @@ class CouncilTools:
             _, ext = os.path.splitext(file_path)
             
             if ext.lower() == '.pdf':
-                return CouncilTools.read_pdf(file_path)
+                return CouncilTools.read_pdf(file_path, progress)
             elif ext.lower() == '.txt':
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    return content if content.strip() else "File is empty."
+                content = CouncilTools.extract_document(file_path)['text']
+                return content if content.strip() else "File is empty."
             elif ext.lower() in ['.doc', '.docx']:
                 try:
-                    import docx
-                    doc = docx.Document(file_path)
-                    text = '\n'.join([para.text for para in doc.paragraphs])
+                    text = CouncilTools.extract_document(file_path)['text']
                     return text if text.strip() else "Document is empty."
                 except ImportError:
                     return "Error: python-docx not installed. Run: pip install python-docx"
@@ -80,6 +147,126 @@ class CouncilTools:
         except Exception as e:
             return f"Error reading document: {str(e)}"
     
+    @staticmethod
+    def extract_document(file_path, progress=None):
+        """Text, page offsets and metadata of a document, cached by content hash"""
+        cache = CouncilTools.extraction_cache
+        key = f'{cache.file_hash(file_path)}-v{CouncilTools.extractor_version}'
+        
+        document = cache.get(key)
+        if document is None:
+            document = CouncilTools._extract(file_path, progress)
+            cache.set(key, document)
+        return document
+    
+    @staticmethod
+    def iter_pdf_pages(file_path):
+        """Yield (page_number, text, page_count) for every page of a PDF, in order.
+        
+        Large documents are split into batches of pages that worker processes
+        extract concurrently; pages are still yielded in order as batches finish.
+        """
+        with open(file_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            page_count = len(pdf_reader.pages)
+            workers = min(CouncilTools.pdf_workers, -(-page_count // CouncilTools.pdf_batch_size))
+            
+            if page_count < CouncilTools.pdf_parallel_threshold or workers < 2:
+                for page_num, page in enumerate(pdf_reader.pages, 1):
+                    yield page_num, page.extract_text() or '', page_count
+                return
+        
+        batches = [
+            (start, min(start + CouncilTools.pdf_batch_size, page_count))
+            for start in range(0, page_count, CouncilTools.pdf_batch_size)
+        ]
+        executor = CouncilTools._pdf_pool()
+        futures = [executor.submit(_extract_pdf_pages, file_path, start, stop) for start, stop in batches]
+        try:
+            for (start, _), future in zip(batches, futures):
+                try:
+                    texts = future.result()
+                except BrokenProcessPool:
+                    CouncilTools._discard_pdf_pool(executor)
+                    raise
+                for offset, text in enumerate(texts):
+                    yield start + offset + 1, text, page_count
+        finally:
+            # The pool outlives this document; drop only the batches it no longer needs
+            for future in futures:
+                future.cancel()
+    
+    @staticmethod
+    def _pdf_pool():
+        """The shared PDF worker pool, created on first use"""
+        with CouncilTools._pdf_executor_lock:
+            if CouncilTools._pdf_executor is None:
+                CouncilTools._pdf_executor = ProcessPoolExecutor(
+                    max_workers=CouncilTools.pdf_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return CouncilTools._pdf_executor
+    
+    @staticmethod
+    def _discard_pdf_pool(executor):
+        """Forget a pool whose workers died so the next document starts a fresh one"""
+        with CouncilTools._pdf_executor_lock:
+            if CouncilTools._pdf_executor is executor:
+                CouncilTools._pdf_executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    @staticmethod
+    def shutdown_pdf_pool():
+        """Stop the PDF worker processes; registered to run at exit"""
+        with CouncilTools._pdf_executor_lock:
+            executor, CouncilTools._pdf_executor = CouncilTools._pdf_executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    @staticmethod
+    def _extract(file_path, progress=None):
+        """Parse a PDF, TXT or DOCX file (raises on failure)"""
+        _, ext = os.path.splitext(file_path)
+        ext = ext.lower()
+        pages = []
+        
+        if ext == '.pdf':
+            page_count = 0
+            for page_num, text, page_count in CouncilTools.iter_pdf_pages(file_path):
+                pages.append(f"\n--- Page {page_num} ---\n{text}")
+                if progress:
+                    progress(page_num, page_count)
+        elif ext == '.txt':
+            with open(file_path, 'r', encoding='utf-8') as f:
+                pages.append(f.read())
+            page_count = 1
+        elif ext in ['.doc', '.docx']:
+            import docx
+            doc = docx.Document(file_path)
+            pages.append('\n'.join([para.text for para in doc.paragraphs]))
+            page_count = 1
+        else:
+            raise ValueError(f"Unsupported file format: {ext}")
+        
+        # Where each page starts in the extracted text
+        page_offsets = []
+        offset = 0
+        for page in pages:
+            page_offsets.append(offset)
+            offset += len(page)
+        
+        return {
+            'text': ''.join(pages),
+            'page_offsets': page_offsets,
+            'metadata': {
+                'file_name': os.path.basename(file_path),
+                'format': ext.lstrip('.'),
+                'page_count': page_count,
+                'extracted_pages': len(pages),
+                'extractor_version': CouncilTools.extractor_version
+            }
+        }
+    
     @staticmethod
     def calculate(expression):
         """Safely evaluate mathematical expressions"""
@@ -106,3 +293,6 @@ class CouncilTools:
             return f"{expression} = {result}"
         except Exception as e:
             return f"Calculation error: {str(e)}"
+
+
+atexit.register(CouncilTools.shutdown_pdf_pool)
@@ -0,0 +1,145 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+class UploadMismatch(ValueError):
+    """The bytes received don't match the file announced, so the upload can't be resumed"""
+
+
+class ChunkedUpload:
+    """One file being received chunk by chunk"""
+    
+    def __init__(self, upload_id, file_name, size, part_path):
+        self.upload_id = upload_id
+        self.file_name = file_name
+        self.size = size
+        self.part_path = part_path
+        self.received = 0
+        self.sha256 = hashlib.sha256()
+        self.updated_at = time.time()
+        self.lock = threading.Lock()
+
+
+class UploadManager:
+    """Receives files as a sequence of binary chunks.
+    
+    Each chunk is appended to a partial file on disk and fed to a running
+    sha256, so server memory stays at one chunk per upload regardless of file
+    size. Chunks must arrive in order (the client sends the offset it is
+    writing at); an interrupted upload resumes from the bytes received so far as long as
+    this process still knows the upload id. Finished files land in
+    <directory>/<sha256 prefix>/<file name>.
+    """
+    
+    def __init__(self, directory=None, max_size=512 * 1024 * 1024, max_chunk_size=1024 * 1024, stale_after=60 * 60):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'council-uploads')
+        self.max_size = max_size
+        self.max_chunk_size = max_chunk_size
+        self.stale_after = stale_after
+        self._uploads = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+    
+    def start(self, file_name, size, upload_id=None):
+        """Begin (or resume, given a known upload_id) an upload; returns the upload"""
+        self.expire_stale()
+        
+        with self._lock:
+            upload = self._uploads.get(upload_id) if upload_id else None
+            if upload is not None:
+                upload.updated_at = time.time()
+                return upload
+        
+        file_name = os.path.basename(file_name or '').strip()
+        if not file_name or file_name in ('.', '..'):
+            raise ValueError('Invalid file name')
+        if size is None or size < 0:
+            raise ValueError('File size is required')
+        if self.max_size and size > self.max_size:
+            raise ValueError(f'File is too large ({size} bytes, limit {self.max_size})')
+        
+        upload_id = uuid.uuid4().hex
+        upload = ChunkedUpload(upload_id, file_name, size, os.path.join(self.directory, f'{upload_id}.part'))
+        open(upload.part_path, 'wb').close()
+        
+        with self._lock:
+            self._uploads[upload_id] = upload
+        return upload
+    
+    def write_chunk(self, upload_id, offset, data):
+        """Append a chunk written at offset; returns the bytes received so far"""
+        upload = self._get(upload_id)
+        if len(data) > self.max_chunk_size:
+            raise ValueError(f'Chunk is too large ({len(data)} bytes, limit {self.max_chunk_size})')
+        
+        with upload.lock:
+            if offset != upload.received:
+                raise ValueError(f'Expected offset {upload.received}, got {offset}')
+            if upload.received + len(data) > upload.size:
+                raise ValueError('Upload is larger than announced')
+            
+            with open(upload.part_path, 'ab') as f:
+                f.write(data)
+            upload.sha256.update(data)
+            upload.received += len(data)
+            upload.updated_at = time.time()
+            return upload.received
+    
+    def finish(self, upload_id, sha256=None):
+        """Move a complete upload into place; returns its name, path, size and sha256.
+        
+        Raises UploadMismatch when the partial file isn't the announced size
+        or its digest differs from the client's sha256 (if sent). Other errors
+        leave the upload in place to be resumed or finished again.
+        """
+        upload = self._get(upload_id)
+        
+        with upload.lock:
+            if upload.received != upload.size:
+                raise ValueError(f'Upload incomplete ({upload.received} of {upload.size} bytes)')
+            written = os.path.getsize(upload.part_path)
+            if written != upload.size:
+                raise UploadMismatch(f'Upload size mismatch ({written} bytes on disk, {upload.size} announced)')
+            
+            digest = upload.sha256.hexdigest()
+            if sha256 and sha256.lower() != digest:
+                raise UploadMismatch(f'Upload checksum mismatch (got {digest}, expected {sha256})')
+            target_dir = os.path.join(self.directory, digest[:16])
+            os.makedirs(target_dir, exist_ok=True)
+            file_path = os.path.join(target_dir, upload.file_name)
+            os.replace(upload.part_path, file_path)
+        
+        with self._lock:
+            self._uploads.pop(upload_id, None)
+        
+        return {
+            'file_name': upload.file_name,
+            'file_path': file_path,
+            'size': upload.size,
+            'sha256': digest
+        }
+    
+    def abort(self, upload_id):
+        """Forget an upload and delete its partial file"""
+        with self._lock:
+            upload = self._uploads.pop(upload_id, None)
+        if upload is not None and os.path.exists(upload.part_path):
+            os.remove(upload.part_path)
+    
+    def expire_stale(self):
+        """Abort uploads that haven't received a chunk in stale_after seconds"""
+        cutoff = time.time() - self.stale_after
+        with self._lock:
+            stale = [upload_id for upload_id, upload in self._uploads.items() if upload.updated_at < cutoff]
+        for upload_id in stale:
+            self.abort(upload_id)
+    
+    def _get(self, upload_id):
+        with self._lock:
+            upload = self._uploads.get(upload_id)
+        if upload is None:
+            raise ValueError('Unknown or expired upload')
+        return upload
@@ -0,0 +1,168 @@
+"""Council worker process: runs the council jobs app.py queues when COUNCIL_QUEUE is set.
+
+    COUNCIL_QUEUE=sqlite:////tmp/council-queue.db python worker.py --threads 2
+
+Workers build their council from the same environment variables as app.py
+(they import it) and send each job's events straight to the asking client
+through the shared message queue. `python app.py` starts COUNCIL_WORKERS of
+them itself when COUNCIL_QUEUE is set; run more by hand to add capacity.
+"""
+from cancellation import CancelToken
+from message_queue import SqliteManager
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+
+class CouncilWorker:
+    """Claims jobs from a JobQueue and runs up to max_running of them on threads.
+    
+    run_job(session, job, emit_event, cancel) runs one job on a fork of the
+    council set up with the advisors and Ollama host the job was submitted
+    with; emit_event(event, data) reaches the client that asked. Cancel
+    flags set by the web process are polled every poll_interval seconds and
+    cancel the matching run's token. With parent_pid set the worker stops
+    once that process has exited.
+    """
+    
+    def __init__(self, council, jobs, manager, run_job, max_running=2, name=None, poll_interval=0.2,
+                 parent_pid=None):
+        self.council = council
+        self.jobs = jobs
+        self.manager = manager
+        self.run_job = run_job
+        self.max_running = max(1, max_running)
+        self.name = name or f'worker-{os.getpid()}'
+        self.poll_interval = poll_interval
+        self.parent_pid = parent_pid
+        self._running = {}
+        self._lock = threading.Lock()
+    
+    def run(self):
+        """Claim and run jobs until the process is stopped or its parent exits"""
+        print(f"Council worker {self.name} running up to {self.max_running} councils")
+        while self.parent_pid is None or os.getppid() == self.parent_pid:
+            self._check_cancels()
+            with self._lock:
+                full = len(self._running) >= self.max_running
+            claimed = None if full else self.jobs.claim(self.name)
+            if claimed is None:
+                time.sleep(self.poll_interval)
+                continue
+            
+            job_id, user, payload = claimed
+            cancel = CancelToken()
+            with self._lock:
+                self._running[job_id] = cancel
+            threading.Thread(
+                target=self._run, args=(job_id, payload, cancel), name=f'council-{job_id[:8]}', daemon=True
+            ).start()
+    
+    def _run(self, job_id, payload, cancel):
+        sid = payload['sid']
+        
+        def emit_event(event, data):
+            self.manager.emit(event, data, room=sid, namespace='/')
+        
+        try:
+            self.run_job(self._session(payload), payload, emit_event, cancel)
+        except Exception as e:
+            print(f"Council job {job_id} failed: {e}")
+            emit_event('council_error', {'error': str(e)})
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+            self.jobs.finish(job_id)
+    
+    def _session(self, payload):
+        """A fork of the council with the submitting session's host and advisors"""
+        session = self.council.fork()
+        host = payload.get('ollama_host')
+        if host and host != session.ollama_host:
+            session.set_ollama_host(host)
+        if not session.default_advisors:
+            session.get_available_models(wait=30)
+            session.default_advisors = list(self.council.default_advisors)
+        session.advisors = payload.get('advisors') or list(session.default_advisors)
+        return session
+    
+    def _check_cancels(self):
+        with self._lock:
+            running = dict(self._running)
+        try:
+            requests = self.jobs.cancel_requests(running)
+        except Exception as e:
+            print(f"Error checking cancelled jobs: {e}")
+            return
+        for job_id, reason in requests.items():
+            running[job_id].cancel(reason)
+
+
+
+class WorkerPool:
+    """Worker processes started by the web process.
+    
+    A worker that exits is started again under the same name, and the jobs it
+    was running go back in the queue (a fresh start also requeues whatever a
+    previous run's workers left behind).
+    """
+    
+    def __init__(self, jobs, count=2, threads=2, check_interval=5):
+        self.jobs = jobs
+        self.count = count
+        self.threads = threads
+        self.check_interval = check_interval
+        self._processes = {}
+        self._stopped = threading.Event()
+    
+    def start(self):
+        for index in range(self.count):
+            self._spawn(f'worker-{index + 1}')
+        threading.Thread(target=self._monitor, name='council-workers', daemon=True).start()
+        return self
+    
+    def stop(self):
+        self._stopped.set()
+        for process in self._processes.values():
+            process.terminate()
+    
+    def _spawn(self, name):
+        requeued = self.jobs.requeue_worker(name)
+        if requeued:
+            print(f"Requeued {requeued} council jobs from {name}")
+        # Same working directory as the web process, so uploaded file paths resolve the same way
+        self._processes[name] = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--name', name, '--threads', str(self.threads),
+             '--parent', str(os.getpid())]
+        )
+    
+    def _monitor(self):
+        while not self._stopped.wait(self.check_interval):
+            for name, process in list(self._processes.items()):
+                if process.poll() is not None and not self._stopped.is_set():
+                    print(f"Council {name} exited with code {process.returncode}, restarting it")
+                    self._spawn(name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run council jobs queued by app.py (needs COUNCIL_QUEUE)')
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('COUNCIL_MAX_RUNNING', 2)),
+                        help='councils this worker runs at once')
+    parser.add_argument('--name', help='worker name shown in /queue (default: worker-PID)')
+    parser.add_argument('--parent', type=int, help='exit when this process does (set by WorkerPool)')
+    args = parser.parse_args()
+    
+    import app as server
+    if server.jobs is None:
+        parser.error('COUNCIL_QUEUE is not set')
+    
+    manager = SqliteManager(server.COUNCIL_QUEUE, write_only=True)
+    CouncilWorker(server.council, server.jobs, manager, server.run_council_job, args.threads, args.name,
+                  parent_pid=args.parent).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,329 @@
+"""A stand-in for the Ollama HTTP API with simulated model timings.
+
+Answers /api/tags, /api/ps, /api/chat and /api/generate the way Ollama does,
+but instead of running a model it sleeps for the time a model with the
+configured profile would take: a load when the model isn't resident, prompt
+evaluation (skipping the prefix shared with the model's previous prompt, like
+Ollama's prompt cache), then generation at a fixed token rate, streamed in
+chunks. Reported durations and token counts match the simulated work.
+
+Run standalone:  python benchmarks/fake_ollama.py --port 11500 --time-scale 0.5
+"""
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from datetime import datetime, timezone
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+# Three models of different sizes and speeds, enough for a full council
+DEFAULT_PROFILES = {
+    'bench-large:7b': {
+        'size': 7 * 1024 ** 3,
+        'load_seconds': 2.0,
+        'prompt_tokens_per_second': 400,
+        'tokens_per_second': 20,
+        'response_tokens': 80,
+        'chunk_tokens': 1
+    },
+    'bench-medium:3b': {
+        'size': 3 * 1024 ** 3,
+        'load_seconds': 1.0,
+        'prompt_tokens_per_second': 900,
+        'tokens_per_second': 45,
+        'response_tokens': 60,
+        'chunk_tokens': 1
+    },
+    'bench-small:1b': {
+        'size': 1 * 1024 ** 3,
+        'load_seconds': 0.5,
+        'prompt_tokens_per_second': 2000,
+        'tokens_per_second': 90,
+        'response_tokens': 40,
+        'chunk_tokens': 2
+    }
+}
+
+PROFILE_DEFAULTS = {
+    'size': 1024 ** 3,
+    'load_seconds': 1.0,
+    'prompt_tokens_per_second': 1000,
+    'tokens_per_second': 50,
+    'response_tokens': 50,
+    # Tokens per streamed chunk
+    'chunk_tokens': 1
+}
+
+WORDS = (
+    'the council weighs each option against its costs and recommends a measured approach that '
+    'balances risk with long term benefit while keeping the plan simple to review and adjust'
+).split()
+
+
+class FakeOllama:
+    """Simulated Ollama server on a background thread.
+    
+    profiles maps model name to its timings (see PROFILE_DEFAULTS). At most
+    max_loaded_models stay resident; loading another evicts the least recently
+    used. Each model serves num_parallel requests at a time and queues the rest.
+    time_scale multiplies every delay; 0 answers instantly, which leaves only
+    the council's own overhead to measure.
+    """
+    
+    def __init__(self, profiles=None, host='127.0.0.1', port=0, max_loaded_models=1, num_parallel=1, time_scale=1.0):
+        self.profiles = {
+            name: dict(PROFILE_DEFAULTS, **profile)
+            for name, profile in (profiles or DEFAULT_PROFILES).items()
+        }
+        self.max_loaded_models = max(1, max_loaded_models)
+        self.time_scale = time_scale
+        self.requests = 0
+        self.loads = 0
+        self.disconnects = 0
+        # Loaded models, least recently used first
+        self._loaded = []
+        self._last_prompt = {}
+        self._slots = {name: threading.Semaphore(num_parallel) for name in self.profiles}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+    
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-ollama', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def loaded_models(self):
+        with self._lock:
+            return list(reversed(self._loaded))
+    
+    def _sleep(self, seconds):
+        if seconds > 0 and self.time_scale > 0:
+            time.sleep(seconds * self.time_scale)
+    
+    def _load(self, model):
+        """Make a model resident; returns the simulated load time in seconds"""
+        with self._lock:
+            if model in self._loaded:
+                self._loaded.remove(model)
+                self._loaded.append(model)
+                return 0.0
+            self._loaded.append(model)
+            while len(self._loaded) > self.max_loaded_models:
+                evicted = self._loaded.pop(0)
+                self._last_prompt.pop(evicted, None)
+            self.loads += 1
+        
+        seconds = self.profiles[model]['load_seconds']
+        self._sleep(seconds)
+        return seconds
+    
+    def _unload(self, model):
+        with self._lock:
+            if model in self._loaded:
+                self._loaded.remove(model)
+            self._last_prompt.pop(model, None)
+    
+    def _prompt_tokens(self, model, prompt):
+        """Tokens Ollama would evaluate: the prompt minus the prefix cached from the previous one"""
+        with self._lock:
+            previous = self._last_prompt.get(model, '')
+            self._last_prompt[model] = prompt
+        shared = len(os.path.commonprefix([previous, prompt]))
+        return max(1, (len(prompt) - shared) // 4 + 1)
+    
+    def _response_tokens(self, model, options):
+        tokens = self.profiles[model]['response_tokens']
+        if options.get('num_predict'):
+            tokens = min(tokens, options['num_predict'])
+        return max(1, tokens)
+    
+    def _generate(self, model, prompt, options):
+        """Yield (text, final stats or None) chunks for one request, sleeping as the model would"""
+        profile = self.profiles[model]
+        started = time.time()
+        
+        with self._slots[model]:
+            load_seconds = self._load(model)
+            prompt_tokens = self._prompt_tokens(model, prompt)
+            prompt_seconds = prompt_tokens / profile['prompt_tokens_per_second']
+            self._sleep(prompt_seconds)
+            
+            tokens = self._response_tokens(model, options)
+            per_token = 1 / profile['tokens_per_second']
+            chunk_tokens = max(1, profile['chunk_tokens'])
+            for start in range(0, tokens, chunk_tokens):
+                count = min(chunk_tokens, tokens - start)
+                self._sleep(per_token * count)
+                words = [WORDS[(start + idx) % len(WORDS)] for idx in range(count)]
+                text = ' '.join(words) + ('.' if start + count == tokens else ' ')
+                yield text, None
+        
+        yield '', {
+            'done_reason': 'stop',
+            'total_duration': int((time.time() - started) * 1e9),
+            'load_duration': int(load_seconds * 1e9),
+            'prompt_eval_count': prompt_tokens,
+            'prompt_eval_duration': int(prompt_seconds * 1e9),
+            'eval_count': tokens,
+            'eval_duration': int(tokens * per_token * 1e9)
+        }
+    
+    def _handler(self):
+        fake = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def log_message(self, format, *args):
+                pass
+            
+            def do_GET(self):
+                if self.path == '/api/tags':
+                    self._send_json({'models': [fake._model_entry(name) for name in fake.profiles]})
+                elif self.path == '/api/ps':
+                    self._send_json({'models': [fake._model_entry(name) for name in fake.loaded_models()]})
+                elif self.path == '/api/version':
+                    self._send_json({'version': '0.0.0-fake'})
+                else:
+                    self._send_json({'error': 'not found'}, 404)
+            
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+            
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    return self._send_json({'error': 'invalid JSON'}, 400)
+                
+                with fake._lock:
+                    fake.requests += 1
+                
+                model = body.get('model')
+                if model not in fake.profiles:
+                    return self._send_json({'error': f"model '{model}' not found"}, 404)
+                
+                if self.path == '/api/chat':
+                    prompt = '\n'.join(message.get('content', '') for message in body.get('messages', []))
+                    self._answer(body, prompt, lambda text: {'message': {'role': 'assistant', 'content': text}})
+                elif self.path == '/api/generate':
+                    if body.get('keep_alive') in (0, '0', '0s'):
+                        fake._unload(model)
+                        return self._send_json(fake._chunk(model, {'response': '', 'done': True, 'done_reason': 'unload'}))
+                    if not body.get('prompt'):
+                        # An empty prompt only loads the model
+                        load_seconds = fake._load(model)
+                        return self._send_json(fake._chunk(model, {
+                            'response': '', 'done': True, 'load_duration': int(load_seconds * 1e9)
+                        }))
+                    self._answer(body, body['prompt'], lambda text: {'response': text})
+                else:
+                    self._send_json({'error': 'not found'}, 404)
+            
+            def _answer(self, body, prompt, wrap):
+                chunks = fake._generate(body['model'], prompt, body.get('options') or {})
+                
+                if body.get('stream', True):
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/x-ndjson')
+                    self.send_header('Transfer-Encoding', 'chunked')
+                    self.end_headers()
+                    try:
+                        for text, final in chunks:
+                            chunk = fake._chunk(body['model'], dict(wrap(text), done=final is not None, **(final or {})))
+                            self._write_chunk(json.dumps(chunk).encode() + b'\n')
+                        self._write_chunk(b'')
+                    except (BrokenPipeError, ConnectionResetError):
+                        # The client hung up (e.g. a cancelled council); stop generating, as Ollama does
+                        with fake._lock:
+                            fake.disconnects += 1
+                        self.close_connection = True
+                    finally:
+                        chunks.close()
+                    return
+                
+                parts = []
+                for text, final in chunks:
+                    parts.append(text)
+                self._send_json(fake._chunk(body['model'], dict(wrap(''.join(parts)), done=True, **final)))
+            
+            def _write_chunk(self, data):
+                self.wfile.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+                self.wfile.flush()
+            
+            def _send_json(self, payload, status=200):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+        
+        return Handler
+    
+    def _model_entry(self, name):
+        return {
+            'name': name,
+            'model': name,
+            'size': self.profiles[name]['size'],
+            'digest': f'fake-{name}',
+            'modified_at': datetime.now(timezone.utc).isoformat()
+        }
+    
+    def _chunk(self, model, fields):
+        return dict({'model': model, 'created_at': datetime.now(timezone.utc).isoformat()}, **fields)
+
+
+def load_profiles(path):
+    """Model profiles from a JSON file: {"model:tag": {"tokens_per_second": 30, ...}, ...}"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulated Ollama server for benchmarks')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11500, help='0 picks a free port')
+    parser.add_argument('--profiles', help='JSON file of model profiles (default: three built-in models)')
+    parser.add_argument('--max-loaded-models', type=int, default=1)
+    parser.add_argument('--num-parallel', type=int, default=1, help='Concurrent requests per model')
+    parser.add_argument('--time-scale', type=float, default=1.0, help='Multiplier for every simulated delay')
+    args = parser.parse_args()
+    
+    fake = FakeOllama(
+        profiles=load_profiles(args.profiles) if args.profiles else None,
+        host=args.host,
+        port=args.port,
+        max_loaded_models=args.max_loaded_models,
+        num_parallel=args.num_parallel,
+        time_scale=args.time_scale
+    ).start()
+    # The benchmark runner reads this line to find the server
+    print(f'Fake Ollama listening on {fake.url}', flush=True)
+    
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,410 @@
+"""Offline benchmarks for the council orchestrator.
+
+Starts the fake Ollama server (fake_ollama.py) in its own process, replaces
+web search with StubDDGS, then measures:
+
+  * convene_council in every mode, --runs times each with --concurrency runs
+    in flight: end-to-end latency, time to the first event and to the first
+    advisor output, throughput, and memory (peak RSS, plus peak Python
+    allocations with --tracemalloc)
+  * --sessions concurrent Socket.IO sessions against app.py, each asking
+    --session-runs questions: the same latencies as seen by the client
+
+Simulated model timings come from the fake server's profiles; --time-scale 0
+removes them so only the orchestrator's own overhead is left.
+
+  python benchmarks/run_benchmarks.py --runs 5 --concurrency 2 --sessions 8 --time-scale 0.1
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'ai-council'))
+sys.path.insert(0, BENCH_DIR)
+
+from stub_search import StubDDGS
+
+QUESTION = 'Should a small city invest in protected bike lanes or more bus routes?'
+
+SCENARIOS = {
+    'normal': {'mode': 'normal'},
+    'normal-pipelined': {'mode': 'normal', 'deliberation': 'pipelined'},
+    'normal-adaptive': {'mode': 'normal', 'deliberation': 'adaptive'},
+    'normal-tools': {'mode': 'normal', 'tools': {'document_reading': True, 'calculator': True}},
+    'web_search': {'mode': 'web_search'},
+    'deep_research': {'mode': 'deep_research'},
+}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def rss_mb():
+    """Current resident set size of this process in MB"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError):
+        # No /proc: fall back to the peak (kilobytes on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+class MemorySampler:
+    """Tracks peak RSS while a scenario runs"""
+    
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name='memory-sampler', daemon=True)
+    
+    def __enter__(self):
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb())
+    
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+
+class EventLog(list):
+    """Events with their arrival time; appends are safe from any thread"""
+    
+    def __init__(self, started=None):
+        super().__init__()
+        self.started = started if started is not None else time.perf_counter()
+    
+    def append(self, event):
+        super().append((time.perf_counter() - self.started, event))
+    
+    def first(self, predicate):
+        """Arrival time of the first event matching predicate, or None"""
+        return next((at for at, event in list(self) if predicate(event)), None)
+
+
+def is_answer(event):
+    """An advisor's output, streamed or whole (not a status or tool notice)"""
+    return event.get('name') != 'System' and event.get('status') in ('delta', 'complete')
+
+
+def start_fake_ollama(args):
+    """Run fake_ollama.py in a child process so it doesn't share our CPU time and memory"""
+    command = [
+        sys.executable, os.path.join(BENCH_DIR, 'fake_ollama.py'),
+        '--port', '0',
+        '--max-loaded-models', str(args.max_loaded_models),
+        '--num-parallel', str(args.num_parallel),
+        '--time-scale', str(args.time_scale)
+    ]
+    if args.profiles:
+        command += ['--profiles', args.profiles]
+    
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if 'listening on' not in line:
+        process.kill()
+        raise RuntimeError(f'Fake Ollama failed to start: {line!r}')
+    return process, line.rsplit(' ', 1)[-1].strip()
+
+
+def make_document(directory):
+    """A long text file for the document-reading scenario"""
+    path = os.path.join(directory, 'transport-study.txt')
+    topics = ['bike lanes', 'bus routes', 'road safety', 'commute times', 'city budget', 'air quality']
+    with open(path, 'w', encoding='utf-8') as f:
+        for idx in range(2000):
+            topic = topics[idx % len(topics)]
+            f.write(f'Section {idx}: residents surveyed about {topic} reported mixed views, '
+                    f'with {idx % 97} percent in favour of expanding {topic} next year.\n')
+    return path
+
+
+def scenario_request(name, document_path, model):
+    """Arguments for convene_council (also the Socket.IO payload) for a scenario"""
+    scenario = dict(SCENARIOS[name])
+    question = QUESTION
+    if name == 'normal-tools':
+        question = f'Read and analyze the file "{document_path}". {QUESTION} Budget is 120 * 4500 + 30000.'
+    scenario['question'] = question
+    if scenario['mode'] == 'web_search':
+        scenario['selected_model'] = model
+    return scenario
+
+
+def summarize(name, results, wall, memory=None, traced_peak=None):
+    latencies = [r['latency'] for r in results if r['ok']]
+    first_events = [r['first_event'] for r in results if r['first_event'] is not None]
+    first_answers = [r['first_answer'] for r in results if r['first_answer'] is not None]
+    summary = {
+        'scenario': name,
+        'runs': len(results),
+        'errors': sum(1 for r in results if not r['ok']),
+        'latency_p50': percentile(latencies, 50),
+        'latency_p95': percentile(latencies, 95),
+        'latency_max': max(latencies) if latencies else None,
+        'first_event_p50': percentile(first_events, 50),
+        'first_answer_p50': percentile(first_answers, 50),
+        'events_per_run': sum(r['events'] for r in results) / max(1, len(results)),
+        'throughput_per_minute': len(latencies) / wall * 60 if wall else None,
+        'wall_seconds': wall
+    }
+    if memory is not None:
+        summary['peak_rss_mb'] = memory.peak
+        summary['rss_mb'] = rss_mb()
+    if traced_peak is not None:
+        summary['traced_peak_mb'] = traced_peak / 1024 ** 2
+    return summary
+
+
+def run_scenario(name, runs, concurrency, run_once, trace=False):
+    """Run run_once(idx) runs times, concurrency at a time, and summarize"""
+    if trace:
+        tracemalloc.reset_peak()
+    
+    with MemorySampler() as memory:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(run_once, range(runs)))
+        wall = time.perf_counter() - started
+    
+    traced_peak = tracemalloc.get_traced_memory()[1] if trace else None
+    return summarize(name, results, wall, memory, traced_peak)
+
+
+def bench_council(args, url, document_path):
+    """convene_council called directly, in every scenario"""
+    if args.engine == 'async':
+        from async_council_orchestrator import AsyncAICouncil
+        council = AsyncAICouncil(ollama_host=url, max_loaded_models=args.max_loaded_models)
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, name='bench-loop', daemon=True).start()
+    else:
+        from council_orchestrator import AICouncil
+        council = AICouncil(ollama_host=url, max_loaded_models=args.max_loaded_models)
+        loop = None
+    
+    models = council.get_available_models(wait=10)
+    if not council.advisors:
+        raise RuntimeError(f'No advisors assigned; models listed: {models}')
+    
+    def run(name, idx):
+        request = scenario_request(name, document_path, council.advisors[0]['model'])
+        # A new question each run, so web search and extraction caches don't answer for Ollama
+        question = f"{request.pop('question')} (run {idx})"
+        events = EventLog()
+        kwargs = {
+            'question': question,
+            'callback': events.append,
+            'mode': request['mode'],
+            'selected_model': request.get('selected_model'),
+            'enabled_tools': request.get('tools'),
+            'stream': args.stream,
+            'deliberation': request.get('deliberation', 'chain'),
+            'stats': []
+        }
+        try:
+            if loop is not None:
+                asyncio.run_coroutine_threadsafe(council.convene_council(**kwargs), loop).result()
+            else:
+                council.convene_council(**kwargs)
+            ok = True
+        except Exception as e:
+            print(f'{name} run {idx} failed: {e}')
+            ok = False
+        return {
+            'ok': ok,
+            'latency': time.perf_counter() - events.started,
+            'first_event': events.first(lambda event: True),
+            'first_answer': events.first(is_answer),
+            'events': len(events)
+        }
+    
+    summaries = []
+    for name in args.scenarios:
+        if args.warmup:
+            run(name, -1)
+        summary = run_scenario(name, args.runs, args.concurrency, lambda idx: run(name, idx), args.tracemalloc)
+        summary['engine'] = args.engine
+        summaries.append(summary)
+        print_summary(summary)
+    return summaries
+
+
+def bench_sessions(args, url, document_path):
+    """Concurrent Socket.IO sessions against app.py, through Flask-SocketIO's test client.
+    
+    The test client skips the network transport but runs everything else the
+    server does per message: session lookup, handler, emits and packet encoding.
+    """
+    os.environ['OLLAMA_HOSTS'] = url
+    os.environ['COUNCIL_WARMUP'] = '0'
+    os.environ['COUNCIL_ENGINE'] = args.engine
+    os.environ.setdefault('COUNCIL_EXTRACTION_CACHE_DIR', os.path.join(os.path.dirname(document_path), 'extractions'))
+    import app as council_app
+    
+    council_app.council.get_available_models(wait=10)
+    if not council_app.council.default_advisors:
+        raise RuntimeError('No advisors assigned in app.py')
+    
+    clients = []
+    for _ in range(args.sessions):
+        client = council_app.socketio.test_client(council_app.app)
+        # Timestamp every event the server sends this session
+        client.queue = EventLog()
+        clients.append(client)
+    
+    def ask(client, name, idx):
+        request = scenario_request(name, document_path, council_app.council.default_advisors[0]['model'])
+        request['question'] = f"{request['question']} (session run {idx})"
+        request['stream'] = args.stream
+        
+        cursor = len(client.queue)
+        started = time.perf_counter() - client.queue.started
+        client.emit('convene_council', request)
+        
+        deadline = time.perf_counter() + args.timeout
+        finished = None
+        while finished is None and time.perf_counter() < deadline:
+            for at, packet in list(client.queue)[cursor:]:
+                if packet['name'] in ('council_complete', 'council_error'):
+                    finished = (at, packet)
+                    break
+            else:
+                time.sleep(0.005)
+        
+        received = list(client.queue)[cursor:]
+        messages = [(at, packet['args'][0]) for at, packet in received if packet['name'] == 'council_message']
+        return {
+            'ok': finished is not None and finished[1]['name'] == 'council_complete',
+            'latency': (finished[0] if finished else time.perf_counter() - client.queue.started) - started,
+            'first_event': received[0][0] - started if received else None,
+            'first_answer': next((at - started for at, message in messages if is_answer(message)), None),
+            'events': len(received)
+        }
+    
+    summaries = []
+    for name in args.scenarios:
+        def session_runs(session_idx):
+            return [ask(clients[session_idx], name, run_idx) for run_idx in range(args.session_runs)]
+        
+        if args.tracemalloc:
+            tracemalloc.reset_peak()
+        with MemorySampler() as memory:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.sessions) as executor:
+                results = [result for runs in executor.map(session_runs, range(args.sessions)) for result in runs]
+            wall = time.perf_counter() - started
+        
+        traced_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+        summary = summarize(f'{name} x{args.sessions} sessions', results, wall, memory, traced_peak)
+        summary['engine'] = args.engine
+        summaries.append(summary)
+        print_summary(summary)
+    
+    for client in clients:
+        client.disconnect()
+    return summaries
+
+
+def print_summary(summary):
+    def seconds(value):
+        return '-' if value is None else f'{value:.3f}s'
+    
+    line = (
+        f"{summary['scenario']:<32} runs={summary['runs']:<3} errors={summary['errors']:<2} "
+        f"p50={seconds(summary['latency_p50'])} p95={seconds(summary['latency_p95'])} "
+        f"first_event={seconds(summary['first_event_p50'])} first_answer={seconds(summary['first_answer_p50'])} "
+        f"throughput={summary['throughput_per_minute'] or 0:.1f}/min peak_rss={summary.get('peak_rss_mb', 0):.0f}MB"
+    )
+    if 'traced_peak_mb' in summary:
+        line += f" traced_peak={summary['traced_peak_mb']:.1f}MB"
+    print(line, flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline council benchmarks against a fake Ollama server')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f'Comma-separated subset of: {", ".join(SCENARIOS)}')
+    parser.add_argument('--engine', choices=['threads', 'async'], default='threads')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per scenario when calling convene_council directly')
+    parser.add_argument('--concurrency', type=int, default=1, help='Direct runs in flight at once')
+    parser.add_argument('--sessions', type=int, default=0, help='Concurrent Socket.IO sessions against app.py (0 skips)')
+    parser.add_argument('--session-runs', type=int, default=1, help='Questions each session asks per scenario')
+    parser.add_argument('--stream', action='store_true', help='Stream tokens as delta events')
+    parser.add_argument('--no-warmup', dest='warmup', action='store_false', help='Skip the untimed first run per scenario')
+    parser.add_argument('--time-scale', type=float, default=0.1, help='Multiplier for simulated model delays')
+    parser.add_argument('--search-latency', type=float, default=0.3, help='Seconds per stub web search (before time scale)')
+    parser.add_argument('--profiles', help='JSON file of fake model profiles')
+    parser.add_argument('--max-loaded-models', type=int, default=1)
+    parser.add_argument('--num-parallel', type=int, default=1, help='Concurrent requests per fake model')
+    parser.add_argument('--ollama-url', help='Use an already running (fake) Ollama server instead of starting one')
+    parser.add_argument('--timeout', type=float, default=300, help='Seconds a session waits for council_complete')
+    parser.add_argument('--tracemalloc', action='store_true', help='Also report peak Python allocations (slower)')
+    parser.add_argument('--json', help='Write all results to this file')
+    args = parser.parse_args()
+    
+    args.scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f'Unknown scenarios: {", ".join(unknown)}')
+    
+    from tools import CouncilTools
+    CouncilTools.search_backend = StubDDGS
+    StubDDGS.latency = args.search_latency * args.time_scale
+    
+    process = None
+    url = args.ollama_url
+    if not url:
+        process, url = start_fake_ollama(args)
+    print(f'Fake Ollama at {url}, engine={args.engine}, stream={args.stream}, time scale {args.time_scale}', flush=True)
+    
+    if args.tracemalloc:
+        tracemalloc.start()
+    
+    work_dir = tempfile.mkdtemp(prefix='council-bench-')
+    document_path = make_document(work_dir)
+    from extraction_cache import ExtractionCache
+    CouncilTools.extraction_cache = ExtractionCache(directory=os.path.join(work_dir, 'extractions'))
+    
+    results = {'args': vars(args), 'council': [], 'sessions': []}
+    try:
+        if args.runs > 0:
+            results['council'] = bench_council(args, url, document_path)
+        if args.sessions > 0:
+            results['sessions'] = bench_sessions(args, url, document_path)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    
+    results['stub_searches'] = StubDDGS.searches
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f'Results written to {args.json}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+"""A stand-in for the DDGS web search backend.
+
+Install with CouncilTools.search_backend = StubDDGS. Results are made up from
+the query after a fixed delay, so benchmarks never touch the network.
+"""
+import threading
+import time
+
+
+class StubDDGS:
+    """Answers DDGS().text(query, max_results) with canned results"""
+    
+    # Seconds per search, like a DuckDuckGo round trip
+    latency = 0.3
+    searches = 0
+    _lock = threading.Lock()
+    
+    def text(self, query, max_results=5):
+        with StubDDGS._lock:
+            StubDDGS.searches += 1
+        if StubDDGS.latency > 0:
+            time.sleep(StubDDGS.latency)
+        
+        return [
+            {
+                'title': f'Result {idx} for {query}',
+                'body': f'Background on {query}: summary {idx} of the main facts, figures and opinions '
+                        f'published about the topic, with enough detail to give advisors some context.',
+                'href': f'https://example.com/{idx}'
+            }
+            for idx in range(1, max_results + 1)
+        ]
@@ -0,0 +1,101 @@
+from batch import BatchCheckpoint, BatchRunner, read_requests
+from council_orchestrator import AICouncil
+from scheduler import CouncilScheduler
+import pytest
+
+ADVISORS = [
+    {'name': 'Minister of Finance', 'role': 'Finance', 'model': 'llama3.1:8b', 'personality': 'Costs.'},
+    {'name': 'Minister of Defense', 'role': 'Defense', 'model': 'mistral:7b', 'personality': 'Risks.'},
+    {'name': 'Prime Minister', 'role': 'Synthesis', 'model': 'llama3.1:8b', 'personality': 'Decide.'}
+]
+
+REQUESTS = read_requests([
+    '{"id": "lanes", "question": "Should we build protected bike lanes?"}',
+    '{"id": "pricing", "question": "Should we raise prices by 10%?"}',
+    '"Should we move to a four day week?"'
+])
+
+
+class Interrupted(BaseException):
+    """Stands in for the process being killed mid-batch"""
+
+
+class FakeCouncil(AICouncil):
+    """A council whose advisors answer without a model server, optionally dying after some calls"""
+    
+    def __init__(self, fail_after=None):
+        super().__init__(ollama_host='http://127.0.0.1:9')
+        self.advisors = list(ADVISORS)
+        self.fail_after = fail_after
+        self.calls = []
+    
+    def _consult(self, advisor, messages, callback=None, run=None, status_text='Thinking...'):
+        if self.fail_after is not None and len(self.calls) >= self.fail_after:
+            raise Interrupted()
+        self.calls.append((messages[-1]['content'], advisor['name']))
+        return f"{advisor['name']} answers"
+
+
+@pytest.fixture
+def checkpoint_path(tmp_path):
+    return str(tmp_path / 'batch.db')
+
+
+def test_results_come_back_for_every_question():
+    council = FakeCouncil()
+    results = list(BatchRunner(council).run(REQUESTS))
+    
+    assert sorted(str(result['id']) for result in results) == ['3', 'lanes', 'pricing']
+    assert all(len(result['responses']) == len(ADVISORS) for result in results)
+    assert len(council.calls) == len(REQUESTS) * len(ADVISORS)
+
+
+def test_calls_are_grouped_by_model():
+    runner = BatchRunner(FakeCouncil())
+    list(runner.run(REQUESTS))
+    # Question by question would switch models six times
+    assert runner.model_switches == 3
+
+
+def test_calls_can_wait_for_scheduler_slots():
+    council = FakeCouncil()
+    runner = BatchRunner(council, max_parallel=2, scheduler=CouncilScheduler(max_running=1), user='batch:test')
+    results = list(runner.run(REQUESTS))
+    
+    assert all(len(result['responses']) == len(ADVISORS) for result in results)
+    assert len(council.calls) == len(REQUESTS) * len(ADVISORS)
+
+
+def test_resume_skips_finished_calls(checkpoint_path):
+    interrupted = FakeCouncil(fail_after=4)
+    with pytest.raises(Interrupted):
+        list(BatchRunner(interrupted, BatchCheckpoint(checkpoint_path)).run(REQUESTS))
+    
+    resumed = FakeCouncil()
+    results = list(BatchRunner(resumed, BatchCheckpoint(checkpoint_path)).run(REQUESTS))
+    
+    assert len(interrupted.calls) + len(resumed.calls) == len(REQUESTS) * len(ADVISORS)
+    assert sorted(str(result['id']) for result in results) == ['3', 'lanes', 'pricing']
+    assert all(len(result['responses']) == len(ADVISORS) for result in results)
+
+
+def test_finished_results_are_replayed_first(checkpoint_path):
+    list(BatchRunner(FakeCouncil(), BatchCheckpoint(checkpoint_path)).run(REQUESTS[:2]))
+    
+    council = FakeCouncil()
+    results = list(BatchRunner(council, BatchCheckpoint(checkpoint_path)).run(REQUESTS))
+    
+    assert [result['id'] for result in results[:2]] == ['lanes', 'pricing']
+    assert results[2]['id'] == 3
+    assert len(council.calls) == len(ADVISORS)
+    assert all('four day week' in prompt for prompt, _ in council.calls)
+
+
+def test_progress_is_discarded_when_the_advisors_change(checkpoint_path):
+    with pytest.raises(Interrupted):
+        list(BatchRunner(FakeCouncil(fail_after=2), BatchCheckpoint(checkpoint_path)).run(REQUESTS))
+    
+    council = FakeCouncil()
+    council.advisors[1] = dict(ADVISORS[1], model='gemma2:9b')
+    list(BatchRunner(council, BatchCheckpoint(checkpoint_path)).run(REQUESTS))
+    assert len(council.calls) == len(REQUESTS) * len(ADVISORS)
@@ -0,0 +1,69 @@
+from cache import TTLCache
+import pytest
+import time
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A settable time.time()"""
+    now = [1000.0]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = TTLCache(ttl=60)
+    cache.set('short', 'a', ttl=5)
+    cache.set('default', 'b')
+    
+    clock[0] += 10
+    assert cache.get('short') is None
+    assert cache.get('default') == 'b'
+    clock[0] += 60
+    assert cache.get('default') is None
+    assert cache.stats() == {'entries': 0, 'hits': 1, 'misses': 2}
+
+
+def test_least_recently_used_entries_are_evicted_first():
+    cache = TTLCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert len(cache) == 2
+
+
+def test_sqlite_entries_survive_a_restart(tmp_path, clock):
+    path = str(tmp_path / 'cache.db')
+    TTLCache(db_path=path, ttl=60).set('answer', {'content': 'Build the bike lanes'})
+    
+    cache = TTLCache(db_path=path, ttl=60)
+    assert cache.get('answer') == {'content': 'Build the bike lanes'}
+    assert len(cache) == 1
+    
+    clock[0] += 61
+    assert TTLCache(db_path=path).get('answer') is None
+
+
+def test_sqlite_keeps_the_most_recently_used_rows(tmp_path, clock):
+    path = str(tmp_path / 'cache.db')
+    cache = TTLCache(max_entries=1, max_disk_entries=2, db_path=path)
+    for key in ('a', 'b', 'c'):
+        clock[0] += 1
+        cache.set(key, key)
+    
+    reopened = TTLCache(db_path=path)
+    assert [reopened.get(key) for key in ('a', 'b', 'c')] == [None, 'b', 'c']
+
+
+def test_clear_empties_memory_and_disk(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = TTLCache(db_path=path)
+    cache.set('a', 1)
+    
+    cache.clear()
+    assert cache.get('a') is None
+    assert TTLCache(db_path=path).get('a') is None
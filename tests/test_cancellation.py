@@ -0,0 +1,54 @@
+from cancellation import CancelToken, CouncilCancelled
+import pytest
+
+
+def test_cancel_sets_the_reason_once():
+    token = CancelToken()
+    assert not token.cancelled
+    token.raise_if_cancelled()
+    
+    assert token.cancel('Stopped by user')
+    assert not token.cancel('Again')
+    assert token.cancelled and token.reason == 'Stopped by user'
+
+
+def test_cancelled_runs_raise_past_exception_handlers():
+    token = CancelToken()
+    token.cancel('Client disconnected')
+    
+    with pytest.raises(CouncilCancelled, match='Client disconnected'):
+        try:
+            token.raise_if_cancelled()
+        except Exception:
+            pytest.fail('CouncilCancelled must not be an Exception')
+
+
+def test_callbacks_run_once_on_cancel():
+    token = CancelToken()
+    calls = []
+    token.on_cancel(lambda: calls.append('first'))
+    token.on_cancel(lambda: calls.append('second'))
+    
+    token.cancel()
+    token.cancel()
+    assert calls == ['first', 'second']
+
+
+def test_callback_registered_after_cancel_runs_right_away():
+    token = CancelToken()
+    token.cancel()
+    calls = []
+    token.on_cancel(lambda: calls.append('late'))
+    assert calls == ['late']
+
+
+def test_unregistered_and_failing_callbacks():
+    token = CancelToken()
+    calls = []
+    unregister = token.on_cancel(lambda: calls.append('removed'))
+    token.on_cancel(lambda: 1 / 0)
+    token.on_cancel(lambda: calls.append('kept'))
+    
+    unregister()
+    token.cancel()
+    assert calls == ['kept']
@@ -0,0 +1,126 @@
+from consensus import judge_prompt, overlap, read_judgement
+from council_orchestrator import AICouncil
+import httpx
+import pytest
+
+MONOLITH = "Should we migrate our monolith to microservices?"
+KUBERNETES = "Should our three-person team adopt Kubernetes for our two services?"
+
+# Opposite recommendations that open with the same negations or share most of their words
+NEGATED_DISAGREEMENT = [
+    (MONOLITH, "Don't wait any longer: migrate to microservices now, the monolith is holding the team back.",
+     "Don't migrate. The monolith serves a team of this size well; splitting it adds operational cost."),
+    (MONOLITH, "No question about it, migrate now: the monolith is slowing every release.",
+     "No, keep the monolith; migrating now would stall feature work for months.")
+]
+
+# The same recommendation, one side of each pair phrased with a negation or a hedge
+NEGATED_AGREEMENT = [
+    (KUBERNETES, "Adopting Kubernetes would be premature for a team of three running two services.",
+     "Kubernetes is worthwhile only at larger scale; for three people and two services it is overkill."),
+    (KUBERNETES, "Not only should you adopt Kubernetes, you should do it before the next launch.",
+     "Yes, go with Kubernetes; it will pay off at launch.")
+]
+
+REMAINING = [{'name': 'Minister C', 'role': 'Minister of Defense', 'model': 'mistral:7b'}]
+
+ADVISORS = [
+    {'name': 'Minister A', 'role': 'Finance', 'model': 'llama3.1:8b', 'personality': 'Costs.'},
+    {'name': 'Minister B', 'role': 'Technology', 'model': 'llama3.1:8b', 'personality': 'Systems.'},
+    REMAINING[0],
+    {'name': 'Prime Minister', 'role': 'Synthesis', 'model': 'qwen2.5:14b', 'personality': 'Decide.'}
+]
+
+
+class Judge:
+    """Stands in for the session's Ollama client, answering the consensus prompt with a fixed verdict"""
+    
+    def __init__(self, answer='AGREE'):
+        self.answer = answer
+        self.requests = []
+    
+    def generate(self, **request):
+        self.requests.append(request)
+        if isinstance(self.answer, Exception):
+            raise self.answer
+        return {'response': self.answer}
+
+
+@pytest.fixture(scope='module')
+def council():
+    # Nothing listens on port 9: each test's session talks to a Judge instead
+    return AICouncil(ollama_host='http://127.0.0.1:9')
+
+
+def judged(council, answer='AGREE'):
+    session = council.fork()
+    session.advisors = list(ADVISORS)
+    session.client = Judge(answer)
+    return session
+
+
+def skips(council, question, first, second):
+    return council._consensus_skips(question, [('Minister A', first), ('Minister B', second)], REMAINING)
+
+
+@pytest.mark.parametrize('question, first, second', NEGATED_AGREEMENT + NEGATED_DISAGREEMENT)
+def test_the_judges_verdict_decides(council, question, first, second):
+    agreeing = judged(council, 'AGREE')
+    skipped = skips(agreeing, question, first, second)
+    assert [event['status'] for event in skipped] == ['tool_info', 'skipped']
+    assert 'judged by qwen2.5:14b' in skipped[0]['content']
+    assert skipped[1]['name'] == 'Minister C'
+    
+    assert skips(judged(council, 'DISAGREE'), question, first, second) == []
+
+
+def test_the_judge_sees_the_question_and_every_opinion(council):
+    session = judged(council)
+    question, first, second = NEGATED_DISAGREEMENT[0]
+    skips(session, question, first, second)
+    
+    request, = session.client.requests
+    assert request['model'] == 'qwen2.5:14b' and request['options']['temperature'] == 0
+    assert question in request['prompt']
+    assert f'Minister A: {first}' in request['prompt'] and f'Minister B: {second}' in request['prompt']
+
+
+def test_judge_model_can_be_chosen(council):
+    session = judged(council)
+    session.router_model = 'qwen2.5:0.5b'
+    skips(session, *NEGATED_AGREEMENT[0])
+    session.consensus_model = 'llama3.2:3b'
+    skips(session, *NEGATED_AGREEMENT[0])
+    assert [request['model'] for request in session.client.requests] == ['qwen2.5:0.5b', 'llama3.2:3b']
+
+
+@pytest.mark.parametrize('question, first, second', NEGATED_AGREEMENT + NEGATED_DISAGREEMENT)
+@pytest.mark.parametrize('answer', [httpx.ConnectError('Connection refused'), 'The advisors mostly'])
+def test_without_a_verdict_only_near_identical_answers_skip(council, question, first, second, answer):
+    session = judged(council, answer)
+    # Negations and shared vocabulary never read as agreement on their own
+    assert overlap([first, second]) < session.consensus_threshold
+    assert skips(session, question, first, second) == []
+    
+    skipped = skips(session, question, first, first.replace('.', '!'))
+    assert 'word overlap 1.00' in skipped[0]['content']
+
+
+def test_too_few_opinions_or_no_one_left_to_skip(council):
+    session = judged(council)
+    assert session._consensus_skips(MONOLITH, [('Minister A', 'Migrate.')], REMAINING) == []
+    assert session._consensus_skips(MONOLITH, [('Minister A', 'Migrate.'), ('Minister B', 'Migrate.')], []) == []
+    assert session.client.requests == []
+
+
+@pytest.mark.parametrize('answer, verdict', [
+    ('AGREE', True), (' Agree.', True), ('DISAGREE', False), ('disagree - they differ', False),
+    ('The advisors agree', None), ('', None)
+])
+def test_read_judgement(answer, verdict):
+    assert read_judgement(answer) is verdict
+
+
+def test_judge_prompt_clips_long_opinions():
+    prompt = judge_prompt(MONOLITH, [('Minister A', 'word ' * 1000)], opinion_tokens=10)
+    assert f"Minister A: {' '.join(['word'] * 8)}\n" in prompt
@@ -0,0 +1,65 @@
+from conversations import ConversationStore
+import importlib
+import pytest
+
+ANSWER = [{'advisor': 'Prime Minister', 'response': 'Build the bike lanes. They pay for themselves.'}]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ConversationStore(str(tmp_path / 'conversations.db'))
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # Importing the app builds its council; nothing reaches a model server until a question runs
+    monkeypatch.setenv('COUNCIL_WARMUP', '0')
+    monkeypatch.setenv('COUNCIL_CONVERSATIONS_DB', str(tmp_path / 'conversations.db'))
+    module = importlib.import_module('app')
+    monkeypatch.setattr(module, 'conversations', ConversationStore(str(tmp_path / 'conversations.db')))
+    monkeypatch.setattr(module.scheduler, 'submit', lambda *args, **kwargs: None)
+    return module
+
+
+def test_issued_ids_are_random_and_known(store):
+    first, second = store.create(), store.create()
+    assert first != second and len(first) == 32
+    assert store.exists(first) and not store.exists('1')
+    assert (store.transcript(first), store.context(first)) == ([], '')
+
+
+def test_follow_ups_see_the_earlier_turn(store):
+    conversation = store.create()
+    store.append(conversation, 'Should we build bike lanes?', ANSWER)
+    
+    assert store.turns(conversation) == 1
+    assert 'Build the bike lanes.' in store.context(conversation)
+    assert [turn['question'] for turn in store.transcript(conversation)] == ['Should we build bike lanes?']
+
+
+def test_transcripts_of_unissued_ids_are_not_found(app):
+    # A transcript written under an id the client made up, before ids were issued
+    app.conversations.append('guessable', 'Should we build bike lanes?', ANSWER)
+    conversation = app.conversations.create()
+    
+    client = app.app.test_client()
+    assert client.get('/conversations/guessable').status_code == 404
+    assert client.get(f'/conversations/{conversation}').get_json() == {'turns': [], 'context': ''}
+
+
+def test_only_issued_ids_continue_a_conversation(app):
+    client = app.socketio.test_client(app.app)
+    
+    def started(**data):
+        client.emit('convene_council', dict(question='Should we build bike lanes?', **data))
+        events = [event for event in client.get_received() if event['name'] == 'conversation_started']
+        return events[0]['args'][0]['conversation_id'] if events else None
+    
+    issued = started(new_conversation=True)
+    assert app.conversations.exists(issued)
+    assert started(conversation_id=issued) is None
+    
+    replacement = started(conversation_id='guessable')
+    assert replacement not in (None, 'guessable', issued)
+    assert started() is None
+    client.disconnect()
@@ -0,0 +1,50 @@
+from extraction_cache import ExtractionCache
+import hashlib
+import os
+import pytest
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ExtractionCache(str(tmp_path / 'extractions'), max_hashes=2)
+
+
+def write(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_file_hash_is_the_content_digest(cache, tmp_path):
+    first = write(tmp_path / 'first.txt', b'minutes')
+    second = write(tmp_path / 'second.txt', b'minutes')
+    assert cache.file_hash(first) == cache.file_hash(second) == hashlib.sha256(b'minutes').hexdigest()
+
+
+def test_remembered_hashes_are_bounded_and_least_recently_used_go_first(cache, tmp_path):
+    paths = [write(tmp_path / f'{name}.txt', name.encode()) for name in ('a', 'b', 'c')]
+    cache.file_hash(paths[0])
+    cache.file_hash(paths[1])
+    cache.file_hash(paths[0])
+    cache.file_hash(paths[2])
+    
+    assert [signature[0] for signature in cache._hashes] == [os.path.abspath(paths[0]), os.path.abspath(paths[2])]
+
+
+def test_changed_files_are_hashed_again(cache, tmp_path):
+    path = write(tmp_path / 'notes.txt', b'draft')
+    cache.file_hash(path)
+    write(tmp_path / 'notes.txt', b'final version')
+    
+    assert cache.file_hash(path) == hashlib.sha256(b'final version').hexdigest()
+    assert len(cache._hashes) == 2
+
+
+def test_entries_round_trip_and_oversized_caches_evict(tmp_path):
+    cache = ExtractionCache(str(tmp_path / 'extractions'), max_bytes=100)
+    cache.set('old', {'text': 'x' * 80})
+    os.utime(cache._path('old'), (0, 0))
+    cache.set('new', {'text': 'y' * 80})
+    
+    assert cache.get('old') is None
+    assert cache.get('new') == {'text': 'y' * 80}
+    assert cache.stats()['entries'] == 1
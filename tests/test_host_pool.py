@@ -0,0 +1,93 @@
+from host_pool import HostPool
+from ollama import ResponseError
+import httpx
+import pytest
+
+GOOD = 'http://gpu1:11434'
+DOWN = 'http://gpu2:11434'
+
+
+class FakeClient:
+    """Stands in for one host's ollama.Client; a failing one refuses every connection"""
+    
+    def __init__(self, url, failing=False):
+        self.url = url
+        self.failing = failing
+        self.calls = 0
+    
+    def chat(self, model, stream=False, **kwargs):
+        self.calls += 1
+        if self.failing:
+            raise httpx.ConnectError(f'Connection refused: {self.url}')
+        if stream:
+            return iter([{'message': {'content': self.url}}])
+        return {'message': {'content': self.url}}
+
+
+def fake_pool(urls, failing=(), **options):
+    pool = HostPool(urls, **options)
+    for host in pool.hosts:
+        host.client = FakeClient(host.url, failing=host.url in failing)
+    return pool
+
+
+def answer(pool, stream=False):
+    response = pool.chat(model='llama3.1:8b', messages=[], stream=stream)
+    return [chunk for chunk in response][0] if stream else response
+
+
+def test_connection_errors_fail_over_to_the_next_host():
+    pool = fake_pool([DOWN, GOOD], failing=[DOWN])
+    
+    assert answer(pool)['message']['content'] == GOOD
+    down, good = pool.hosts
+    assert (down.client.calls, good.client.calls) == (1, 1)
+    assert not down.healthy and down.failures == 1
+    assert good.healthy and (down.in_flight, good.in_flight) == (0, 0)
+    
+    # The failed host is skipped while a healthy one is left
+    answer(pool)
+    assert (down.client.calls, good.client.calls) == (1, 2)
+
+
+def test_hosts_marked_down_are_still_tried_when_nothing_else_is_left():
+    pool = fake_pool([DOWN, GOOD], failing=[DOWN])
+    down, good = pool.hosts
+    good.healthy = False
+    
+    # The healthy host goes first; once it fails, the one marked down answers
+    assert answer(pool)['message']['content'] == GOOD
+    assert (down.client.calls, good.client.calls) == (1, 1)
+
+
+def test_failover_stops_after_max_retries():
+    pool = fake_pool([DOWN, GOOD], failing=[DOWN, GOOD], max_retries=5)
+    with pytest.raises(httpx.ConnectError):
+        answer(pool)
+    # Each host is tried once per call, however many retries are allowed
+    assert [host.client.calls for host in pool.hosts] == [1, 1]
+    
+    third = 'http://gpu3:11434'
+    pool = fake_pool([DOWN, GOOD, third], failing=[DOWN, GOOD, third], max_retries=1)
+    with pytest.raises(httpx.ConnectError, match=GOOD):
+        answer(pool)
+    # One retry: the third host is never reached and the last error is raised
+    assert [host.client.calls for host in pool.hosts] == [1, 1, 0]
+
+
+def test_request_errors_are_not_retried_elsewhere():
+    pool = fake_pool([GOOD, DOWN])
+    
+    def bad_request(model, **kwargs):
+        raise ResponseError('invalid options', 400)
+    
+    pool.hosts[0].client.chat = bad_request
+    with pytest.raises(ResponseError):
+        answer(pool)
+    assert pool.hosts[0].healthy and pool.hosts[1].client.calls == 0
+
+
+def test_streams_fail_over_before_the_first_chunk():
+    pool = fake_pool([DOWN, GOOD], failing=[DOWN])
+    assert answer(pool, stream=True)['message']['content'] == GOOD
+    assert not pool.hosts[0].healthy
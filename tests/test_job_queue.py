@@ -0,0 +1,86 @@
+from job_queue import JobQueue
+import pytest
+import time
+
+
+@pytest.fixture
+def jobs(tmp_path):
+    return JobQueue(f"sqlite:///{tmp_path / 'queue.db'}", max_queued_per_user=10)
+
+
+def claim_users(jobs, count, worker='w1'):
+    return [jobs.claim(worker)[1] for _ in range(count)]
+
+
+def test_claims_take_turns_between_users(jobs):
+    for _ in range(3):
+        jobs.put({}, user='alice')
+    jobs.put({}, user='bob')
+    jobs.put({}, user='carol')
+    
+    # Alice queued first, but bob and carol each get a turn before her second job
+    assert claim_users(jobs, 5) == ['alice', 'bob', 'carol', 'alice', 'alice']
+    assert jobs.claim('w1') is None
+
+
+def test_users_served_least_recently_go_first(jobs):
+    for _ in range(2):
+        jobs.put({}, user='alice')
+    jobs.put({}, user='bob')
+    
+    # One worker finishing each job before claiming the next: alice just had a turn, so bob is next
+    claimed = []
+    for _ in range(3):
+        job_id, user, _ = jobs.claim('w1')
+        claimed.append(user)
+        jobs.finish(job_id)
+    assert claimed == ['alice', 'bob', 'alice']
+
+
+def test_running_jobs_count_towards_a_users_turn(jobs):
+    jobs.put({}, user='alice')
+    assert jobs.claim('w1')[1] == 'alice'
+    jobs.put({}, user='alice')
+    jobs.put({}, user='bob')
+    assert claim_users(jobs, 2) == ['bob', 'alice']
+
+
+def test_cheaper_modes_go_first_until_expensive_ones_have_aged(tmp_path):
+    jobs = JobQueue(f"sqlite:///{tmp_path / 'queue.db'}", max_queued_per_user=10, aging_seconds=0.2)
+    jobs.put({'n': 'research'}, user='alice', mode='deep_research')
+    jobs.put({'n': 'normal'}, user='bob', mode='normal')
+    assert [job[1] for job in jobs.waiting()] == ['bob', 'alice']
+    
+    # Two aging periods bring deep research (priority 2) level with, then ahead of, a fresh normal job
+    time.sleep(0.45)
+    jobs.put({'n': 'fresh'}, user='carol', mode='normal')
+    assert jobs.claim('w1')[2] == {'n': 'research'}
+
+
+def test_waiting_reports_positions_in_claim_order(jobs):
+    first = jobs.put({}, user='alice')
+    second = jobs.put({}, user='alice')
+    third = jobs.put({}, user='bob')
+    assert jobs.waiting() == [(first, 'alice', 1, 3), (third, 'bob', 2, 3), (second, 'alice', 3, 3)]
+
+
+def test_cancel_drops_waiting_jobs_and_flags_running_ones(jobs):
+    running = jobs.put({}, user='alice')
+    jobs.claim('w1')
+    jobs.put({}, user='alice')
+    assert jobs.cancel_user('alice', 'Stop') == {'waiting': 1, 'running': 1, 'total': 2}
+    assert jobs.cancel_requests([running]) == {running: 'Stop'}
+
+
+def test_dead_workers_jobs_are_requeued(jobs):
+    jobs.put({'n': 1}, user='alice')
+    jobs.claim('w1')
+    assert jobs.requeue_worker('w1') == 1
+    assert jobs.claim('w2')[2] == {'n': 1}
+
+
+def test_per_user_limit(tmp_path):
+    jobs = JobQueue(f"sqlite:///{tmp_path / 'queue.db'}", max_queued_per_user=1)
+    jobs.put({}, user='alice')
+    with pytest.raises(ValueError):
+        jobs.put({}, user='alice')
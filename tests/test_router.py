@@ -0,0 +1,98 @@
+from council_orchestrator import AICouncil
+from router import QuestionRouter
+import council_orchestrator
+import pytest
+
+ADVISORS = [
+    {'name': 'Minister', 'model': 'qwen2.5:14b'},
+    {'name': 'Minister', 'model': 'llama3.1:8b'},
+    {'name': 'Minister of Finance', 'model': 'mistral:7b'},
+    {'name': 'Minister of Defense', 'model': 'gemma2:9b'},
+    {'name': 'Prime Minister', 'model': 'qwen2.5:14b'}
+]
+
+SIZES = {'qwen2.5:14b': 9_000, 'llama3.1:8b': 4_900, 'mistral:7b': 4_100, 'gemma2:9b': 5_400}
+
+SIMPLE = 'What is a VAT?'
+MODERATE = 'Is a four day week good for a small team of five people?'
+COMPLEX = 'Compare the long-term risks and trade-offs of our expansion strategy versus staying regional.'
+
+
+@pytest.fixture
+def router():
+    return QuestionRouter()
+
+
+@pytest.mark.parametrize('question, tier', [(SIMPLE, 'simple'), (MODERATE, 'moderate'), (COMPLEX, 'complex')])
+def test_tiers(router, question, tier):
+    assert router.classify(question)[0] == tier
+
+
+def test_simple_tier_keeps_the_advisors_models(router):
+    decision = router.route(SIMPLE, ADVISORS, model_sizes=SIZES)
+    
+    assert [entry['index'] for entry in decision['advisors']] == [0, 4]
+    assert router.apply(ADVISORS, decision) == [ADVISORS[0], ADVISORS[4]]
+    assert decision['estimated_saving'] > 0
+
+
+def test_small_models_is_opt_in():
+    router = QuestionRouter(tiers={'simple': {'small_models': True}})
+    convened = router.apply(ADVISORS, router.route(SIMPLE, ADVISORS, model_sizes=SIZES))
+    
+    assert [advisor['model'] for advisor in convened] == ['mistral:7b', 'mistral:7b']
+
+
+def test_advisors_sharing_a_name_stay_separate(router):
+    decision = router.route(MODERATE, ADVISORS, model_sizes=SIZES)
+    convened = router.apply(ADVISORS, decision)
+    
+    assert [entry['index'] for entry in decision['advisors']] == [0, 1, 2, 4]
+    assert [advisor['model'] for advisor in convened] == ['qwen2.5:14b', 'llama3.1:8b', 'mistral:7b', 'qwen2.5:14b']
+
+
+def test_complex_tier_convenes_everyone(router):
+    decision = router.route(COMPLEX, ADVISORS, model_sizes=SIZES)
+    
+    assert router.apply(ADVISORS, decision) == ADVISORS
+    assert decision['estimated_saving'] == 0
+
+
+def test_auto_mode_sends_current_events_to_web_search(router):
+    decision = router.route('What is the weather in Oslo today?', ADVISORS, mode='auto')
+    
+    assert decision['mode'] == 'web_search'
+    assert router.apply(ADVISORS, decision) == ADVISORS
+
+
+def test_classifier_settles_the_middle_band():
+    router = QuestionRouter(classifier=lambda question: 'complex')
+    assert router.classify(MODERATE)[::3] == ('complex', 'model')
+
+
+class RecordingClient:
+    """Stands in for ollama.Client, noting which host each classification went to"""
+    
+    calls = []
+    
+    def __init__(self, host=None):
+        self.host = host
+    
+    def generate(self, **request):
+        RecordingClient.calls.append((self.host, request['model']))
+        return {'response': 'complex'}
+
+
+def test_model_classifier_asks_the_sessions_host(monkeypatch):
+    monkeypatch.setattr(council_orchestrator, 'Client', RecordingClient)
+    monkeypatch.setattr(RecordingClient, 'calls', [])
+    council = AICouncil(ollama_host='http://127.0.0.1:9', router_model='qwen2.5:0.5b')
+    session = council.fork()
+    session.set_ollama_host('http://127.0.0.1:10')
+    
+    decision = session.route(MODERATE)
+    assert (decision['tier'], decision['source']) == ('complex', 'model')
+    assert RecordingClient.calls == [('http://127.0.0.1:10', 'qwen2.5:0.5b')]
+    
+    council.route(MODERATE)
+    assert RecordingClient.calls[-1] == ('http://127.0.0.1:9', 'qwen2.5:0.5b')
@@ -0,0 +1,167 @@
+from scheduler import CouncilScheduler, admission_order
+from collections import namedtuple
+import asyncio
+import pytest
+import threading
+import time
+
+Waiting = namedtuple('Waiting', 'name user priority submitted_at')
+
+
+class Recorder:
+    """Jobs for a one-slot scheduler that record the order they start in"""
+    
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.started = []
+        self.gate = threading.Event()
+        self.done = threading.Semaphore(0)
+    
+    def blocker(self, user='blocker'):
+        """Occupy the only slot until release()"""
+        return self.scheduler.submit(self.job('blocker', wait=True), user)
+    
+    def submit(self, name, user, mode='normal', **options):
+        return self.scheduler.submit(self.job(name), user, mode, **options)
+    
+    def job(self, name, wait=False):
+        def run():
+            self.started.append(name)
+            if wait:
+                self.gate.wait(5)
+            self.done.release()
+        return run
+    
+    def release(self, finishing):
+        self.gate.set()
+        for _ in range(finishing):
+            assert self.done.acquire(timeout=5)
+
+
+@pytest.fixture
+def recorder():
+    return Recorder(CouncilScheduler(max_running=1, max_queued_per_user=10))
+
+
+def names(jobs):
+    return [job.name for job in jobs]
+
+
+def test_admission_order_priority_then_round_robin_then_arrival():
+    waiting = [
+        Waiting('a1', 'a', 1, 0), Waiting('a2', 'a', 1, 0), Waiting('b1', 'b', 1, 0),
+        Waiting('c1', 'c', 2, 0), Waiting('b2', 'b', 0, 0)
+    ]
+    assert names(admission_order(waiting, [], now=0)) == ['b2', 'a1', 'b1', 'a2', 'c1']
+    # A running job of a's pushes a's waiting ones back a turn
+    assert names(admission_order(waiting, ['a'], now=0)) == ['b2', 'b1', 'a1', 'a2', 'c1']
+
+
+def test_admission_order_ages_waiting_jobs():
+    waiting = [Waiting('research', 'a', 2, 0), Waiting('search', 'b', 0, 100)]
+    assert names(admission_order(waiting, [], now=100, aging_seconds=60)) == ['search', 'research']
+    # After two aging periods deep research is level with web search and wins on arrival
+    assert names(admission_order(waiting, [], now=120, aging_seconds=60)) == ['research', 'search']
+    assert names(admission_order(waiting, [], now=120, aging_seconds=0)) == ['search', 'research']
+
+
+def test_users_take_turns(recorder):
+    recorder.blocker()
+    for name, user in [('a1', 'a'), ('a2', 'a'), ('a3', 'a'), ('b1', 'b'), ('c1', 'c')]:
+        recorder.submit(name, user)
+    
+    recorder.release(6)
+    assert recorder.started == ['blocker', 'a1', 'b1', 'c1', 'a2', 'a3']
+
+
+def test_running_job_counts_toward_its_users_turn(recorder):
+    recorder.blocker(user='a')
+    recorder.submit('a2', 'a')
+    recorder.submit('b1', 'b')
+    
+    recorder.release(3)
+    assert recorder.started == ['blocker', 'b1', 'a2']
+
+
+def test_mode_priority(recorder):
+    recorder.blocker()
+    recorder.submit('research', 'a', 'deep_research')
+    recorder.submit('batch', 'b', 'batch')
+    recorder.submit('normal', 'c', 'normal')
+    recorder.submit('search', 'd', 'web_search')
+    
+    recorder.release(5)
+    assert recorder.started == ['blocker', 'search', 'normal', 'research', 'batch']
+
+
+def test_positions_are_reported_as_they_change(recorder):
+    positions = {'a': [], 'b': []}
+    recorder.blocker()
+    recorder.submit('a1', 'a', on_position=lambda position, length: positions['a'].append((position, length)))
+    recorder.submit('b1', 'b', 'web_search', on_position=lambda position, length: positions['b'].append((position, length)))
+    
+    recorder.release(3)
+    # Positions are sent by whichever thread dispatched, which may still be at it
+    deadline = time.time() + 5
+    while len(positions['a']) < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    assert positions == {'a': [(1, 1), (2, 2), (1, 1)], 'b': [(1, 2)]}
+
+
+def test_cancel_drops_waiting_jobs_and_cancels_running_ones(recorder):
+    running = recorder.blocker(user='a')
+    waiting = recorder.submit('a2', 'a')
+    recorder.submit('b1', 'b')
+    
+    assert recorder.scheduler.cancel_user('a', 'Stopped') == {'waiting': 1, 'running': 1, 'total': 2}
+    assert running.cancel.reason == 'Stopped' and waiting.cancel.cancelled
+    assert not recorder.scheduler.cancel(waiting.job_id)
+    
+    recorder.release(2)
+    assert recorder.started == ['blocker', 'b1']
+
+
+def test_queued_jobs_per_user_are_limited():
+    scheduler = CouncilScheduler(max_running=1, max_queued_per_user=2)
+    gate = threading.Event()
+    scheduler.submit(lambda: gate.wait(5), 'a')
+    scheduler.submit(lambda: None, 'a')
+    scheduler.submit(lambda: None, 'a')
+    with pytest.raises(ValueError):
+        scheduler.submit(lambda: None, 'a')
+    gate.set()
+
+
+def test_coroutines_run_on_the_loop_without_a_thread():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    scheduler = CouncilScheduler(max_running=1, loop=loop)
+    threads = []
+    finished = threading.Event()
+    
+    async def council():
+        threads.append(threading.current_thread())
+        await asyncio.sleep(0.01)
+    
+    async def failing():
+        raise RuntimeError('model went away')
+    
+    scheduler.submit(failing, 'a')
+    scheduler.submit(council, 'b')
+    scheduler.submit(finished.set, 'c')
+    
+    assert finished.wait(5)
+    assert threads == [thread]
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def test_call_waits_for_a_slot_and_returns_the_result(recorder):
+    recorder.blocker()
+    results = []
+    caller = threading.Thread(target=lambda: results.append(recorder.scheduler.call(lambda: 42, 'batch')))
+    caller.start()
+    
+    recorder.release(1)
+    caller.join(5)
+    assert results == [42]
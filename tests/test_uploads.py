@@ -0,0 +1,56 @@
+from uploads import UploadManager, UploadMismatch
+import hashlib
+import os
+import pytest
+
+DATA = b'council minutes ' * 100
+
+
+@pytest.fixture
+def uploads(tmp_path):
+    return UploadManager(str(tmp_path), max_chunk_size=512)
+
+
+def send(uploads, data=DATA):
+    upload = uploads.start('minutes.txt', len(data))
+    for offset in range(0, len(data), 512):
+        uploads.write_chunk(upload.upload_id, offset, data[offset:offset + 512])
+    return upload
+
+
+def test_finish_moves_the_file_into_place(uploads):
+    upload = send(uploads)
+    result = uploads.finish(upload.upload_id, hashlib.sha256(DATA).hexdigest())
+    
+    with open(result['file_path'], 'rb') as f:
+        assert f.read() == DATA
+    assert result['sha256'] == hashlib.sha256(DATA).hexdigest()
+    assert not os.path.exists(upload.part_path)
+
+
+def test_checksum_mismatch_is_not_retryable(uploads):
+    upload = send(uploads)
+    with pytest.raises(UploadMismatch):
+        uploads.finish(upload.upload_id, hashlib.sha256(b'something else').hexdigest())
+
+
+def test_size_mismatch_on_disk_is_not_retryable(uploads):
+    upload = send(uploads)
+    with open(upload.part_path, 'ab') as f:
+        f.write(b'extra')
+    with pytest.raises(UploadMismatch):
+        uploads.finish(upload.upload_id)
+
+
+def test_incomplete_upload_can_be_resumed_and_finished(uploads):
+    upload = uploads.start('minutes.txt', len(DATA))
+    uploads.write_chunk(upload.upload_id, 0, DATA[:512])
+    
+    with pytest.raises(ValueError) as error:
+        uploads.finish(upload.upload_id)
+    assert not isinstance(error.value, UploadMismatch)
+    
+    resumed = uploads.start('minutes.txt', len(DATA), upload.upload_id)
+    for offset in range(resumed.received, len(DATA), 512):
+        uploads.write_chunk(upload.upload_id, offset, DATA[offset:offset + 512])
+    assert uploads.finish(upload.upload_id)['size'] == len(DATA)